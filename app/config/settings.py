@@ -5,9 +5,48 @@ This module contains the Settings class that manages all configuration
 parameters for the application.
 """
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class BackendConfig:
+    """
+    Connection settings of one OpenAI-compatible LLM endpoint.
+    
+    Besides the OpenAI API this can be a local server with an OpenAI-compatible
+    API (e.g. llama.cpp or vLLM), which is cheaper and faster for small stages.
+    """
+    base_url: Optional[str] = None  # None uses the default OpenAI endpoint
+    api_key_env: str = "OPENAI_API_KEY"  # Environment variable holding the API key
+    timeout: Optional[float] = None  # Seconds per request attempt (None uses Settings.llm_attempt_timeout)
+    max_connections: Optional[int] = None  # Connection pool size (None uses Settings.llm_max_connections)
+    
+    def get_api_key(self) -> Optional[str]:
+        """
+        Get the API key of the backend from the environment.
+        
+        Local servers usually do not check the key, so a placeholder is used
+        for custom base URLs when the variable is not set.
+        
+        Returns:
+            API key, or None to let the client read OPENAI_API_KEY itself
+        """
+        api_key = os.environ.get(self.api_key_env)
+        if not api_key and self.base_url:
+            return "not-needed"
+        return api_key
+
+
+@dataclass
+class StageConfig:
+    """
+    Model settings of one pipeline stage.
+    """
+    model: Optional[str] = None  # None uses Settings.llm_model
+    temperature: Optional[float] = None  # None uses Settings.llm_temperature
+    max_tokens: Optional[int] = None  # Completion token limit (None leaves it to the model)
 
 
 @dataclass
@@ -23,6 +62,7 @@ class Settings:
     templates_dir: Path = Path("templates")
     inputs_dir: Path = Path("inputs")
     outputs_dir: Path = Path("outputs")
+    cache_dir: Path = Path("cache")
     
     # Input directories
     cv_dir: Path = Path("inputs/cv")
@@ -31,9 +71,106 @@ class Settings:
     # Default template directory
     template_dir: str = "default"
     
+    # Markdown to HTML converter: "markdown" (Python-Markdown) or "markdown-it"
+    # (markdown-it-py, faster; falls back to Python-Markdown when not installed)
+    markdown_backend: str = "markdown"
+    
+    # PDF rendering: WeasyPrint runs in long-lived worker processes that keep their
+    # fonts, each replaced after this many documents to cap its memory; pdf_workers
+    # documents (e.g. the CV and letter of 'apply') are rendered at the same time
+    pdf_worker_enabled: bool = True
+    pdf_workers: int = 2
+    pdf_worker_max_documents: int = 100
+    pdf_render_timeout: float = 120.0  # Seconds per document before the renderer is killed
+    
+    # Without WeasyPrint, PDFs are printed by long-lived headless Chromium browsers
+    # (needs the websockets package); each document gets its own tab
+    chromium_pool_enabled: bool = True
+    chromium_binary: Optional[str] = None  # Executable name or path (defaults to the first one found)
+    chromium_browsers: int = 1
+    chromium_max_tabs: int = 4  # Documents printed concurrently over all browsers
+    
+    # Batch runs render documents in a pool of worker processes (0 uses one per core),
+    # so PDF rendering does not compete with LLM calls for the interpreter
+    render_pool_enabled: bool = True
+    render_workers: int = 0
+    
     # LLM settings
-    llm_model: str = "gpt-4o"
-    llm_temperature: float = 0.3
+    llm_model: str = "gpt-4o"  # Default model of stages that do not set their own
+    llm_temperature: float = 0.3  # Default temperature of stages that do not set their own
+    llm_streaming: bool = False  # Stream generated documents to a partial markdown file and the console
+    cv_parallel_sections: bool = False  # Generate the CV template's ## sections concurrently and assemble them
+    llm_candidates: int = 1  # Candidates generated per document; the best-scoring one is kept
+    llm_candidates_single_request: bool = True  # Request all candidates at once with n (False sends concurrent requests)
+    
+    # LLM backends (OpenAI-compatible endpoints) by name; stages without an entry in
+    # llm_stage_backends use "default". For example, to extract names with a local server:
+    #   llm_backends["local"] = BackendConfig(base_url="http://localhost:8080/v1", timeout=30.0)
+    #   llm_stage_backends["extraction"] = "local"
+    llm_backends: Dict[str, BackendConfig] = field(default_factory=lambda: {"default": BackendConfig()})
+    llm_stage_backends: Dict[str, str] = field(default_factory=dict)
+    
+    # LLM connection pool settings (per backend)
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 60.0  # Seconds an idle connection is kept open
+    
+    # Number of jobs processed concurrently in batch mode
+    batch_concurrency: int = 4
+    
+    # Job description cleaning: strip boilerplate before prompting and drop paragraphs
+    # that occur in at least this many job descriptions of the same directory
+    jd_cleaning_enabled: bool = True
+    jd_dedupe_min_documents: int = 3
+    
+    # Number of CV entries (bullets and paragraphs) most relevant to the job that are
+    # sent to the cover letter prompt instead of the whole CV; opt-in, because the
+    # selection is per job and replaces the CV in the cacheable shared prompt prefix
+    # (0 sends the whole CV in the shared prefix)
+    letter_cv_top_k: int = 0
+    
+    # Minimum confidence for locally extracted names to skip the LLM extraction call
+    name_extraction_min_confidence: float = 0.8
+    
+    # LLM rate limiting settings (shared by all LLM calls in the process; 0 disables a budget)
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 150000
+    llm_max_concurrency: int = 16
+    llm_rate_limit_max_retries: int = 5
+    
+    # LLM call policy settings
+    llm_attempt_timeout: float = 120.0  # Seconds per request attempt
+    llm_max_retries: int = 2  # Retries after timeouts, connection errors and server errors
+    llm_backoff_base: float = 1.0  # Seconds before the first retry, doubled on each retry
+    llm_backoff_max: float = 30.0
+    llm_backoff_jitter: float = 0.5  # Fraction of the backoff that is randomized
+    llm_run_deadline: float = 600.0  # Seconds for all LLM calls of one pipeline run (0 disables)
+    llm_hedging_enabled: bool = False  # Send a duplicate request once a call exceeds the stage's p95 latency
+    llm_hedge_min_samples: int = 20  # Latency samples needed before hedging starts
+    llm_telemetry_enabled: bool = True  # Append a record of every LLM call to logs/llm_calls.jsonl
+    
+    # Model, temperature and completion token limit per pipeline stage; name extraction
+    # only pulls two short strings out of the inputs, so it uses a small, fast model
+    llm_stages: Dict[str, StageConfig] = field(default_factory=lambda: {
+        "extraction": StageConfig(model="gpt-4o-mini", temperature=0.1, max_tokens=200),
+        "tailoring": StageConfig(max_tokens=8000),
+        "letter": StageConfig(max_tokens=2000),
+        "adoption": StageConfig(max_tokens=8000),
+    })
+    
+    # Prompt token budgets per pipeline stage: prompts are trimmed to fit
+    # (job description first, then the CV)
+    llm_input_token_budgets: Dict[str, int] = field(default_factory=lambda: {
+        "extraction": 600,
+        "tailoring": 30000,
+        "letter": 30000,
+        "adoption": 30000,
+    })
+    # LLM response cache settings; opt-in, since a cached response is returned even
+    # for sampled (temperature > 0) requests, where a rerun should give a new draft
+    llm_cache_enabled: bool = False
+    llm_cache_max_bytes: int = 100 * 1024 * 1024  # 100 MB
+    llm_cache_ttl_seconds: int = 30 * 24 * 60 * 60  # 30 days
     
     def __post_init__(self):
         """
@@ -43,6 +180,7 @@ class Settings:
         self.templates_dir = self.base_dir / self.templates_dir
         self.inputs_dir = self.base_dir / self.inputs_dir
         self.outputs_dir = self.base_dir / self.outputs_dir
+        self.cache_dir = self.base_dir / self.cache_dir
         self.cv_dir = self.base_dir / self.cv_dir
         self.job_descriptions_dir = self.base_dir / self.job_descriptions_dir
         
@@ -56,9 +194,47 @@ class Settings:
         self.templates_dir.mkdir(parents=True, exist_ok=True)
         self.inputs_dir.mkdir(parents=True, exist_ok=True)
         self.outputs_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cv_dir.mkdir(parents=True, exist_ok=True)
         self.job_descriptions_dir.mkdir(parents=True, exist_ok=True)
     
+    def get_stage_config(self, stage: Optional[str] = None) -> StageConfig:
+        """
+        Get the model settings of a pipeline stage, with defaults filled in.
+        
+        When llm_model selects the offline fake backend, it serves every stage.
+        
+        Args:
+            stage: Name of the pipeline stage (None for the defaults)
+            
+        Returns:
+            StageConfig with model and temperature set
+        """
+        config = self.llm_stages.get(stage) or StageConfig()
+        model = config.model or self.llm_model
+        if self.llm_model.split(":", 1)[0] == "fake":
+            model = self.llm_model
+        temperature = config.temperature if config.temperature is not None else self.llm_temperature
+        return StageConfig(model=model, temperature=temperature, max_tokens=config.max_tokens)
+    
+    def get_backend(self, stage: Optional[str] = None) -> Tuple[str, BackendConfig]:
+        """
+        Get the LLM backend used by a pipeline stage.
+        
+        Args:
+            stage: Name of the pipeline stage (None for the default backend)
+            
+        Returns:
+            Tuple of (backend name, backend configuration)
+            
+        Raises:
+            ValueError: If the stage is mapped to an unknown backend
+        """
+        name = self.llm_stage_backends.get(stage, "default") if stage else "default"
+        if name not in self.llm_backends:
+            raise ValueError(f"Unknown LLM backend '{name}' for stage '{stage}'")
+        return name, self.llm_backends[name]
+    
     def get_template_path(self) -> Path:
         """
         Get the path to the current template directory.
@@ -0,0 +1,404 @@
+"""
+LLM response cache module for the CV Assistant application.
+
+This module provides a persistent, content-addressed cache for LLM responses
+so that byte-identical requests do not pay for a second model round trip.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResponseCache:
+    """
+    On-disk LLM response cache.
+    
+    Each entry is stored as a JSON file named after the SHA-256 hash of the
+    request (backend, model, temperature, max_tokens and message list). Hit/miss
+    counters are persisted in batches rather than on every lookup. Entries expire after a
+    configurable TTL, and the cache is kept under a size limit by evicting
+    the least recently used entries first (tracked via file modification time).
+    The total size is tracked in memory, so the directory is only scanned when
+    the limit is exceeded.
+    """
+    
+    STATS_FILE = "stats.json"
+    
+    # Lookups counted in memory before the persisted counters are updated
+    STATS_FLUSH_INTERVAL = 50
+    
+    def __init__(self, cache_dir: Path, max_bytes: int, ttl_seconds: int):
+        """
+        Initialize the response cache.
+        
+        Args:
+            cache_dir: Directory in which cache entries are stored
+            max_bytes: Maximum total size of the cache entries in bytes
+            ttl_seconds: Time to live of a cache entry in seconds
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._pending = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        # Total size of the entries, counted on the first write (None until then)
+        self._size: Optional[int] = None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def make_key(
+        model: str, 
+        temperature: float, 
+        messages: List[Any], 
+        backend: Optional[str] = None, 
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Build the cache key for an LLM request.
+        
+        Args:
+            model: Name of the model
+            temperature: Sampling temperature
+            messages: List of LangChain messages sent to the model
+            backend: Backend serving the model (its base URL, or its name), since the
+                same model name can mean different models on different servers
+            max_tokens: Completion token limit, which can truncate the response
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = {
+            "backend": backend,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": [[message.type, message.content] for message in messages],
+        }
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        """
+        Get the path of the file holding a cache entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Path to the entry file
+        """
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    def _entries(self) -> List[Path]:
+        """
+        List all entry files in the cache.
+        
+        Returns:
+            List of entry file paths
+        """
+        return [path for path in self.cache_dir.glob("*/*.json") if path.is_file()]
+    
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        """
+        Check whether a cache entry has outlived its TTL.
+        
+        Args:
+            entry: Loaded cache entry
+            now: Current timestamp
+            
+        Returns:
+            True if the entry is expired
+        """
+        return self.ttl_seconds > 0 and now - entry.get("created_at", 0) > self.ttl_seconds
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached response content, or None on a miss
+        """
+        path = self._entry_path(key)
+        content = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if self._is_expired(entry, time.time()):
+                self._remove(path)
+            else:
+                content = entry["content"]
+                # Touch the entry so that LRU eviction sees it as recently used
+                os.utime(path, None)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            content = None
+        
+        self._record(hit=content is not None)
+        return content
+    
+    def put(self, key: str, content: str, model: str) -> None:
+        """
+        Store a response in the cache and evict old entries if needed.
+        
+        Args:
+            key: Cache key
+            content: Response content
+            model: Name of the model that produced the response
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"key": key, "model": model, "created_at": time.time(), "content": content}
+        
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        size = tmp_path.stat().st_size
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            if self._size is None:
+                self._size = self._total_size()
+            else:
+                self._size += size - replaced
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self._evict()
+    
+    def _total_size(self) -> int:
+        """
+        Add up the size of all entry files.
+        
+        Returns:
+            Total size in bytes
+        """
+        total = 0
+        for path in self._entries():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+    
+    def _remove(self, path: Path) -> None:
+        """
+        Remove an entry file and subtract it from the tracked size.
+        
+        Args:
+            path: Entry file path
+        """
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+    
+    def _evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits its size limit.
+        
+        Returns:
+            Number of removed entries
+        """
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        
+        with self._lock:
+            self._size = total
+        
+        if removed:
+            logger.debug(f"Evicted {removed} LLM cache entries")
+        return removed
+    
+    def prune(self) -> int:
+        """
+        Remove expired and unreadable entries, then enforce the size limit.
+        
+        Returns:
+            Number of removed entries
+        """
+        now = time.time()
+        removed = 0
+        for path in self._entries():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                expired = self._is_expired(entry, now)
+            except (FileNotFoundError, json.JSONDecodeError):
+                expired = True
+            if expired:
+                self._remove(path)
+                removed += 1
+        
+        return removed + self._evict()
+    
+    def clear(self) -> int:
+        """
+        Remove all entries and reset the hit/miss counters.
+        
+        Returns:
+            Number of removed entries
+        """
+        removed = 0
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+            removed += 1
+        
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self._pending = {"hits": 0, "misses": 0}
+            self._size = 0
+            (self.cache_dir / self.STATS_FILE).unlink(missing_ok=True)
+        
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with entry count, size, limits and hit/miss counters
+        """
+        self.flush_stats()
+        sizes = []
+        for path in self._entries():
+            try:
+                sizes.append(path.stat().st_size)
+            except FileNotFoundError:
+                continue
+        
+        totals = self._load_totals()
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "directory": str(self.cache_dir),
+            "entries": len(sizes),
+            "size_bytes": sum(sizes),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": totals["hits"],
+            "misses": totals["misses"],
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0,
+        }
+    
+    def _load_totals(self) -> Dict[str, int]:
+        """
+        Load the persisted hit/miss counters.
+        
+        Returns:
+            Dictionary with 'hits' and 'misses'
+        """
+        try:
+            with open(self.cache_dir / self.STATS_FILE, "r", encoding="utf-8") as f:
+                totals = json.load(f)
+            return {"hits": int(totals.get("hits", 0)), "misses": int(totals.get("misses", 0))}
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
+            return {"hits": 0, "misses": 0}
+    
+    def _record(self, hit: bool) -> None:
+        """
+        Update the session hit/miss counters, persisting them every
+        STATS_FLUSH_INTERVAL lookups.
+        
+        Args:
+            hit: Whether the lookup was a hit
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._pending["hits" if hit else "misses"] += 1
+            if sum(self._pending.values()) >= self.STATS_FLUSH_INTERVAL:
+                self._flush_pending()
+    
+    def flush_stats(self) -> None:
+        """
+        Add the hit/miss counts not yet persisted to the stats file.
+        """
+        with self._lock:
+            self._flush_pending()
+    
+    def _flush_pending(self) -> None:
+        """
+        Persist the pending hit/miss counts; the caller must hold the lock.
+        """
+        if not any(self._pending.values()):
+            return
+        totals = self._load_totals()
+        for name, count in self._pending.items():
+            totals[name] += count
+        
+        # Stats are best effort, e.g. the cache directory may be gone at exit
+        try:
+            stats_path = self.cache_dir / self.STATS_FILE
+            tmp_path = stats_path.with_name(f"{stats_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(totals, f)
+            os.replace(tmp_path, stats_path)
+        except OSError as e:
+            logger.debug(f"Could not write LLM cache stats: {e}")
+        self._pending = {"hits": 0, "misses": 0}
+
+
+# Cache instances shared by all pipelines in the process, keyed by directory
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(settings) -> ResponseCache:
+    """
+    Get the process-wide response cache for the given settings.
+    
+    Args:
+        settings: Application settings
+        
+    Returns:
+        Shared ResponseCache instance
+    """
+    cache_dir = Path(settings.cache_dir) / "llm"
+    with _caches_lock:
+        cache = _caches.get(str(cache_dir))
+        if cache is None:
+            cache = ResponseCache(
+                cache_dir,
+                max_bytes=settings.llm_cache_max_bytes,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+            )
+            _caches[str(cache_dir)] = cache
+            atexit.register(cache.flush_stats)
+        return cache
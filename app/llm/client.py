@@ -0,0 +1,253 @@
+"""
+LLM client module for the CV Assistant application.
+
+This module provides a process-wide registry of chat model clients so that
+all pipelines and stages reuse the same HTTP connection pools instead of
+creating a new client (and new connections) for every LLM call.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+
+from app.config.settings import BackendConfig
+from app.llm.fake import FakeChatModel, is_fake_model
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClientRegistry:
+    """
+    Registry of long-lived chat model clients.
+    
+    Chat models are keyed by (model, temperature, backend). All models that
+    talk to the same backend share one pair of pooled HTTP clients (sync and
+    async), so keep-alive connections and TLS sessions survive across calls.
+    """
+    
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._models: Dict[Tuple[str, float, str], BaseChatModel] = {}
+        self._pools: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Close tasks scheduled by close() on a running event loop
+        self._closing = set()
+    
+    def _get_pool(self, settings, backend_name: str, backend: BackendConfig) -> Dict[str, Any]:
+        """
+        Get or create the pooled HTTP clients for a backend.
+        
+        Must be called with the registry lock held.
+        
+        Args:
+            settings: Application settings
+            backend_name: Name of the backend
+            backend: Backend configuration
+            
+        Returns:
+            Dictionary with the sync client, async client and request counter
+        """
+        pool = self._pools.get(backend_name)
+        if pool is not None:
+            return pool
+        
+        max_connections = backend.max_connections or settings.llm_max_connections
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_connections, settings.llm_max_keepalive_connections),
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        )
+        pool = {"requests": 0}
+        
+        def count_request(request):
+            pool["requests"] += 1
+        
+        async def count_async_request(request):
+            pool["requests"] += 1
+        
+        pool["client"] = httpx.Client(limits=limits, event_hooks={"request": [count_request]})
+        pool["async_client"] = httpx.AsyncClient(limits=limits, event_hooks={"request": [count_async_request]})
+        self._pools[backend_name] = pool
+        
+        logger.debug(f"Created HTTP connection pool for backend {backend_name} at "
+                     f"{backend.base_url or 'default endpoint'} (max_connections={max_connections})")
+        return pool
+    
+    def get_chat_model(self, settings, model: str, temperature: float, stage: Optional[str] = None) -> BaseChatModel:
+        """
+        Get a shared chat model client.
+        
+        The stage selects the backend through Settings.llm_stage_backends. Model
+        names starting with "fake" select the offline fake backend, which needs
+        neither an API key nor a connection pool.
+        
+        Args:
+            settings: Application settings
+            model: Name of the model
+            temperature: Sampling temperature
+            stage: Optional name of the pipeline stage making the call
+            
+        Returns:
+            Long-lived ChatOpenAI (or FakeChatModel) instance
+        """
+        backend_name, backend = settings.get_backend(stage)
+        key = (model, temperature, backend_name)
+        
+        with self._lock:
+            chat_model = self._models.get(key)
+            if chat_model is None and is_fake_model(model):
+                chat_model = FakeChatModel.from_spec(model)
+                self._models[key] = chat_model
+                logger.debug(f"Created fake chat model: {model}")
+            elif chat_model is None:
+                pool = self._get_pool(settings, backend_name, backend)
+                kwargs = {}
+                if backend.base_url:
+                    kwargs["base_url"] = backend.base_url
+                api_key = backend.get_api_key()
+                if api_key:
+                    kwargs["api_key"] = api_key
+                chat_model = ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    http_client=pool["client"],
+                    http_async_client=pool["async_client"],
+                    # Retries and timeouts are handled by the app's call policy and rate limiter
+                    max_retries=0,
+                    timeout=backend.timeout or settings.llm_attempt_timeout,
+                    # Report token usage on streamed responses too
+                    stream_usage=True,
+                    **kwargs
+                )
+                self._models[key] = chat_model
+                logger.debug(f"Created chat model client: model={model}, temperature={temperature}, backend={backend_name}")
+            return chat_model
+    
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get connection pool utilisation statistics.
+        
+        Returns:
+            Dictionary mapping each backend to its request and connection counts
+        """
+        stats = {}
+        with self._lock:
+            for backend_name, pool in self._pools.items():
+                # httpx does not expose pool state publicly, so fall back to zero if the transport changes
+                connections = getattr(getattr(pool["client"]._transport, "_pool", None), "connections", [])
+                idle = sum(1 for connection in connections if connection.is_idle())
+                stats[backend_name] = {
+                    "requests": pool["requests"],
+                    "connections": len(connections),
+                    "idle_connections": idle,
+                    "models": sum(1 for key in self._models if key[2] == backend_name),
+                }
+        return stats
+    
+    def _detach(self) -> List[Dict[str, Any]]:
+        """
+        Forget all chat models and hand over the pools for closing.
+        
+        Returns:
+            List of the detached pools
+        """
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._models.clear()
+        return pools
+    
+    @staticmethod
+    async def _aclose_async_clients(pools: List[Dict[str, Any]]) -> None:
+        """
+        Close the async HTTP clients of detached pools.
+        
+        Args:
+            pools: Detached pools
+        """
+        for pool in pools:
+            try:
+                await pool["async_client"].aclose()
+            except Exception as e:
+                # Connections opened on an event loop that has since closed cannot be shut down cleanly
+                logger.debug(f"Could not close async HTTP client: {e}")
+    
+    def close(self) -> None:
+        """
+        Close all pooled HTTP clients and forget all chat models.
+        
+        Async clients are closed on a new event loop; when called from a running
+        loop, their closing is scheduled on that loop instead (use aclose() to
+        wait for it).
+        """
+        pools = self._detach()
+        for pool in pools:
+            pool["client"].close()
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._aclose_async_clients(pools))
+        else:
+            task = loop.create_task(self._aclose_async_clients(pools))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+    
+    async def aclose(self) -> None:
+        """
+        Close all pooled HTTP clients and forget all chat models from async code.
+        """
+        pools = self._detach()
+        for pool in pools:
+            pool["client"].close()
+        await self._aclose_async_clients(pools)
+
+
+# Registry shared by all pipelines in the process
+_registry = ClientRegistry()
+
+
+def get_chat_model(settings, model: str, temperature: float, stage: Optional[str] = None) -> BaseChatModel:
+    """
+    Get a shared chat model client from the process-wide registry.
+    
+    Args:
+        settings: Application settings
+        model: Name of the model
+        temperature: Sampling temperature
+        stage: Optional name of the pipeline stage making the call, which selects the backend
+        
+    Returns:
+        Long-lived ChatOpenAI (or FakeChatModel) instance
+    """
+    return _registry.get_chat_model(settings, model, temperature, stage)
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Get connection pool utilisation statistics from the process-wide registry.
+    
+    Returns:
+        Dictionary mapping each backend to its request and connection counts
+    """
+    return _registry.pool_stats()
+
+
+def close_clients() -> None:
+    """
+    Close all clients in the process-wide registry.
+    """
+    _registry.close()
+
+
+async def aclose_clients() -> None:
+    """
+    Close all clients in the process-wide registry from async code.
+    """
+    await _registry.aclose()
@@ -0,0 +1,391 @@
+"""
+Fake LLM backend module for the CV Assistant application.
+
+This module provides a chat model that needs no network: it answers with
+deterministic, template-shaped output after a configurable latency, and
+streams its output token by token. Select it through Settings.llm_model with
+a specification such as "fake:latency=2s,jitter=0.5,ttft=300ms".
+
+Options:
+    latency: Total time of a completion (e.g. "2s", "500ms", "1.5")
+    jitter: Relative random variation of the latency (0.5 means ±50%)
+    ttft: Time to first token when streaming (defaults to 20% of the latency)
+    tps: Output tokens per second; when set, generation time grows with the output length
+    words: Number of filler words per template placeholder
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.llm.tokens import CHARS_PER_TOKEN, count_tokens
+from app.utils.name_extraction import extract_candidate_name, extract_company_name
+
+# Prefix of model names served by the fake backend
+FAKE_MODEL_PREFIX = "fake"
+
+# Shortest sleep while streaming; shorter chunk intervals are accumulated
+MIN_SLEEP_SECONDS = 0.01
+
+# Words used for filler text
+FILLER_WORDS = (
+    "delivered scalable reliable systems led cross-functional teams improved performance "
+    "designed automated pipelines mentored engineers shipped features reduced costs "
+    "collaborated stakeholders built platforms optimised workflows"
+).split()
+
+
+def is_fake_model(model: str) -> bool:
+    """
+    Check whether a model name selects the fake backend.
+    
+    Args:
+        model: Name of the model
+        
+    Returns:
+        True for "fake" and "fake:<options>"
+    """
+    return model == FAKE_MODEL_PREFIX or model.startswith(FAKE_MODEL_PREFIX + ":")
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration such as "2s", "250ms" or "1.5".
+    
+    Args:
+        value: Duration text (seconds if no unit is given)
+        
+    Returns:
+        Duration in seconds
+        
+    Raises:
+        ValueError: If the duration cannot be parsed
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*", value)
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    seconds = float(match.group(1))
+    return seconds / 1000.0 if match.group(2) == "ms" else seconds
+
+
+def parse_fake_model(model: str) -> Dict[str, Any]:
+    """
+    Parse the options of a fake model specification.
+    
+    Args:
+        model: Model name such as "fake:latency=2s,jitter=0.5"
+        
+    Returns:
+        Dictionary of FakeChatModel field values
+        
+    Raises:
+        ValueError: If an option is unknown or invalid
+    """
+    options: Dict[str, Any] = {}
+    _, _, spec = model.partition(":")
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name in ("latency", "ttft"):
+            options[name] = parse_duration(value)
+        elif name in ("jitter", "tps"):
+            options[name] = float(value)
+        elif name == "words":
+            options[name] = int(value)
+        else:
+            raise ValueError(f"Unknown fake model option: {name}")
+    return options
+
+
+def _fenced_block(text: str, title_pattern: str) -> Optional[str]:
+    """
+    Find a fenced document in a prompt by the title line before it.
+    
+    Args:
+        text: Prompt text
+        title_pattern: Regular expression matching the title line
+        
+    Returns:
+        Document content, or None if there is no such document
+    """
+    match = re.search(title_pattern + r"[^\n]*\n```\n(.*?)\n```", text, re.DOTALL)
+    return match.group(1) if match else None
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model with deterministic output and simulated latency.
+    """
+    
+    model_name: str = FAKE_MODEL_PREFIX
+    latency: float = 1.0
+    jitter: float = 0.0
+    ttft: Optional[float] = None
+    tps: Optional[float] = None
+    words: int = 12
+    
+    @classmethod
+    def from_spec(cls, model: str) -> "FakeChatModel":
+        """
+        Create a fake model from a model name with options.
+        
+        Args:
+            model: Model name such as "fake:latency=2s,jitter=0.5"
+            
+        Returns:
+            FakeChatModel instance
+        """
+        return cls(model_name=model, **parse_fake_model(model))
+    
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+    
+    def _seed(self, messages: List[BaseMessage]) -> int:
+        """
+        Get a random seed derived from the prompt, so equal prompts behave identically.
+        
+        Args:
+            messages: Prompt messages
+            
+        Returns:
+            Integer seed
+        """
+        digest = hashlib.sha256("\n".join(str(message.content) for message in messages).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+    
+    def _delays(self, messages: List[BaseMessage], output_tokens: int = 0) -> tuple:
+        """
+        Get the simulated time to first token and total latency of a completion.
+        
+        Args:
+            messages: Prompt messages
+            output_tokens: Length of the completion, used when a token rate is set
+            
+        Returns:
+            Tuple of (ttft, total) in seconds
+        """
+        rng = random.Random(self._seed(messages))
+        total = max(0.0, self.latency * (1.0 + self.jitter * rng.uniform(-1.0, 1.0)))
+        ttft = min(total, self.ttft if self.ttft is not None else 0.2 * total)
+        if self.tps:
+            total += output_tokens / self.tps
+        return ttft, total
+    
+    def _respond(self, messages: List[BaseMessage], max_tokens: Optional[int] = None, variant: int = 0) -> str:
+        """
+        Build the deterministic response to a prompt.
+        
+        Name extraction prompts get JSON; prompts with a template get the
+        template with its placeholders filled in; anything else gets filler text.
+        
+        Args:
+            messages: Prompt messages
+            max_tokens: Optional completion token limit
+            variant: Index of the completion when several are requested with n
+            
+        Returns:
+            Response text
+        """
+        prompt = "\n\n".join(str(message.content) for message in messages)
+        rng = random.Random(self._seed(messages) + variant)
+        
+        if "'candidate_name' and 'company_name'" in prompt:
+            cv = _fenced_block(prompt, r"CV:") or ""
+            jd = _fenced_block(prompt, r"Job Description:") or ""
+            candidate, _ = extract_candidate_name(cv)
+            company, _ = extract_company_name(jd)
+            return json.dumps({"candidate_name": candidate or "Unknown", "company_name": company or "Unknown"})
+        
+        # Facts the letter prompt provides, used for its bracketed placeholders
+        facts = dict(re.findall(r"^- (Candidate's Name|Company Name|Position Title|Current Date): (.+)$", prompt, re.MULTILINE))
+        cv = _fenced_block(prompt, r"Read the (?:source cv|source CV|parts of the source CV)") or ""
+        candidate = facts.get("Candidate's Name") or extract_candidate_name(cv)[0] or "Candidate"
+        
+        def filler(count: int) -> str:
+            return " ".join(rng.choice(FILLER_WORDS) for _ in range(count)).capitalize() + "."
+        
+        def bracketed(match: re.Match) -> str:
+            label = match.group(1)
+            known = {
+                "Current Date": facts.get("Current Date"),
+                "Company Name": facts.get("Company Name"),
+                "Position Title": facts.get("Position Title"),
+                "Your Full Name": candidate,
+            }
+            return known.get(label) or filler(3).rstrip(".")
+        
+        template = _fenced_block(prompt, r"Part of the template to generate:")
+        if template is None:
+            template = _fenced_block(prompt, r"Read the (?:cover letter )?template:")
+        if template is None:
+            content = "\n\n".join(filler(self.words) for _ in range(5))
+        else:
+            content = re.sub(r"\{\{\s*name\s*\}\}", candidate, template)
+            content = re.sub(r"\{\{\s*\w+\s*\}\}", lambda match: filler(self.words), content)
+            content = re.sub(r"\[([^\]\n]{1,40})\]", bracketed, content)
+        
+        if max_tokens is not None and count_tokens(content, self.model_name) > max_tokens:
+            content = content[:max_tokens * CHARS_PER_TOKEN]
+        return content
+    
+    def _message(self, messages: List[BaseMessage], content: str) -> AIMessage:
+        """
+        Wrap response text in a message with usage metadata.
+        
+        Args:
+            messages: Prompt messages
+            content: Response text
+            
+        Returns:
+            AI message
+        """
+        input_tokens = sum(count_tokens(str(message.content), self.model_name) for message in messages)
+        output_tokens = count_tokens(content, self.model_name)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model_name},
+        )
+    
+    def _chunks(self, content: str) -> List[str]:
+        """
+        Split response text into token-sized stream chunks.
+        
+        Args:
+            content: Response text
+            
+        Returns:
+            List of chunks
+        """
+        return re.findall(r"\s*\S{1,%d}|\s+$" % CHARS_PER_TOKEN, content) or [content]
+    
+    def _result(self, messages: List[BaseMessage], options: Dict[str, Any]) -> ChatResult:
+        """
+        Build the result of a completion request, with n completions if requested.
+        
+        Args:
+            messages: Prompt messages
+            options: Request options (max_tokens, n)
+            
+        Returns:
+            Chat result with one generation per completion
+        """
+        contents = [self._respond(messages, options.get("max_tokens"), variant) for variant in range(options.get("n") or 1)]
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, content)) for content in contents])
+    
+    def _output_tokens(self, result: ChatResult) -> int:
+        """
+        Get the length of the longest completion of a result.
+        
+        Args:
+            result: Chat result
+            
+        Returns:
+            Output token count
+        """
+        return max(generation.message.usage_metadata["output_tokens"] for generation in result.generations)
+    
+    def _generate(
+        self, 
+        messages: List[BaseMessage], 
+        stop: Optional[List[str]] = None, 
+        run_manager: Any = None, 
+        **kwargs: Any
+    ) -> ChatResult:
+        result = self._result(messages, kwargs)
+        _, total = self._delays(messages, self._output_tokens(result))
+        time.sleep(total)
+        return result
+    
+    async def _agenerate(
+        self, 
+        messages: List[BaseMessage], 
+        stop: Optional[List[str]] = None, 
+        run_manager: Any = None, 
+        **kwargs: Any
+    ) -> ChatResult:
+        result = self._result(messages, kwargs)
+        _, total = self._delays(messages, self._output_tokens(result))
+        await asyncio.sleep(total)
+        return result
+    
+    def _stream_plan(self, messages: List[BaseMessage], max_tokens: Optional[int]) -> tuple:
+        """
+        Plan a streamed response: its chunks and the delay before each one.
+        
+        Args:
+            messages: Prompt messages
+            max_tokens: Optional completion token limit
+            
+        Returns:
+            Tuple of (content, chunks, delays)
+        """
+        content = self._respond(messages, max_tokens)
+        ttft, total = self._delays(messages, count_tokens(content, self.model_name))
+        chunks = self._chunks(content)
+        interval = (total - ttft) / max(1, len(chunks) - 1)
+        delays = [ttft] + [interval] * (len(chunks) - 1)
+        return content, chunks, delays
+    
+    def _usage_chunk(self, messages: List[BaseMessage], content: str) -> ChatGenerationChunk:
+        """
+        Build the final, empty stream chunk carrying the usage metadata.
+        
+        Args:
+            messages: Prompt messages
+            content: Complete response text
+            
+        Returns:
+            Stream chunk
+        """
+        usage = self._message(messages, content).usage_metadata
+        return ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+    
+    def _stream(
+        self, 
+        messages: List[BaseMessage], 
+        stop: Optional[List[str]] = None, 
+        run_manager: Any = None, 
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        content, chunks, delays = self._stream_plan(messages, kwargs.get("max_tokens"))
+        pending = 0.0
+        for chunk, delay in zip(chunks, delays):
+            # Sleep in batches so very short intervals do not cost a syscall per token
+            pending += delay
+            if pending >= MIN_SLEEP_SECONDS:
+                time.sleep(pending)
+                pending = 0.0
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        time.sleep(pending)
+        yield self._usage_chunk(messages, content)
+    
+    async def _astream(
+        self, 
+        messages: List[BaseMessage], 
+        stop: Optional[List[str]] = None, 
+        run_manager: Any = None, 
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        content, chunks, delays = self._stream_plan(messages, kwargs.get("max_tokens"))
+        pending = 0.0
+        for chunk, delay in zip(chunks, delays):
+            pending += delay
+            if pending >= MIN_SLEEP_SECONDS:
+                await asyncio.sleep(pending)
+                pending = 0.0
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        await asyncio.sleep(pending)
+        yield self._usage_chunk(messages, content)
@@ -0,0 +1,575 @@
+"""
+LLM call policy module for the CV Assistant application.
+
+This module wraps every LLM request with per-attempt timeouts, retries with
+exponential backoff and jitter, an overall per-run deadline and optional
+request hedging: if a request has not answered by the observed p95 latency
+of its stage, a duplicate is sent and whichever finishes first wins.
+
+Async requests are timed out and cancelled by the policy. Sync requests run
+in the calling thread and are bounded by the HTTP client's own timeout (set
+per backend in ClientRegistry), because a running thread cannot be stopped;
+the loser of a sync hedge race is abandoned and keeps its rate limiter slot
+until its request finishes or times out.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+import openai
+
+from app.llm.ratelimit import RateLimiter, rate_limit_delay, used_tokens
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Worker threads that race hedged sync requests
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when the per-run deadline leaves no time for another LLM attempt.
+    """
+
+
+class Deadline:
+    """
+    Overall time budget for all LLM calls of a pipeline run.
+    """
+    
+    def __init__(self, seconds: float):
+        """
+        Start the deadline clock.
+        
+        Args:
+            seconds: Time budget in seconds
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self) -> float:
+        """
+        Get the time left before the deadline.
+        
+        Returns:
+            Remaining seconds (negative once expired)
+        """
+        return self.expires_at - time.monotonic()
+
+
+@dataclass
+class CallResult:
+    """
+    Response of an LLM call together with how it was obtained.
+    """
+    response: Any
+    attempts: int = 1
+    hedged: bool = False
+    latency: float = 0.0
+
+
+class LatencyTracker:
+    """
+    Recent latencies of successful LLM requests, keyed by (stage, model).
+    """
+    
+    def __init__(self, window: int = 200):
+        """
+        Initialize an empty tracker.
+        
+        Args:
+            window: Number of recent latencies kept per key
+        """
+        self.window = window
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, key: Tuple[str, str], latency: float) -> None:
+        """
+        Record the latency of a successful request.
+        
+        Args:
+            key: (stage, model) key
+            latency: Latency in seconds
+        """
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+    
+    def percentile(self, key: Tuple[str, str], percentile: float, min_samples: int) -> Optional[float]:
+        """
+        Get a latency percentile for a key.
+        
+        Args:
+            key: (stage, model) key
+            percentile: Percentile between 0 and 100
+            min_samples: Minimum number of samples required
+            
+        Returns:
+            Latency in seconds, or None if there are not enough samples
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+# Latencies shared by all pipelines in the process
+latency_tracker = LatencyTracker()
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed LLM request is worth retrying.
+    
+    Rate limit errors are not retried here; the rate limiter handles them.
+    
+    Args:
+        error: Exception raised by the request
+        
+    Returns:
+        True for timeouts, connection errors and server errors
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, FutureTimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, (openai.APIConnectionError, httpx.TimeoutException, httpx.TransportError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code >= 500 or status_code in (408, 409))
+
+
+class CallPolicy:
+    """
+    Timeout, retry, deadline and hedging policy for LLM requests.
+    """
+    
+    def __init__(
+        self, 
+        attempt_timeout: float, 
+        max_retries: int, 
+        rate_limit_retries: int, 
+        backoff_base: float, 
+        backoff_max: float, 
+        jitter: float, 
+        hedging: bool = False, 
+        hedge_percentile: float = 95.0, 
+        hedge_min_samples: int = 20
+    ):
+        """
+        Initialize the policy.
+        
+        Args:
+            attempt_timeout: Timeout of a single async attempt in seconds (sync attempts
+                use the client's timeout, which is set to the same value)
+            max_retries: Retries after timeouts, connection errors and server errors
+            rate_limit_retries: Retries after rate limit errors
+            backoff_base: Backoff before the first retry in seconds
+            backoff_max: Upper bound of the backoff in seconds
+            jitter: Fraction of the backoff that is randomized (0 to 1)
+            hedging: Whether to send a duplicate request when the first one is slow
+            hedge_percentile: Latency percentile after which the duplicate is sent
+            hedge_min_samples: Latency samples needed before hedging starts
+        """
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.rate_limit_retries = rate_limit_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+    
+    @classmethod
+    def from_settings(cls, settings, backend: Optional[Any] = None) -> "CallPolicy":
+        """
+        Create a policy from the application settings.
+        
+        Args:
+            settings: Application settings
+            backend: Optional BackendConfig whose timeout overrides the default attempt timeout
+            
+        Returns:
+            CallPolicy instance
+        """
+        timeout = getattr(backend, "timeout", None)
+        return cls(
+            attempt_timeout=timeout or settings.llm_attempt_timeout,
+            max_retries=settings.llm_max_retries,
+            rate_limit_retries=settings.llm_rate_limit_max_retries,
+            backoff_base=settings.llm_backoff_base,
+            backoff_max=settings.llm_backoff_max,
+            jitter=settings.llm_backoff_jitter,
+            hedging=settings.llm_hedging_enabled,
+            hedge_min_samples=settings.llm_hedge_min_samples,
+        )
+    
+    def backoff(self, attempt: int) -> float:
+        """
+        Get the backoff before a retry.
+        
+        Args:
+            attempt: Zero-based number of the failed attempt
+            
+        Returns:
+            Seconds to wait
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (1.0 - self.jitter * random.random())
+    
+    def _attempt_timeout(self, deadline: Optional[Deadline]) -> float:
+        """
+        Get the timeout of the next attempt, capped by the deadline.
+        
+        Args:
+            deadline: Optional per-run deadline
+            
+        Returns:
+            Timeout in seconds
+            
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if deadline is None:
+            return self.attempt_timeout
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Run deadline of {deadline.seconds:.0f}s exceeded")
+        return min(self.attempt_timeout, remaining)
+    
+    def _hedge_delay(self, key: Tuple[str, str], timeout: float) -> Optional[float]:
+        """
+        Get the delay after which a hedged duplicate request is sent.
+        
+        Args:
+            key: (stage, model) key
+            timeout: Timeout of the attempt
+            
+        Returns:
+            Delay in seconds, or None if the attempt should not be hedged
+        """
+        if not self.hedging:
+            return None
+        delay = latency_tracker.percentile(key, self.hedge_percentile, self.hedge_min_samples)
+        if delay is None or delay >= timeout:
+            return None
+        return delay
+    
+    def _retry_delay(self, error: Exception, attempt: int, rate_limited_attempts: int, deadline: Optional[Deadline]) -> float:
+        """
+        Decide whether a failed attempt is retried and how long to wait first.
+        
+        Args:
+            error: Exception raised by the attempt
+            attempt: Zero-based number of the failed attempt (excluding rate limit errors)
+            rate_limited_attempts: Number of rate limit errors so far
+            deadline: Optional per-run deadline
+            
+        Returns:
+            Seconds to wait before the retry
+            
+        Raises:
+            Exception: The original error if it is not retried
+        """
+        if rate_limit_delay(error, rate_limited_attempts) is not None:
+            # The rate limiter already pauses new requests for the Retry-After interval
+            if rate_limited_attempts >= self.rate_limit_retries:
+                raise error
+            return 0.0
+        
+        if not is_retryable(error) or attempt >= self.max_retries:
+            raise error
+        
+        delay = self.backoff(attempt)
+        if deadline is not None and delay >= deadline.remaining():
+            raise DeadlineExceeded(f"Run deadline of {deadline.seconds:.0f}s leaves no time to retry") from error
+        logger.warning(f"LLM request failed ({type(error).__name__}: {error}); retrying in {delay:.1f}s")
+        return delay
+    
+    def _release(
+        self, 
+        limiter: RateLimiter, 
+        error: Optional[Exception], 
+        response: Any, 
+        tokens: int, 
+        rate_limited_attempts: int = 0
+    ) -> None:
+        """
+        Release a rate limiter slot according to the outcome of a request.
+        
+        Args:
+            limiter: Rate limiter
+            error: Exception raised by the request, if any
+            response: Response of the request, if it succeeded
+            tokens: Token estimate passed to the limiter
+            rate_limited_attempts: Number of earlier rate limit errors, which grows
+                the pause when the provider sends no Retry-After
+        """
+        if error is None:
+            used = used_tokens(response)
+            limiter.release(extra_tokens=used - tokens if used is not None else 0)
+            return
+        delay = rate_limit_delay(error, rate_limited_attempts)
+        if delay is not None:
+            limiter.release(rate_limited=True, retry_after=delay)
+        else:
+            limiter.release(failed=True)
+    
+    def _single(self, call: Callable[[], Any], limiter: RateLimiter, tokens: int, key: Tuple[str, str], rate_limited_attempts: int) -> Any:
+        """
+        Send one request through the rate limiter in the calling thread.
+        
+        The attempt is bounded by the HTTP client's timeout rather than by the
+        policy, so the request and its limiter slot end together.
+        
+        Args:
+            call: Callable making the LLM request
+            limiter: Rate limiter
+            tokens: Estimated number of tokens used by the request
+            key: (stage, model) key for latency tracking
+            rate_limited_attempts: Number of earlier rate limit errors of this call
+            
+        Returns:
+            Response of the request
+        """
+        limiter.acquire(tokens)
+        started = time.monotonic()
+        try:
+            response = call()
+        except Exception as e:
+            self._release(limiter, e, None, tokens, rate_limited_attempts)
+            raise
+        
+        self._release(limiter, None, response, tokens)
+        latency_tracker.record(key, time.monotonic() - started)
+        return response
+    
+    def _hedged(self, single: Callable[[], Any], delay: float) -> Tuple[Any, bool]:
+        """
+        Race a request against a duplicate sent after a delay.
+        
+        Threads cannot be cancelled, so the losing request is abandoned: it runs
+        until it finishes or hits the client timeout, then releases its slot.
+        
+        Args:
+            single: Callable sending one request
+            delay: Delay before the duplicate is sent
+            
+        Returns:
+            Tuple of (response, hedged)
+        """
+        first = _hedge_executor.submit(single)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result(), False
+        
+        logger.info(f"LLM request slower than {delay:.1f}s; sending a hedged duplicate")
+        second = _hedge_executor.submit(single)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), True
+                error = error or future.exception()
+        raise error
+    
+    def call(
+        self, 
+        call: Callable[[], Any], 
+        limiter: RateLimiter, 
+        tokens: int, 
+        key: Tuple[str, str], 
+        deadline: Optional[Deadline] = None, 
+        hedge: bool = True
+    ) -> CallResult:
+        """
+        Make an LLM request under this policy.
+        
+        Args:
+            call: Callable making the LLM request
+            limiter: Rate limiter
+            tokens: Estimated number of tokens used by the request
+            key: (stage, model) key for latency tracking and hedging
+            deadline: Optional per-run deadline
+            hedge: Whether the request may be hedged (disabled for streamed requests)
+            
+        Returns:
+            CallResult with the response and attempt statistics
+            
+        Raises:
+            Exception: The error the policy gave up on, with an 'attempts' attribute
+                holding the number of requests made
+        """
+        started = time.monotonic()
+        attempt = 0
+        rate_limited_attempts = 0
+        requests = 0
+        try:
+            while True:
+                # Checks the deadline; the attempt itself is bounded by the client timeout
+                timeout = self._attempt_timeout(deadline)
+                requests += 1
+                single = lambda: self._single(call, limiter, tokens, key, rate_limited_attempts)
+                try:
+                    hedge_delay = self._hedge_delay(key, timeout) if hedge else None
+                    if hedge_delay is None:
+                        response, hedged = single(), False
+                    else:
+                        response, hedged = self._hedged(single, hedge_delay)
+                    return CallResult(response, requests, hedged, time.monotonic() - started)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, rate_limited_attempts, deadline)
+                    if rate_limit_delay(e, 0) is not None:
+                        rate_limited_attempts += 1
+                    else:
+                        attempt += 1
+                    time.sleep(delay)
+        except Exception as e:
+            # Tell the caller (telemetry) how many requests were made before giving up
+            e.attempts = requests
+            raise
+    
+    async def _asingle(
+        self, 
+        call: Callable[[], Awaitable[Any]], 
+        limiter: RateLimiter, 
+        tokens: int, 
+        timeout: float, 
+        key: Tuple[str, str], 
+        rate_limited_attempts: int
+    ) -> Any:
+        """
+        Send one async request through the rate limiter with a timeout.
+        
+        Args:
+            call: Callable returning an awaitable that makes the LLM request
+            limiter: Rate limiter
+            tokens: Estimated number of tokens used by the request
+            timeout: Timeout in seconds (time spent waiting for the limiter is not counted)
+            key: (stage, model) key for latency tracking
+            rate_limited_attempts: Number of earlier rate limit errors of this call
+            
+        Returns:
+            Response of the request
+        """
+        await limiter.aacquire(tokens)
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(call(), timeout=timeout)
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"LLM request timed out after {timeout:.1f}s")
+            self._release(limiter, error, None, tokens)
+            raise error
+        except asyncio.CancelledError:
+            # A hedged request that lost the race
+            limiter.release(failed=True)
+            raise
+        except Exception as e:
+            self._release(limiter, e, None, tokens, rate_limited_attempts)
+            raise
+        
+        self._release(limiter, None, response, tokens)
+        latency_tracker.record(key, time.monotonic() - started)
+        return response
+    
+    async def _ahedged(self, single: Callable[[float], Awaitable[Any]], timeout: float, delay: float) -> Tuple[Any, bool]:
+        """
+        Race an async request against a duplicate sent after a delay.
+        
+        Args:
+            single: Callable sending one request with the given timeout
+            timeout: Timeout of the attempt in seconds
+            delay: Delay before the duplicate is sent
+            
+        Returns:
+            Tuple of (response, hedged)
+        """
+        first = asyncio.ensure_future(single(timeout))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result(), False
+        
+        logger.info(f"LLM request slower than {delay:.1f}s; sending a hedged duplicate")
+        second = asyncio.ensure_future(single(max(0.1, timeout - delay)))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), True
+                    error = error or task.exception()
+            raise error
+        finally:
+            # Cancel the request that lost the race
+            for task in pending:
+                task.cancel()
+    
+    async def acall(
+        self, 
+        call: Callable[[], Awaitable[Any]], 
+        limiter: RateLimiter, 
+        tokens: int, 
+        key: Tuple[str, str], 
+        deadline: Optional[Deadline] = None, 
+        hedge: bool = True
+    ) -> CallResult:
+        """
+        Make an async LLM request under this policy.
+        
+        Args:
+            call: Callable returning an awaitable that makes the LLM request
+            limiter: Rate limiter
+            tokens: Estimated number of tokens used by the request
+            key: (stage, model) key for latency tracking and hedging
+            deadline: Optional per-run deadline
+            hedge: Whether the request may be hedged (disabled for streamed requests)
+            
+        Returns:
+            CallResult with the response and attempt statistics
+            
+        Raises:
+            Exception: The error the policy gave up on, with an 'attempts' attribute
+                holding the number of requests made
+        """
+        started = time.monotonic()
+        attempt = 0
+        rate_limited_attempts = 0
+        requests = 0
+        try:
+            while True:
+                timeout = self._attempt_timeout(deadline)
+                requests += 1
+                single = lambda attempt_timeout: self._asingle(call, limiter, tokens, attempt_timeout, key, rate_limited_attempts)
+                try:
+                    hedge_delay = self._hedge_delay(key, timeout) if hedge else None
+                    if hedge_delay is None:
+                        response, hedged = await single(timeout), False
+                    else:
+                        response, hedged = await self._ahedged(single, timeout, hedge_delay)
+                    return CallResult(response, requests, hedged, time.monotonic() - started)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, rate_limited_attempts, deadline)
+                    if rate_limit_delay(e, 0) is not None:
+                        rate_limited_attempts += 1
+                    else:
+                        attempt += 1
+                    await asyncio.sleep(delay)
+        except Exception as e:
+            # Tell the caller (telemetry) how many requests were made before giving up
+            e.attempts = requests
+            raise
@@ -0,0 +1,295 @@
+"""
+Prompt building module for the CV Assistant application.
+
+This module lays prompts out so providers can cache their prefix: everything
+that is shared by all jobs for the same CV and template (role, instructions,
+template, task rules, CV) goes into a byte-identical system message, and the
+per-job parts (job description, names, date, position) go into the human
+message at the end.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from app.llm.tokens import count_message_tokens, count_tokens, truncate_to_tokens
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Process-wide counters of prompt tokens and how many were served from the provider's prompt cache
+prompt_cache_stats: Dict[str, int] = {"input_tokens": 0, "cached_tokens": 0}
+_stats_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so identical content always produces identical prompt bytes.
+    
+    Line endings are unified and trailing whitespace is removed from every
+    line and from the ends of the text.
+    
+    Args:
+        text: Text to normalize
+        
+    Returns:
+        Normalized text
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def _fenced(title: str, content: str) -> str:
+    """
+    Format a document as a titled, fenced block.
+    
+    Args:
+        title: Line introducing the document
+        content: Document content
+        
+    Returns:
+        Formatted block
+    """
+    return f"{title}\n```\n{content}\n```"
+
+
+@dataclass
+class PromptSection:
+    """
+    One section of a prompt.
+    """
+    text: str
+    title: Optional[str] = None  # Set for fenced documents
+    priority: Optional[int] = None  # None is never trimmed; lower priorities are trimmed first
+    max_tokens: Optional[int] = None  # Always cut to this size
+    
+    def render(self) -> str:
+        """
+        Render the section as prompt text.
+        
+        Returns:
+            Section text, fenced under its title for documents
+        """
+        return _fenced(self.title, self.text) if self.title is not None else self.text
+
+
+class PromptBuilder:
+    """
+    Builder for chat prompts with a stable, cacheable prefix.
+    
+    Sections added with add_section()/add_document() form the system message
+    and must only contain content shared across jobs. Sections added with
+    add_job_section()/add_job_document() form the human message.
+    
+    Documents can be given a trim priority; when the prompt exceeds its token
+    budget, the documents with the lowest priority are shortened first.
+    """
+    
+    def __init__(self, role: str):
+        """
+        Start a prompt.
+        
+        Args:
+            role: First line of the system message describing the model's role
+        """
+        self._prefix: List[PromptSection] = [PromptSection(normalize_text(role))]
+        self._suffix: List[PromptSection] = []
+        self.token_count: Optional[int] = None
+    
+    def add_section(self, text: str) -> "PromptBuilder":
+        """
+        Add shared text (e.g. task rules) to the stable prefix.
+        
+        Args:
+            text: Section text
+            
+        Returns:
+            The builder
+        """
+        self._prefix.append(PromptSection(normalize_text(text)))
+        return self
+    
+    def add_document(
+        self, 
+        title: str, 
+        content: str, 
+        priority: Optional[int] = None, 
+        max_tokens: Optional[int] = None
+    ) -> "PromptBuilder":
+        """
+        Add a shared document (CV, template, instructions) to the stable prefix.
+        
+        Args:
+            title: Line introducing the document
+            content: Document content
+            priority: Trim priority (None means the document is never trimmed)
+            max_tokens: Optional size limit of the document
+            
+        Returns:
+            The builder
+        """
+        self._prefix.append(PromptSection(normalize_text(content), title, priority, max_tokens))
+        return self
+    
+    def add_job_section(self, text: str) -> "PromptBuilder":
+        """
+        Add per-job text (names, date, position) to the human message.
+        
+        Args:
+            text: Section text
+            
+        Returns:
+            The builder
+        """
+        self._suffix.append(PromptSection(normalize_text(text)))
+        return self
+    
+    def add_job_document(
+        self, 
+        title: str, 
+        content: str, 
+        priority: Optional[int] = None, 
+        max_tokens: Optional[int] = None
+    ) -> "PromptBuilder":
+        """
+        Add a per-job document (job description) to the human message.
+        
+        Args:
+            title: Line introducing the document
+            content: Document content
+            priority: Trim priority (None means the document is never trimmed)
+            max_tokens: Optional size limit of the document
+            
+        Returns:
+            The builder
+        """
+        self._suffix.append(PromptSection(normalize_text(content), title, priority, max_tokens))
+        return self
+    
+    @property
+    def prefix(self) -> str:
+        """
+        Get the stable system message.
+        
+        Returns:
+            System message content
+        """
+        return "\n\n".join(section.render() for section in self._prefix) + "\n"
+    
+    @property
+    def prefix_hash(self) -> str:
+        """
+        Get a short hash of the stable prefix, for comparing prompts across jobs in logs.
+        
+        Returns:
+            First 12 hex digits of the SHA-256 of the prefix
+        """
+        return hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()[:12]
+    
+    def _messages(self) -> List[BaseMessage]:
+        """
+        Render the current sections as chat messages.
+        
+        Returns:
+            List with the system message and the human message
+        """
+        return [
+            SystemMessage(content=self.prefix),
+            HumanMessage(content="\n\n".join(section.render() for section in self._suffix)),
+        ]
+    
+    def _trim(self, excess: int, model: str) -> None:
+        """
+        Shorten trimmable documents, lowest priority first, by about a number of tokens.
+        
+        Args:
+            excess: Number of tokens to remove
+            model: Name of the model whose tokenizer is used
+        """
+        trimmable = [section for section in self._prefix + self._suffix if section.priority is not None]
+        for section in sorted(trimmable, key=lambda section: section.priority):
+            if excess <= 0:
+                break
+            tokens = count_tokens(section.text, model)
+            section.text = truncate_to_tokens(section.text, max(0, tokens - excess), model)
+            excess -= tokens - count_tokens(section.text, model)
+    
+    def build(self, token_budget: Optional[int] = None, model: str = "gpt-4o") -> List[BaseMessage]:
+        """
+        Build the chat messages.
+        
+        Args:
+            token_budget: Optional maximum number of prompt tokens
+            model: Name of the model whose tokenizer is used for the budget
+            
+        Returns:
+            List with the system message (stable prefix) and the human message (per-job suffix)
+        """
+        for section in self._prefix + self._suffix:
+            if section.max_tokens is not None:
+                section.text = truncate_to_tokens(section.text, section.max_tokens, model)
+        
+        messages = self._messages()
+        self.token_count = count_message_tokens(messages, model)
+        
+        if token_budget is not None and self.token_count > token_budget:
+            original_count = self.token_count
+            self._trim(self.token_count - token_budget, model)
+            messages = self._messages()
+            self.token_count = count_message_tokens(messages, model)
+            logger.warning(f"Prompt trimmed from {original_count} to {self.token_count} tokens to fit the budget of {token_budget}")
+            if self.token_count > token_budget:
+                logger.warning(f"Prompt still exceeds its budget of {token_budget} tokens after trimming")
+        
+        logger.debug(f"Prompt prefix {self.prefix_hash} ({len(self.prefix)} chars, {self.token_count} tokens in total)")
+        return messages
+
+
+def get_cached_tokens(response: Any) -> Optional[int]:
+    """
+    Get the number of prompt tokens served from the provider's prompt cache.
+    
+    Args:
+        response: LangChain message returned by the model
+        
+    Returns:
+        Cached token count, or None if the response does not report it
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        details = usage.get("input_token_details") or {}
+        if isinstance(details.get("cache_read"), int):
+            return details["cache_read"]
+    
+    # Older integrations only expose the raw OpenAI usage block
+    metadata = getattr(response, "response_metadata", None)
+    if isinstance(metadata, dict):
+        token_usage = metadata.get("token_usage") or {}
+        details = token_usage.get("prompt_tokens_details") or {}
+        if isinstance(details.get("cached_tokens"), int):
+            return details["cached_tokens"]
+    return None
+
+
+def record_prompt_cache_usage(response: Any) -> Optional[Dict[str, int]]:
+    """
+    Add a response's prompt and cached token counts to the process-wide counters.
+    
+    Args:
+        response: LangChain message returned by the model
+        
+    Returns:
+        Dictionary with 'input_tokens' and 'cached_tokens' of the response, or
+        None if the response carries no usage metadata
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if not isinstance(usage, dict) or not isinstance(usage.get("input_tokens"), int):
+        return None
+    
+    counts = {"input_tokens": usage["input_tokens"], "cached_tokens": get_cached_tokens(response) or 0}
+    with _stats_lock:
+        for key, value in counts.items():
+            prompt_cache_stats[key] += value
+    return counts
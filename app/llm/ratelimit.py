@@ -0,0 +1,334 @@
+"""
+LLM rate limiting module for the CV Assistant application.
+
+This module provides process-wide rate limiters, one per LLM backend, that
+sit in front of all LLM calls. They enforce requests-per-minute and
+tokens-per-minute budgets with token buckets, and adapt the number of concurrent requests with AIMD
+(additive increase, multiplicative decrease): every success raises the limit
+slightly, every HTTP 429 halves it and pauses new requests for the
+provider's Retry-After interval.
+"""
+import asyncio
+import email.utils
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Polling interval while waiting for a free concurrency slot
+SLOT_POLL_SECONDS = 0.05
+
+# Upper bound for the backoff used when a 429 carries no Retry-After header
+MAX_DEFAULT_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+    
+    The bucket holds at most one minute of budget, so short bursts are
+    allowed as long as the per-minute average is respected.
+    """
+    
+    def __init__(self, rate_per_minute: float):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            rate_per_minute: Budget refilled per minute
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        """
+        Add the budget accumulated since the last update.
+        
+        Args:
+            now: Current monotonic time
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Get the time until the given amount of budget is available.
+        
+        Args:
+            amount: Budget needed (capped at the bucket capacity)
+            now: Current monotonic time
+            
+        Returns:
+            Seconds to wait, 0 if the budget is available now
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def consume(self, amount: float) -> None:
+        """
+        Take budget from the bucket; the balance may go negative to account for
+        usage that turned out larger than estimated.
+        
+        Args:
+            amount: Budget to take
+        """
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Process-wide limiter for LLM requests.
+    
+    Combines request and token budgets (token buckets) with an adaptive
+    concurrency limit driven by rate-limit responses.
+    """
+    
+    def __init__(
+        self, 
+        requests_per_minute: int, 
+        tokens_per_minute: int, 
+        max_concurrency: int, 
+        min_concurrency: int = 1, 
+        increase: float = 1.0, 
+        decrease: float = 0.5
+    ):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            requests_per_minute: Request budget per minute (0 disables the request budget)
+            tokens_per_minute: Token budget per minute (0 disables the token budget)
+            max_concurrency: Upper bound of concurrent requests
+            min_concurrency: Lower bound of concurrent requests
+            increase: Additive increase of the concurrency limit per round of successes
+            decrease: Multiplicative decrease of the concurrency limit on a 429
+        """
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.stats = {"requests": 0, "rate_limited": 0, "waited_seconds": 0.0}
+        self._lock = threading.Lock()
+    
+    def _try_acquire(self, tokens: int) -> float:
+        """
+        Acquire a request slot and budget if available.
+        
+        Args:
+            tokens: Estimated number of tokens used by the request
+            
+        Returns:
+            0 if the slot was acquired, otherwise the number of seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.in_flight >= max(self.min_concurrency, int(self.concurrency_limit)):
+                return SLOT_POLL_SECONDS
+            
+            wait = 0.0
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.wait_time(1, now))
+            if self.token_bucket is not None:
+                wait = max(wait, self.token_bucket.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            
+            if self.request_bucket is not None:
+                self.request_bucket.consume(1)
+            if self.token_bucket is not None:
+                self.token_bucket.consume(tokens)
+            self.in_flight += 1
+            self.stats["requests"] += 1
+            return 0.0
+    
+    def acquire(self, tokens: int) -> None:
+        """
+        Block until a request with the given token estimate may be sent.
+        
+        Args:
+            tokens: Estimated number of tokens used by the request
+        """
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+    
+    async def aacquire(self, tokens: int) -> None:
+        """
+        Wait without blocking the event loop until a request may be sent.
+        
+        Args:
+            tokens: Estimated number of tokens used by the request
+        """
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+    
+    def _record_wait(self, waited: float) -> None:
+        """
+        Record time spent waiting for the limiter.
+        
+        Args:
+            waited: Seconds waited
+        """
+        if waited > 0:
+            with self._lock:
+                self.stats["waited_seconds"] += waited
+            logger.debug(f"Rate limiter delayed LLM request by {waited:.2f}s")
+    
+    def release(
+        self, 
+        rate_limited: bool = False, 
+        retry_after: float = 0.0, 
+        extra_tokens: int = 0, 
+        failed: bool = False
+    ) -> None:
+        """
+        Release a request slot and adapt the concurrency limit.
+        
+        Args:
+            rate_limited: Whether the request was rejected with HTTP 429
+            retry_after: Seconds to pause all requests after a 429
+            extra_tokens: Tokens used beyond the estimate passed to acquire()
+            failed: Whether the request failed for another reason (the limit is left unchanged)
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if failed:
+                pass
+            elif rate_limited:
+                self.stats["rate_limited"] += 1
+                self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit * self.decrease)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                logger.warning(f"LLM rate limit hit; pausing {retry_after:.1f}s, "
+                               f"concurrency limit now {self.concurrency_limit:.1f}")
+            else:
+                self.concurrency_limit = min(float(self.max_concurrency),
+                                             self.concurrency_limit + self.increase / self.concurrency_limit)
+            if extra_tokens and self.token_bucket is not None:
+                self.token_bucket.consume(extra_tokens)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Get the Retry-After delay of a rate limit error.
+    
+    Args:
+        error: Exception raised by the LLM client
+        
+    Returns:
+        Seconds to wait (0 if the provider did not say), or None if the error is not a rate limit error
+    """
+    if getattr(error, "status_code", None) != 429:
+        return None
+    
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        # Retry-After may also be an HTTP date; a malformed one counts as no Retry-After
+        try:
+            retry_date = email.utils.parsedate_to_datetime(retry_after)
+        except (ValueError, TypeError):
+            retry_date = None
+        if retry_date is not None:
+            return max(0.0, retry_date.timestamp() - time.time())
+    return 0.0
+
+
+def used_tokens(response: Any) -> Optional[int]:
+    """
+    Get the total tokens reported in a response's usage metadata.
+    
+    Args:
+        response: LangChain message returned by the model
+        
+    Returns:
+        Total token count, or None if the response carries no usage metadata
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    return None
+
+
+def rate_limit_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Get the pause after a rate limit error.
+    
+    Args:
+        error: Exception raised by the LLM client
+        attempt: Zero-based attempt number
+        
+    Returns:
+        Seconds to pause, or None if the error is not a rate limit error
+    """
+    retry_after = get_retry_after(error)
+    if retry_after is None:
+        return None
+    # Fall back to exponential backoff when the provider gives no Retry-After
+    return retry_after or min(MAX_DEFAULT_BACKOFF_SECONDS, 2.0 ** attempt)
+
+
+# Limiters shared by all pipelines in the process, one per LLM backend
+_limiters: Dict[str, RateLimiter] = {}
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(settings, backend: str = "default") -> RateLimiter:
+    """
+    Get the process-wide rate limiter of a backend, creating it from the settings on first use.
+    
+    Each backend has its own limiter, so rate limits of a remote provider do
+    not slow down calls to a local server.
+    
+    Args:
+        settings: Application settings
+        backend: Name of the LLM backend
+        
+    Returns:
+        Shared RateLimiter instance
+    """
+    with _limiter_lock:
+        limiter = _limiters.get(backend)
+        if limiter is None:
+            limiter = _limiters[backend] = RateLimiter(
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+                max_concurrency=settings.llm_max_concurrency,
+            )
+        return limiter
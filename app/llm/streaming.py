@@ -0,0 +1,126 @@
+"""
+LLM streaming module for the CV Assistant application.
+
+This module writes streamed completions to a partial markdown file as tokens
+arrive and shows live progress on the console. Time to first token is
+reported separately from the total generation time.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Minimum seconds between console progress updates
+PROGRESS_INTERVAL = 0.1
+
+# Streams currently in progress, rendered together on one console line
+_active_streams: Dict[int, "StreamWriter"] = {}
+_progress_lock = threading.Lock()
+_last_render = 0.0
+_last_width = 0
+
+
+def _render_progress(force: bool = False) -> None:
+    """
+    Render the progress of all active streams on one console line.
+    
+    Args:
+        force: Render even if the last update was very recent
+    """
+    global _last_render, _last_width
+    if not sys.stdout.isatty():
+        return
+    with _progress_lock:
+        now = time.monotonic()
+        if not force and now - _last_render < PROGRESS_INTERVAL:
+            return
+        _last_render = now
+        line = " | ".join(f"{writer.label}: {writer.chars:,} chars" for writer in _active_streams.values())
+        sys.stdout.write("\r" + line.ljust(_last_width))
+        sys.stdout.flush()
+        _last_width = len(line)
+
+
+def _clear_progress() -> None:
+    """
+    Clear the console progress line.
+    """
+    global _last_width
+    if not sys.stdout.isatty():
+        return
+    with _progress_lock:
+        sys.stdout.write("\r" + " " * _last_width + "\r")
+        sys.stdout.flush()
+        _last_width = 0
+
+
+class StreamWriter:
+    """
+    Context manager that appends streamed text to a file and tracks timing.
+    """
+    
+    def __init__(self, path: Path, label: str):
+        """
+        Initialize the writer.
+        
+        Args:
+            path: File the streamed text is written to (truncated on enter)
+            label: Label shown in the console progress and logs
+        """
+        self.path = path
+        self.label = label
+        self.chars = 0
+        self.started: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.total: Optional[float] = None
+        self.abandoned = False
+        self._file = None
+    
+    def __enter__(self) -> "StreamWriter":
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.started = time.monotonic()
+        with _progress_lock:
+            _active_streams[id(self)] = self
+        return self
+    
+    def write(self, text: str) -> None:
+        """
+        Append a chunk of streamed text and flush it to disk.
+        
+        Args:
+            text: Text of the chunk
+        """
+        if not text:
+            return
+        if self.ttft is None:
+            self.ttft = time.monotonic() - self.started
+        self._file.write(text)
+        self._file.flush()
+        self.chars += len(text)
+        _render_progress()
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.total = time.monotonic() - self.started
+        self._file.close()
+        with _progress_lock:
+            _active_streams.pop(id(self), None)
+            remaining = len(_active_streams)
+        
+        if remaining:
+            _render_progress(force=True)
+        else:
+            _clear_progress()
+        
+        if self.abandoned:
+            return
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+        if exc_type is None:
+            print(f"✓ Streamed {self.label}: first token after {ttft}, done in {self.total:.2f}s")
+            logger.info(f"Streamed {self.label} to {self.path}: {self.chars} chars, TTFT {ttft}, total {self.total:.2f}s")
+        else:
+            logger.warning(f"Stream for {self.label} interrupted after {self.chars} chars; partial output kept in {self.path}")
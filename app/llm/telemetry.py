@@ -0,0 +1,289 @@
+"""
+LLM telemetry module for the CV Assistant application.
+
+This module appends one JSON line per LLM call to logs/llm_calls.jsonl with
+the pipeline, stage, model, token counts, latency, retries and an estimated
+cost, and summarizes those records into latency percentiles per stage and
+model for capacity planning.
+"""
+import json
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.llm.prompts import get_cached_tokens
+from app.utils.logger import LOG_DIR, get_logger
+
+logger = get_logger(__name__)
+
+# File the call records are appended to
+TELEMETRY_FILE = LOG_DIR / "llm_calls.jsonl"
+
+# Prices in USD per million tokens: (input, cached input, output). Dated model
+# versions (e.g. gpt-4o-2024-08-06) use the price of their longest matching prefix.
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "fake": (0.0, 0.0, 0.0),
+}
+
+# Units accepted by parse_window()
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+_write_lock = threading.Lock()
+
+
+@dataclass
+class CallRecord:
+    """
+    Telemetry of one LLM call.
+    """
+    timestamp: float
+    pipeline: str
+    stage: str
+    model: str
+    backend: str
+    status: str  # "ok" or "error"
+    latency: float  # Seconds, including retries
+    attempts: int = 1
+    hedged: bool = False
+    ttft: Optional[float] = None  # Seconds to the first streamed token
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    predicted_tokens: Optional[int] = None  # Prompt tokens counted locally before the call
+    candidates: int = 1
+    cost: Optional[float] = None  # Estimated USD
+    error: Optional[str] = None
+
+
+def get_model_price(model: str) -> Optional[Tuple[float, float, float]]:
+    """
+    Get the token prices of a model.
+    
+    Args:
+        model: Name of the model
+        
+    Returns:
+        Tuple of USD per million (input, cached input, output) tokens, or None if unknown
+    """
+    base = model.split(":", 1)[0]
+    matches = [name for name in MODEL_PRICES if base == name or base.startswith(name + "-")]
+    if not matches:
+        return None
+    return MODEL_PRICES[max(matches, key=len)]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """
+    Estimate the cost of a call.
+    
+    Args:
+        model: Name of the model
+        prompt_tokens: Prompt tokens, including cached ones
+        completion_tokens: Completion tokens
+        cached_tokens: Prompt tokens served from the provider's prompt cache
+        
+    Returns:
+        Estimated cost in USD, or None if the model's price is unknown
+    """
+    price = get_model_price(model)
+    if price is None:
+        return None
+    input_price, cached_price, output_price = price
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    return (
+        (prompt_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + completion_tokens * output_price
+    ) / 1_000_000
+
+
+def make_record(
+    pipeline: str, 
+    stage: str, 
+    model: str, 
+    backend: str, 
+    result: Any = None, 
+    latency: Optional[float] = None, 
+    ttft: Optional[float] = None, 
+    predicted_tokens: Optional[int] = None, 
+    candidates: int = 1, 
+    error: Optional[Exception] = None
+) -> CallRecord:
+    """
+    Build the record of a call from its policy result or error.
+    
+    Args:
+        pipeline: Name of the pipeline making the call
+        stage: Name of the pipeline stage making the call
+        model: Name of the model
+        backend: Name of the LLM backend
+        result: CallResult of a successful call
+        latency: Seconds spent on a failed call
+        ttft: Seconds to the first streamed token
+        predicted_tokens: Prompt tokens counted locally before the call
+        candidates: Number of completions requested
+        error: Exception of a failed call
+        
+    Returns:
+        CallRecord
+    """
+    record = CallRecord(
+        timestamp=time.time(),
+        pipeline=pipeline,
+        stage=stage,
+        model=model,
+        backend=backend,
+        status="ok" if error is None else "error",
+        latency=round(result.latency if result is not None else (latency or 0.0), 4),
+        ttft=round(ttft, 4) if ttft is not None else None,
+        predicted_tokens=predicted_tokens,
+        candidates=candidates,
+        error=f"{type(error).__name__}: {error}" if error is not None else None,
+    )
+    if result is None:
+        # CallPolicy attaches the number of requests it made to the error it gives up with
+        record.attempts = getattr(error, "attempts", 1)
+        return record
+    
+    record.attempts = result.attempts
+    record.hedged = result.hedged
+    response = result.response[0] if isinstance(result.response, list) else result.response
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        record.prompt_tokens = usage.get("input_tokens")
+        record.completion_tokens = usage.get("output_tokens")
+        record.cached_tokens = get_cached_tokens(response) or 0
+        if record.prompt_tokens is not None and record.completion_tokens is not None:
+            cost = estimate_cost(model, record.prompt_tokens, record.completion_tokens, record.cached_tokens)
+            record.cost = round(cost, 6) if cost is not None else None
+    return record
+
+
+def record_call(record: CallRecord, path: Optional[Path] = None) -> None:
+    """
+    Append a call record to the telemetry file.
+    
+    Telemetry must never break a run, so write errors are only logged.
+    
+    Args:
+        record: Call record
+        path: Telemetry file (defaults to TELEMETRY_FILE)
+    """
+    path = path or TELEMETRY_FILE
+    line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+    try:
+        with _write_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        logger.warning(f"Could not write LLM telemetry to {path}: {e}")
+
+
+def parse_window(window: str) -> float:
+    """
+    Parse a time window such as "30m", "24h" or "7d".
+    
+    Args:
+        window: Window text
+        
+    Returns:
+        Window length in seconds
+        
+    Raises:
+        ValueError: If the window cannot be parsed
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*", window)
+    if not match:
+        raise ValueError(f"Invalid time window: {window} (use e.g. 30m, 24h or 7d)")
+    return float(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+
+def load_records(path: Path = TELEMETRY_FILE, since: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Load call records from the telemetry file.
+    
+    Args:
+        path: Telemetry file
+        since: Optional Unix time; older records are skipped
+        
+    Returns:
+        List of record dictionaries (malformed lines are skipped)
+    """
+    if not path.exists():
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if since is None or record.get("timestamp", 0) >= since:
+                records.append(record)
+    return records
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Get a percentile with linear interpolation between the closest ranks.
+    
+    Args:
+        values: Values
+        pct: Percentile between 0 and 100
+        
+    Returns:
+        The percentile, or None if there are no values
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Summarize call records per stage and model.
+    
+    Args:
+        records: Record dictionaries
+        
+    Returns:
+        Dictionary mapping (stage, model) to call counts, latency percentiles,
+        median time to first token, token totals, retries and cost
+    """
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault((record.get("stage", "?"), record.get("model", "?")), []).append(record)
+    
+    summary = {}
+    for key, group in sorted(groups.items()):
+        ok = [record for record in group if record.get("status") == "ok"]
+        latencies = [record["latency"] for record in ok]
+        ttfts = [record["ttft"] for record in ok if record.get("ttft") is not None]
+        costs = [record["cost"] for record in ok if record.get("cost") is not None]
+        summary[key] = {
+            "calls": len(group),
+            "errors": len(group) - len(ok),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "ttft_p50": percentile(ttfts, 50),
+            "prompt_tokens": sum(record.get("prompt_tokens") or 0 for record in ok),
+            "completion_tokens": sum(record.get("completion_tokens") or 0 for record in ok),
+            "cached_tokens": sum(record.get("cached_tokens") or 0 for record in ok),
+            "retries": sum(max(0, (record.get("attempts") or 1) - 1) for record in group),
+            "cost": sum(costs) if costs else None,
+        }
+    return summary
@@ -0,0 +1,125 @@
+"""
+Token counting module for the CV Assistant application.
+
+This module counts prompt tokens locally before LLM calls. It uses the
+offline tiktoken tokenizer when it is installed and its encoding files are
+available (set TIKTOKEN_CACHE_DIR to use pre-downloaded files), and falls
+back to an estimate of four characters per token otherwise.
+"""
+import importlib.util
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Characters per token used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Tokens added per message for the role and separators, and once for priming the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+# Encoding used for models tiktoken does not know
+DEFAULT_ENCODING = "o200k_base"
+
+# Appended to text that was cut to fit a token budget
+TRUNCATION_MARKER = "\n[...]"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> Optional[Any]:
+    """
+    Get the tiktoken encoding for a model.
+    
+    Args:
+        model: Name of the model
+        
+    Returns:
+        tiktoken Encoding, or None if tiktoken or its encoding files are unavailable
+    """
+    if importlib.util.find_spec("tiktoken") is None:
+        logger.debug("tiktoken is not installed; estimating tokens from characters")
+        return None
+    
+    import tiktoken
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # Encoding files are downloaded on first use, which fails offline
+        logger.warning(f"Tokenizer for {model} unavailable ({type(e).__name__}); estimating tokens from characters")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens in a text.
+    
+    Args:
+        text: Text to count
+        model: Name of the model whose tokenizer is used
+        
+    Returns:
+        Number of tokens
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Any], model: str) -> int:
+    """
+    Count the prompt tokens of a list of chat messages.
+    
+    Args:
+        messages: LangChain messages
+        model: Name of the model whose tokenizer is used
+        
+    Returns:
+        Number of prompt tokens
+    """
+    total = REPLY_OVERHEAD_TOKENS
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += count_tokens(content, model) + MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Cut a text to at most a number of tokens, keeping its beginning.
+    
+    The cut is moved back to the last line break when that keeps most of the
+    allowed text, and a marker is appended to show the text was shortened.
+    
+    Args:
+        text: Text to cut
+        max_tokens: Maximum number of tokens, including the marker
+        model: Name of the model whose tokenizer is used
+        
+    Returns:
+        The text itself if it fits, otherwise its shortened beginning
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    
+    keep_tokens = max_tokens - count_tokens(TRUNCATION_MARKER, model)
+    if keep_tokens <= 0:
+        return ""
+    
+    encoding = get_encoding(model)
+    if encoding is None:
+        head = text[:keep_tokens * CHARS_PER_TOKEN]
+    else:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep_tokens])
+    
+    # Prefer ending on a complete line
+    line_end = head.rfind("\n")
+    if line_end >= len(head) * 0.8:
+        head = head[:line_end]
+    return head.rstrip() + TRUNCATION_MARKER
@@ -5,19 +5,32 @@ Main module for the CV Assistant application.
 This module orchestrates the execution of the different pipelines
 and serves as the entry point from the CLI.
 """
+import asyncio
 import os
+import time
 from typing import Optional
 
 from app.config.settings import Settings
+from app.llm.cache import get_response_cache
+from app.llm.telemetry import TELEMETRY_FILE, load_records, parse_window, summarize
 from app.pipelines.cv import CVPipeline
 from app.pipelines.letter import LetterPipeline
 from app.pipelines.adopt import AdoptPipeline
+from app.pipelines.apply import ApplyPipeline
+from app.pipelines.batch import BatchPipeline
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-def run_cv(cv_file: Optional[str], jd_file: Optional[str], template: Optional[str]) -> None:
+def run_cv(
+    cv_file: Optional[str], 
+    jd_file: Optional[str], 
+    template: Optional[str], 
+    stream: bool = False, 
+    candidates: int = 1, 
+    parallel_sections: bool = False
+) -> None:
     """
     Run the CV tailoring pipeline.
     
@@ -25,9 +38,12 @@ def run_cv(cv_file: Optional[str], jd_file: Optional[str], template: Optional[st
         cv_file: Path to the CV file
         jd_file: Path to the job description file
         template: Template directory to use
+        stream: Whether to stream the generated document to the console and a partial file
+        candidates: Number of candidates to generate; the best-scoring one is kept
+        parallel_sections: Whether to generate the CV template's sections concurrently
     """
     # Log command for debugging
-    command = f"cv -cv {cv_file or 'default'} -jd {jd_file or 'default'} -template {template or 'default'}"
+    command = f"cv -cv {cv_file or 'default'} -jd {jd_file or 'default'} -template {template or 'default'}{' --stream' if stream else ''}{f' --candidates {candidates}' if candidates > 1 else ''}{' --parallel-sections' if parallel_sections else ''}"
     logger.debug(f"Command: {command}")
     
     # Print minimal console output
@@ -37,13 +53,27 @@ def run_cv(cv_file: Optional[str], jd_file: Optional[str], template: Optional[st
     settings = Settings()
     if template:
         settings.template_dir = template
+    if stream:
+        settings.llm_streaming = True
+    if candidates > 1:
+        settings.llm_candidates = candidates
+        if stream:
+            print("Note: --stream is ignored when generating several candidates")
+    if parallel_sections:
+        settings.cv_parallel_sections = True
     
     # Initialize and run the CV pipeline
     pipeline = CVPipeline(settings)
     pipeline.run(cv_file, jd_file)
 
 
-def run_letter(cv_file: Optional[str], jd_file: Optional[str], template: Optional[str]) -> None:
+def run_letter(
+    cv_file: Optional[str], 
+    jd_file: Optional[str], 
+    template: Optional[str], 
+    stream: bool = False, 
+    candidates: int = 1
+) -> None:
     """
     Run the cover letter generation pipeline.
     
@@ -51,9 +81,11 @@ def run_letter(cv_file: Optional[str], jd_file: Optional[str], template: Optiona
         cv_file: Path to the CV file
         jd_file: Path to the job description file
         template: Template directory to use
+        stream: Whether to stream the generated document to the console and a partial file
+        candidates: Number of candidates to generate; the best-scoring one is kept
     """
     # Log command for debugging
-    command = f"letter -cv {cv_file or 'default'} -jd {jd_file or 'default'} -template {template or 'default'}"
+    command = f"letter -cv {cv_file or 'default'} -jd {jd_file or 'default'} -template {template or 'default'}{' --stream' if stream else ''}{f' --candidates {candidates}' if candidates > 1 else ''}"
     logger.debug(f"Command: {command}")
     
     # Print minimal console output
@@ -63,12 +95,97 @@ def run_letter(cv_file: Optional[str], jd_file: Optional[str], template: Optiona
     settings = Settings()
     if template:
         settings.template_dir = template
+    if stream:
+        settings.llm_streaming = True
+    if candidates > 1:
+        settings.llm_candidates = candidates
+        if stream:
+            print("Note: --stream is ignored when generating several candidates")
     
     # Initialize and run the letter pipeline
     pipeline = LetterPipeline(settings)
     pipeline.run(cv_file, jd_file)
 
 
+def run_apply(
+    cv_file: Optional[str], 
+    jd_file: Optional[str], 
+    template: Optional[str], 
+    stream: bool = False, 
+    candidates: int = 1, 
+    parallel_sections: bool = False
+) -> None:
+    """
+    Run the application pipeline, producing a tailored CV and a cover letter together.
+    
+    Args:
+        cv_file: Path to the CV file
+        jd_file: Path to the job description file
+        template: Template directory to use
+        stream: Whether to stream the generated documents to the console and partial files
+        candidates: Number of candidates to generate per document; the best-scoring one is kept
+        parallel_sections: Whether to generate the CV template's sections concurrently
+    """
+    # Log command for debugging
+    command = f"apply -cv {cv_file or 'default'} -jd {jd_file or 'default'} -template {template or 'default'}{' --stream' if stream else ''}{f' --candidates {candidates}' if candidates > 1 else ''}{' --parallel-sections' if parallel_sections else ''}"
+    logger.debug(f"Command: {command}")
+    
+    # Print minimal console output
+    print(f"\nRunning CV tailoring and cover letter generation pipelines...")
+    
+    # Initialize settings with optional overrides
+    settings = Settings()
+    if template:
+        settings.template_dir = template
+    if stream:
+        settings.llm_streaming = True
+    if candidates > 1:
+        settings.llm_candidates = candidates
+        if stream:
+            print("Note: --stream is ignored when generating several candidates")
+    if parallel_sections:
+        settings.cv_parallel_sections = True
+    
+    # Initialize and run the application pipeline
+    pipeline = ApplyPipeline(settings)
+    asyncio.run(pipeline.arun(cv_file, jd_file))
+
+
+def run_batch(
+    target: str, 
+    cv_file: Optional[str], 
+    jd_dir: Optional[str], 
+    concurrency: Optional[int], 
+    template: Optional[str]
+) -> None:
+    """
+    Run the CV or cover letter pipeline for every job description in a directory.
+    
+    Args:
+        target: Pipeline to run for each job ('cv' or 'letter')
+        cv_file: Path to the CV file
+        jd_dir: Directory of job descriptions
+        concurrency: Maximum number of concurrent jobs
+        template: Template directory to use
+    """
+    # Log command for debugging
+    command = (f"batch {target} -cv {cv_file or 'default'} -jd-dir {jd_dir or 'default'} "
+               f"--concurrency {concurrency or 'default'} -template {template or 'default'}")
+    logger.debug(f"Command: {command}")
+    
+    # Print minimal console output
+    print(f"\nRunning batch {target} pipeline...")
+    
+    # Initialize settings with optional overrides
+    settings = Settings()
+    if template:
+        settings.template_dir = template
+    
+    # Initialize and run the batch pipeline
+    pipeline = BatchPipeline(settings, target, concurrency)
+    asyncio.run(pipeline.arun(cv_file, jd_dir))
+
+
 def run_adopt(source: str, template: Optional[str]) -> None:
     """
     Run the CV template adaptation pipeline.
@@ -92,3 +209,69 @@ def run_adopt(source: str, template: Optional[str]) -> None:
     # Initialize and run the adopt pipeline
     pipeline = AdoptPipeline(settings)
     pipeline.run(source)
+
+
+def run_cache(action: str) -> None:
+    """
+    Run a maintenance action on the LLM response cache.
+    
+    Args:
+        action: Cache action to perform ('stats', 'prune' or 'clear')
+    """
+    # Log command for debugging
+    logger.debug(f"Command: cache {action}")
+    
+    settings = Settings()
+    cache = get_response_cache(settings)
+    
+    if action == "stats":
+        stats = cache.stats()
+        print(f"\nLLM response cache: {stats['directory']}")
+        print(f"  Entries:  {stats['entries']}")
+        print(f"  Size:     {stats['size_bytes'] / 1024:.1f} KB of {stats['max_bytes'] / (1024 * 1024):.0f} MB")
+        print(f"  TTL:      {stats['ttl_seconds'] // 86400} days")
+        print(f"  Hits:     {stats['hits']}")
+        print(f"  Misses:   {stats['misses']}")
+        print(f"  Hit rate: {stats['hit_rate']:.1%}")
+    elif action == "prune":
+        removed = cache.prune()
+        print(f"✓ Pruned {removed} cache entries")
+    elif action == "clear":
+        removed = cache.clear()
+        print(f"✓ Cleared {removed} cache entries")
+
+
+def run_stats(since: Optional[str] = None) -> None:
+    """
+    Print latency, token and cost statistics of recorded LLM calls per stage and model.
+    
+    Args:
+        since: Optional time window, e.g. '24h' or '7d' (defaults to all records)
+    """
+    # Log command for debugging
+    logger.debug(f"Command: stats since={since}")
+    
+    start = time.time() - parse_window(since) if since else None
+    records = load_records(TELEMETRY_FILE, start)
+    window = f"last {since}" if since else "all time"
+    if not records:
+        print(f"No LLM calls recorded in {TELEMETRY_FILE} ({window})")
+        return
+    
+    def seconds(value: Optional[float]) -> str:
+        return f"{value:.2f}s" if value is not None else "-"
+    
+    print(f"\nLLM calls ({window}, {len(records)} calls): {TELEMETRY_FILE}")
+    header = f"  {'Stage':<12} {'Model':<20} {'Calls':>5} {'Err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'TTFT p50':>9} {'Prompt':>9} {'Cached':>9} {'Output':>9} {'Retry':>5} {'Cost':>9}"
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    total_cost = 0.0
+    for (stage, model), row in summarize(records).items():
+        cost = f"${row['cost']:.4f}" if row["cost"] is not None else "-"
+        total_cost += row["cost"] or 0.0
+        print(
+            f"  {stage:<12} {model[:20]:<20} {row['calls']:>5} {row['errors']:>4} "
+            f"{seconds(row['p50']):>8} {seconds(row['p95']):>8} {seconds(row['p99']):>8} {seconds(row['ttft_p50']):>9} "
+            f"{row['prompt_tokens']:>9} {row['cached_tokens']:>9} {row['completion_tokens']:>9} {row['retries']:>5} {cost:>9}"
+        )
+    print(f"  Estimated total cost: ${total_cost:.4f}")
@@ -0,0 +1,155 @@
+"""
+Application pipeline module for the CV Assistant application.
+
+This module provides a pipeline that produces a tailored CV and a cover letter
+for the same job description in one process, sharing inputs and extracted names.
+"""
+import asyncio
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+
+from app.config.settings import Settings
+from app.pipelines.base import BasePipeline
+from app.pipelines.context import RunContext
+from app.pipelines.cv import CVPipeline
+from app.pipelines.letter import LetterPipeline
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ApplyPipeline(BasePipeline):
+    """
+    Pipeline for producing a complete job application.
+    
+    This pipeline loads the CV and job description once, resolves the
+    candidate and company names once, and generates the tailored CV and the
+    cover letter concurrently. Both documents are rendered into one output
+    directory alongside a single copy of the job description.
+    """
+    
+    def __init__(self, settings: Settings):
+        """
+        Initialize the application pipeline with settings.
+        
+        Args:
+            settings: Application settings
+        """
+        super().__init__(settings)
+        self.pipeline_name = "apply"
+        self.cv_pipeline = CVPipeline(settings)
+        self.letter_pipeline = LetterPipeline(settings)
+    
+    def run(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> Dict[str, Dict[str, Path]]:
+        """
+        Run the application pipeline.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_file: Optional path to the job description file
+            
+        Returns:
+            Dictionary with the output file paths of the 'cv' and 'letter' documents
+        """
+        return asyncio.run(self.arun(cv_file, jd_file))
+    
+    async def arun(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> Dict[str, Dict[str, Path]]:
+        """
+        Run the application pipeline asynchronously.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_file: Optional path to the job description file
+            
+        Returns:
+            Dictionary with the output file paths of the 'cv' and 'letter' documents
+        """
+        try:
+            # Log detailed information to file
+            logger.debug(f"Starting application pipeline with parameters: cv_file={cv_file}, jd_file={jd_file}")
+            
+            # Both documents share one deadline for their LLM calls
+            self.cv_pipeline.deadline = self.letter_pipeline.deadline = self.start_deadline()
+            
+            # Load CV and job description once for both documents
+            context = await asyncio.to_thread(self.create_context, cv_file, jd_file)
+            
+            # Load both sets of templates and instructions
+            (cv_template, cv_instructions), (letter_template, letter_instructions) = await asyncio.gather(
+                asyncio.to_thread(self.cv_pipeline.load_cv_templates, context),
+                asyncio.to_thread(self.letter_pipeline.load_letter_templates, context),
+            )
+            
+            # The CV does not need the names, so it is generated while they are resolved;
+            # the letter waits for the names, which are extracted once through the shared context
+            logger.debug(f"Generating tailored CV and cover letter using {self.settings.get_stage_config('tailoring').model}...")
+            count = self.settings.llm_candidates
+            names, cv_candidates, letter_candidates = await asyncio.gather(
+                self.aresolve_names(context),
+                self.cv_pipeline.agenerate_tailored_cv_candidates(
+                    context.cv_content, context.jd_content, cv_template, cv_instructions, 
+                    count, self.get_stream_path(context, "cv")
+                ),
+                self.letter_pipeline.agenerate_cover_letter_candidates(
+                    context.cv_content, context.jd_content, letter_template, letter_instructions, context, 
+                    count, self.get_stream_path(context, "letter")
+                ),
+            )
+            
+            return await self.asave_documents(
+                context, names, cv_candidates[0], letter_candidates[0], cv_candidates[1:], letter_candidates[1:]
+            )
+            
+        except Exception as e:
+            self.report_error(e, "application generation")
+            raise
+    
+    async def asave_documents(
+        self, 
+        context: RunContext, 
+        names: Dict[str, str], 
+        tailored_cv: str, 
+        cover_letter: str,
+        cv_alternatives: Optional[List[str]] = None,
+        letter_alternatives: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Path]]:
+        """
+        Render both documents into one output directory.
+        
+        Args:
+            context: Run context
+            names: Dictionary containing 'candidate_name' and 'company_name'
+            tailored_cv: Tailored CV content
+            cover_letter: Cover letter content
+            cv_alternatives: Optional CV candidates that were not kept, saved as markdown alongside
+            letter_alternatives: Optional letter candidates that were not kept, saved as markdown alongside
+            
+        Returns:
+            Dictionary with the output file paths of the 'cv' and 'letter' documents
+        """
+        logger.debug(f"Extracted candidate name: {names['candidate_name']}")
+        logger.debug(f"Extracted company name: {names['company_name']}")
+        
+        # Set up one output directory named after the job description
+        output_dir = await asyncio.to_thread(self.setup_output_directory, context.jd_path.stem, self.pipeline_name)
+        
+        # Render both documents in parallel worker threads, each with its own styling
+        cv_files, letter_files, _ = await asyncio.gather(
+            asyncio.to_thread(self.cv_pipeline.save_output, tailored_cv, output_dir, self.cv_pipeline.get_file_name(names)),
+            asyncio.to_thread(self.letter_pipeline.save_output, cover_letter, output_dir, self.letter_pipeline.get_file_name(names)),
+            asyncio.to_thread(self.cv_pipeline.copy_job_description, context.jd_path, output_dir),
+        )
+        self.save_alternatives(cv_alternatives or [], output_dir, self.cv_pipeline.get_file_name(names))
+        self.save_alternatives(letter_alternatives or [], output_dir, self.letter_pipeline.get_file_name(names))
+        
+        # The complete outputs replace the partial files written while streaming
+        self.remove_partial_output(output_dir, "cv")
+        self.remove_partial_output(output_dir, "letter")
+        
+        # Success message with clear output information
+        print("✓ CV tailoring and cover letter generation completed successfully")
+        print(f"✓ Output: {output_dir}")
+        generated = [path.name for path in list(cv_files.values()) + list(letter_files.values())]
+        logger.debug(f"Generated files: {', '.join(generated)}")
+        
+        return {"cv": cv_files, "letter": letter_files}
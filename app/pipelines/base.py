@@ -3,22 +3,42 @@ Base pipeline module for the CV Assistant application.
 
 This module provides a base pipeline class that all specific pipelines extend.
 """
+import asyncio
 import os
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage
 
-from app.config.settings import Settings
+from app.config.settings import Settings, StageConfig
+from app.llm.cache import ResponseCache, get_response_cache
+from app.llm.client import get_chat_model, get_pool_stats
+from app.llm.policy import CallPolicy, CallResult, Deadline
+from app.llm.prompts import PromptBuilder, record_prompt_cache_usage
+from app.llm.ratelimit import get_rate_limiter
+from app.llm.streaming import StreamWriter
+from app.llm.telemetry import make_record, record_call
+from app.llm.tokens import count_message_tokens, count_tokens
+from app.pipelines.context import RunContext
 from app.utils.file_io import read_file, write_file, find_file, find_latest_file
+from app.utils.chromium import get_chromium_pool
 from app.utils.converter import FileConverter
-from app.utils.logger import get_logger
+from app.utils.pdf_worker import get_pdf_worker
+from app.utils.render_pool import RenderStage
+from app.utils.jd_clean import JOB_DESCRIPTION_EXTENSIONS, cleaned_path_for, clean_job_description, get_corpus_counts
+from app.utils.name_extraction import NameGuess, extract_names_locally
+from app.utils.scoring import score_candidates
+from app.utils.logger import LOG_DIR, get_logger
 
 logger = get_logger(__name__)
 
+# Process-wide counters of how name extraction was resolved
+name_extraction_stats: Dict[str, int] = {"fast_path": 0, "llm_fallback": 0}
+
 
 class BasePipeline(ABC):
     """
@@ -37,6 +57,22 @@ class BasePipeline(ABC):
         """
         self.settings = settings
         self.output_files = {}
+        self.css_file = "style.css"  # Stylesheet in the template directory used for HTML and PDF output
+        self.render_stage: Optional[RenderStage] = None  # Optional background renderer used by save_output()
+        self.pending_renders: List[Future] = []
+        self.policies: Dict[str, CallPolicy] = {}
+        self.deadline: Optional[Deadline] = None
+    
+    def start_deadline(self) -> Optional[Deadline]:
+        """
+        Start the per-run deadline that bounds all LLM calls of this run.
+        
+        Returns:
+            The new deadline, or None if the deadline is disabled
+        """
+        seconds = self.settings.llm_run_deadline
+        self.deadline = Deadline(seconds) if seconds > 0 else None
+        return self.deadline
     
     @abstractmethod
     def run(self, *args, **kwargs):
@@ -47,6 +83,41 @@ class BasePipeline(ABC):
         """
         pass
     
+    async def arun(self, *args, **kwargs):
+        """
+        Run the pipeline asynchronously.
+        
+        Subclasses override this with a variant that overlaps independent LLM
+        calls; by default the synchronous run() is executed in a worker thread.
+        """
+        return await asyncio.to_thread(self.run, *args, **kwargs)
+    
+    def input_dirs_hint(self) -> str:
+        """
+        Describe the input directories to check when an input file is missing.
+        
+        Returns:
+            Human readable list of input directories
+        """
+        return f"CV dir: {self.settings.cv_dir}, Job dir: {self.settings.job_descriptions_dir}"
+    
+    def report_error(self, error: Exception, task: str) -> None:
+        """
+        Log an error and print a concise, actionable message for the user.
+        
+        Args:
+            error: The exception raised while running the pipeline
+            task: Description of the pipeline task, e.g. 'CV tailoring'
+        """
+        if isinstance(error, FileNotFoundError):
+            error_msg = f"Error: {str(error)}\nCheck files in: {self.input_dirs_hint()}"
+            logger.error(error_msg)
+        else:
+            error_msg = f"Error during {task}: {str(error)}\nCheck log file for details: {LOG_DIR / 'run.log'}"
+            logger.error(error_msg)
+            logger.debug("Detailed error information:", exc_info=error)
+        print(error_msg)
+    
     def load_cv(self, cv_file: Optional[str] = None) -> Tuple[Path, str]:
         """
         Load the CV file.
@@ -77,12 +148,13 @@ class BasePipeline(ABC):
         cv_content = read_file(cv_path)
         return cv_path, cv_content
     
-    def load_job_description(self, jd_file: Optional[str] = None) -> Tuple[Path, str]:
+    def load_job_description(self, jd_file: Optional[str] = None, clean: bool = True) -> Tuple[Path, str]:
         """
         Load the job description file.
         
         Args:
             jd_file: Optional path to the job description file
+            clean: Whether to strip boilerplate (if enabled in the settings)
             
         Returns:
             Tuple of (jd_path, jd_content)
@@ -105,8 +177,85 @@ class BasePipeline(ABC):
         
         # Read the job description content
         jd_content = read_file(jd_path)
+        if clean and self.settings.jd_cleaning_enabled:
+            jd_content = self.clean_job_description(jd_path, jd_content)
         return jd_path, jd_content
     
+    def clean_job_description(self, jd_path: Path, jd_content: str) -> str:
+        """
+        Strip boilerplate from a job description and save the cleaned copy.
+        
+        Paragraphs repeated across the job descriptions in the same directory
+        (e.g. company blurbs) are removed along with benefits, legal and
+        equal-opportunity sections. The cleaned copy is written to a 'cleaned'
+        directory next to the original.
+        
+        Args:
+            jd_path: Path to the job description file
+            jd_content: Job description content as read from disk
+            
+        Returns:
+            Cleaned job description content
+        """
+        corpus_counts = get_corpus_counts(jd_path.parent, JOB_DESCRIPTION_EXTENSIONS)
+        cleaned = clean_job_description(jd_content, corpus_counts, self.settings.jd_dedupe_min_documents)
+        
+        cleaned_path = cleaned_path_for(jd_path)
+        cleaned_path.parent.mkdir(parents=True, exist_ok=True)
+        write_file(cleaned, cleaned_path)
+        
+        model = self.settings.llm_model
+        raw_tokens, cleaned_tokens = count_tokens(jd_content, model), count_tokens(cleaned, model)
+        logger.info(
+            f"Cleaned job description {jd_path.name}: {len(jd_content)} -> {len(cleaned)} chars, "
+            f"{raw_tokens} -> {cleaned_tokens} tokens ({cleaned_path})"
+        )
+        return cleaned
+    
+    def create_context(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> RunContext:
+        """
+        Load the CV and job description into a new run context.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_file: Optional path to the job description file
+            
+        Returns:
+            Run context holding the loaded inputs
+            
+        Raises:
+            FileNotFoundError: If the CV or job description file is not found
+        """
+        cv_path, cv_content = self.load_cv(cv_file)
+        jd_path, jd_raw_content = self.load_job_description(jd_file, clean=False)
+        
+        # Prompts get the cleaned job description; name extraction keeps the original
+        jd_content = jd_raw_content
+        if self.settings.jd_cleaning_enabled:
+            jd_content = self.clean_job_description(jd_path, jd_raw_content)
+        
+        return RunContext(
+            cv_path=cv_path, 
+            cv_content=cv_content, 
+            jd_path=jd_path, 
+            jd_content=jd_content, 
+            jd_raw_content=jd_raw_content
+        )
+    
+    def load_optional_template(self, template_name: str) -> str:
+        """
+        Load a template file if it exists in the current template directory.
+        
+        Args:
+            template_name: Name of the template file
+            
+        Returns:
+            Template content, or an empty string if the file does not exist
+        """
+        if not self.settings.get_template_file(template_name).exists():
+            return ""
+        return self.load_template(template_name)
+    
     def load_template(self, template_name: str) -> str:
         """
         Load a template file from the current template directory.
@@ -149,6 +298,656 @@ class BasePipeline(ABC):
         logger.info(f"Output directory: {output_dir}")
         return output_dir
     
+    def _lookup_cache(self, messages: List[BaseMessage], config: StageConfig, stage: str) -> Tuple[Optional[ResponseCache], Optional[str], Optional[str]]:
+        """
+        Look up an LLM request in the response cache.
+        
+        Args:
+            messages: Messages to send to the model
+            config: Model settings of the stage
+            stage: Name of the pipeline stage making the call (selects the backend)
+            
+        Returns:
+            Tuple of (cache, cache_key, cached_content); cache and key are None when
+            caching is disabled, and cached_content is None on a miss
+        """
+        if not self.settings.llm_cache_enabled:
+            return None, None, None
+        
+        cache = get_response_cache(self.settings)
+        backend_name, backend = self.settings.get_backend(stage)
+        cache_key = ResponseCache.make_key(
+            config.model,
+            config.temperature,
+            messages,
+            backend=backend.base_url or backend_name,
+            max_tokens=config.max_tokens,
+        )
+        cached_content = cache.get(cache_key)
+        if cached_content is not None:
+            logger.info(f"LLM cache hit for {stage} ({cache_key[:12]})")
+        else:
+            logger.debug(f"LLM cache miss for {stage} ({cache_key[:12]})")
+        return cache, cache_key, cached_content
+    
+    def build_messages(self, prompt: PromptBuilder, stage: str) -> List[BaseMessage]:
+        """
+        Build a prompt's messages within the input token budget of a stage.
+        
+        Args:
+            prompt: Prompt builder
+            stage: Name of the pipeline stage the prompt is for
+            
+        Returns:
+            List of messages
+        """
+        model = self.settings.get_stage_config(stage).model
+        return prompt.build(self.settings.llm_input_token_budgets.get(stage), model)
+    
+    def get_policy(self, stage: str) -> CallPolicy:
+        """
+        Get the call policy for the backend used by a stage.
+        
+        Args:
+            stage: Name of the pipeline stage making the call
+            
+        Returns:
+            CallPolicy with the backend's attempt timeout
+        """
+        backend_name, backend = self.settings.get_backend(stage)
+        if backend_name not in self.policies:
+            self.policies[backend_name] = CallPolicy.from_settings(self.settings, backend)
+        return self.policies[backend_name]
+    
+    def _call_options(self, stage: str) -> Dict[str, Any]:
+        """
+        Get the request options of a stage.
+        
+        Args:
+            stage: Name of the pipeline stage making the call
+            
+        Returns:
+            Keyword arguments passed to the model call
+        """
+        max_tokens = self.settings.get_stage_config(stage).max_tokens
+        return {"max_tokens": max_tokens} if max_tokens else {}
+    
+    def _log_call(self, stage: str, result: CallResult, predicted_tokens: int) -> None:
+        """
+        Log how an LLM call completed.
+        
+        Args:
+            stage: Name of the pipeline stage that made the call
+            result: Result returned by the call policy
+            predicted_tokens: Prompt tokens counted locally before the call
+        """
+        logger.info(
+            f"LLM call for {stage} took {result.latency:.2f}s "
+            f"({result.attempts} attempt(s){', hedged' if result.hedged else ''})"
+        )
+        
+        # Compare the local count with the provider's and report how much of the
+        # prompt the provider served from its prefix cache
+        usage = record_prompt_cache_usage(result.response)
+        if usage is not None:
+            logger.info(
+                f"Prompt tokens for {stage}: {usage['input_tokens']} "
+                f"(predicted {predicted_tokens}, {usage['cached_tokens']} cached)"
+            )
+        else:
+            logger.info(f"Prompt tokens for {stage}: predicted {predicted_tokens}")
+    
+    def _record_telemetry(
+        self, 
+        stage: str, 
+        model: str, 
+        predicted_tokens: int, 
+        result: Optional[CallResult] = None, 
+        started: Optional[float] = None, 
+        timing: Optional[Dict[str, Any]] = None, 
+        candidates: int = 1, 
+        error: Optional[Exception] = None
+    ) -> None:
+        """
+        Append the telemetry record of an LLM call (see app.llm.telemetry).
+        
+        Args:
+            stage: Name of the pipeline stage that made the call
+            model: Name of the model
+            predicted_tokens: Prompt tokens counted locally before the call
+            result: Result returned by the call policy, if the call succeeded
+            started: time.monotonic() when the call started, for failed calls
+            timing: Streaming timings filled in by the call (time to first token)
+            candidates: Number of completions requested
+            error: Exception raised by the call, if it failed
+        """
+        if not self.settings.llm_telemetry_enabled:
+            return
+        backend_name, _ = self.settings.get_backend(stage)
+        record_call(make_record(
+            pipeline=getattr(self, "pipeline_name", type(self).__name__),
+            stage=stage,
+            model=model,
+            backend=backend_name,
+            result=result,
+            latency=time.monotonic() - started if started is not None else None,
+            ttft=(timing or {}).get("ttft"),
+            predicted_tokens=predicted_tokens,
+            candidates=candidates,
+            error=error,
+        ))
+    
+    def _policy_call(
+        self, 
+        call, 
+        stage: str, 
+        model: str, 
+        predicted_tokens: int, 
+        timing: Optional[Dict[str, Any]] = None, 
+        candidates: int = 1, 
+        **kwargs
+    ) -> CallResult:
+        """
+        Make an LLM call through the stage's call policy and rate limiter, and
+        log and record it.
+        
+        Args:
+            call: Callable making the request
+            stage: Name of the pipeline stage making the call
+            model: Name of the model
+            predicted_tokens: Prompt tokens counted locally before the call
+            timing: Streaming timings filled in by the call (time to first token)
+            candidates: Number of completions requested
+            **kwargs: Further arguments of CallPolicy.call() (key, hedge)
+            
+        Returns:
+            CallResult
+        """
+        backend_name, _ = self.settings.get_backend(stage)
+        started = time.monotonic()
+        try:
+            result = self.get_policy(stage).call(
+                call,
+                limiter=get_rate_limiter(self.settings, backend_name),
+                tokens=predicted_tokens,
+                deadline=self.deadline,
+                **kwargs,
+            )
+        except Exception as e:
+            self._record_telemetry(stage, model, predicted_tokens, started=started, timing=timing, candidates=candidates, error=e)
+            raise
+        self._finish_call(stage, model, predicted_tokens, result, timing, candidates)
+        return result
+    
+    async def _apolicy_call(
+        self, 
+        call, 
+        stage: str, 
+        model: str, 
+        predicted_tokens: int, 
+        timing: Optional[Dict[str, Any]] = None, 
+        candidates: int = 1, 
+        **kwargs
+    ) -> CallResult:
+        """
+        Make an LLM call asynchronously through the stage's call policy and rate
+        limiter, and log and record it.
+        
+        Async counterpart of _policy_call().
+        
+        Args:
+            call: Callable returning an awaitable that makes the request
+            stage: Name of the pipeline stage making the call
+            model: Name of the model
+            predicted_tokens: Prompt tokens counted locally before the call
+            timing: Streaming timings filled in by the call (time to first token)
+            candidates: Number of completions requested
+            **kwargs: Further arguments of CallPolicy.acall() (key, hedge)
+            
+        Returns:
+            CallResult
+        """
+        backend_name, _ = self.settings.get_backend(stage)
+        started = time.monotonic()
+        try:
+            result = await self.get_policy(stage).acall(
+                call,
+                limiter=get_rate_limiter(self.settings, backend_name),
+                tokens=predicted_tokens,
+                deadline=self.deadline,
+                **kwargs,
+            )
+        except Exception as e:
+            self._record_telemetry(stage, model, predicted_tokens, started=started, timing=timing, candidates=candidates, error=e)
+            raise
+        self._finish_call(stage, model, predicted_tokens, result, timing, candidates)
+        return result
+    
+    def _finish_call(
+        self, 
+        stage: str, 
+        model: str, 
+        predicted_tokens: int, 
+        result: CallResult, 
+        timing: Optional[Dict[str, Any]], 
+        candidates: int
+    ) -> None:
+        """
+        Log and record a successful LLM call.
+        
+        Args:
+            stage: Name of the pipeline stage that made the call
+            model: Name of the model
+            predicted_tokens: Prompt tokens counted locally before the call
+            result: Result returned by the call policy
+            timing: Streaming timings filled in by the call (time to first token)
+            candidates: Number of completions requested
+        """
+        # Multi-candidate requests return one message per candidate; the usage
+        # of the whole request is reported on each of them
+        if isinstance(result.response, list):
+            result = CallResult(result.response[0] if result.response else None, result.attempts, result.hedged, result.latency)
+        self._log_call(stage, result, predicted_tokens)
+        self._record_telemetry(stage, model, predicted_tokens, result=result, timing=timing, candidates=candidates)
+    
+    def get_stream_path(self, context: RunContext, name: Optional[str] = None) -> Optional[Path]:
+        """
+        Get the partial markdown file that a streamed generation is written to.
+        
+        Args:
+            context: Run context
+            name: Name of the streamed document (defaults to this pipeline's name)
+            
+        Returns:
+            Path of the partial file, or None if streaming is disabled
+        """
+        if not self.settings.llm_streaming:
+            return None
+        output_dir = self.setup_output_directory(context.jd_path.stem, self.pipeline_name)
+        return output_dir / f"{name or self.pipeline_name}.partial.md"
+    
+    def remove_partial_output(self, output_dir: Path, name: Optional[str] = None) -> None:
+        """
+        Remove the partial markdown file once the complete output has been saved.
+        
+        Args:
+            output_dir: Output directory
+            name: Name of the streamed document (defaults to this pipeline's name)
+        """
+        partial_path = output_dir / f"{name or self.pipeline_name}.partial.md"
+        if partial_path.exists():
+            partial_path.unlink()
+    
+    def _stream_call(
+        self, 
+        model, 
+        messages: List[BaseMessage], 
+        stream_to: Path, 
+        stage: str, 
+        options: Dict[str, Any], 
+        timing: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Create a callable that streams a completion into a file.
+        
+        Each retry truncates the file and starts over; a timed-out attempt that
+        is still running stops writing as soon as a newer attempt has started.
+        
+        Args:
+            model: Chat model
+            messages: Messages to send to the model
+            stream_to: File the streamed text is written to
+            stage: Name of the pipeline stage making the call
+            options: Keyword arguments passed to the model call
+            timing: Optional dictionary the time to first token ("ttft") is stored in
+            
+        Returns:
+            Callable returning the aggregated response message
+        """
+        latest = {"attempt": 0}
+        
+        def call():
+            latest["attempt"] += 1
+            attempt = latest["attempt"]
+            response = None
+            with StreamWriter(stream_to, stage) as writer:
+                for chunk in model.stream(messages, **options):
+                    if latest["attempt"] != attempt:
+                        writer.abandoned = True
+                        break
+                    writer.write(chunk.content if isinstance(chunk.content, str) else "")
+                    response = chunk if response is None else response + chunk
+            if timing is not None and latest["attempt"] == attempt:
+                timing["ttft"] = writer.ttft
+            return response
+        
+        return call
+    
+    def _astream_call(
+        self, 
+        model, 
+        messages: List[BaseMessage], 
+        stream_to: Path, 
+        stage: str, 
+        options: Dict[str, Any], 
+        timing: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Create a callable that streams a completion into a file asynchronously.
+        
+        Args:
+            model: Chat model
+            messages: Messages to send to the model
+            stream_to: File the streamed text is written to
+            stage: Name of the pipeline stage making the call
+            options: Keyword arguments passed to the model call
+            timing: Optional dictionary the time to first token ("ttft") is stored in
+            
+        Returns:
+            Callable returning an awaitable of the aggregated response message
+        """
+        async def call():
+            response = None
+            with StreamWriter(stream_to, stage) as writer:
+                async for chunk in model.astream(messages, **options):
+                    writer.write(chunk.content if isinstance(chunk.content, str) else "")
+                    response = chunk if response is None else response + chunk
+            if timing is not None:
+                timing["ttft"] = writer.ttft
+            return response
+        
+        return call
+    
+    def invoke_llm(
+        self, 
+        messages: List[BaseMessage], 
+        stage: str, 
+        stream_to: Optional[Path] = None
+    ) -> str:
+        """
+        Invoke the LLM with the given messages.
+        
+        The model, temperature and completion token limit are taken from the
+        stage's configuration (Settings.get_stage_config()). Responses are served
+        from the on-disk response cache when an identical request (model,
+        temperature and messages) has been made before.
+        
+        Args:
+            messages: Messages to send to the model
+            stage: Name of the pipeline stage making the call
+            stream_to: Optional file to stream the completion into as it is generated
+            
+        Returns:
+            Content of the model response
+        """
+        config = self.settings.get_stage_config(stage)
+        cache, cache_key, cached_content = self._lookup_cache(messages, config, stage)
+        if cached_content is not None:
+            if stream_to is not None:
+                write_file(cached_content, stream_to)
+            return cached_content
+        
+        # Reuse the shared, pooled client for this model and temperature
+        model = get_chat_model(self.settings, config.model, config.temperature, stage)
+        options = self._call_options(stage)
+        timing: Dict[str, Any] = {}
+        if stream_to is not None:
+            call = self._stream_call(model, messages, stream_to, stage, options, timing)
+        else:
+            call = lambda: model.invoke(messages, **options)
+        predicted_tokens = count_message_tokens(messages, config.model)
+        
+        # Go through the process-wide rate limiter, with timeouts, retries and hedging
+        result = self._policy_call(
+            call,
+            stage,
+            config.model,
+            predicted_tokens,
+            timing=timing,
+            key=(stage, config.model),
+            hedge=stream_to is None,
+        )
+        content = result.response.content if result.response is not None else ""
+        logger.debug(f"LLM connection pools: {get_pool_stats()}")
+        
+        if cache is not None:
+            cache.put(cache_key, content, config.model)
+        
+        return content
+    
+    async def ainvoke_llm(
+        self, 
+        messages: List[BaseMessage], 
+        stage: str, 
+        stream_to: Optional[Path] = None
+    ) -> str:
+        """
+        Invoke the LLM asynchronously with the given messages.
+        
+        Async counterpart of invoke_llm(); cache file I/O runs in a worker thread
+        so it does not block the event loop.
+        
+        Args:
+            messages: Messages to send to the model
+            stage: Name of the pipeline stage making the call
+            stream_to: Optional file to stream the completion into as it is generated
+            
+        Returns:
+            Content of the model response
+        """
+        config = self.settings.get_stage_config(stage)
+        cache, cache_key, cached_content = await asyncio.to_thread(self._lookup_cache, messages, config, stage)
+        if cached_content is not None:
+            if stream_to is not None:
+                await asyncio.to_thread(write_file, cached_content, stream_to)
+            return cached_content
+        
+        model = get_chat_model(self.settings, config.model, config.temperature, stage)
+        options = self._call_options(stage)
+        timing: Dict[str, Any] = {}
+        if stream_to is not None:
+            call = self._astream_call(model, messages, stream_to, stage, options, timing)
+        else:
+            call = lambda: model.ainvoke(messages, **options)
+        predicted_tokens = count_message_tokens(messages, config.model)
+        
+        result = await self._apolicy_call(
+            call,
+            stage,
+            config.model,
+            predicted_tokens,
+            timing=timing,
+            key=(stage, config.model),
+            hedge=stream_to is None,
+        )
+        content = result.response.content if result.response is not None else ""
+        logger.debug(f"LLM connection pools: {get_pool_stats()}")
+        
+        if cache is not None:
+            await asyncio.to_thread(cache.put, cache_key, content, config.model)
+        
+        return content
+    
+    def _candidate_call(self, model, messages: List[BaseMessage], count: int, options: Dict[str, Any]):
+        """
+        Create a callable that asks for several completions in one request.
+        
+        Args:
+            model: Chat model
+            messages: Messages to send to the model
+            count: Number of completions (the n request parameter)
+            options: Request options of the stage
+            
+        Returns:
+            Callable returning the list of response messages
+        """
+        return lambda: [generation.message for generation in model.generate([messages], n=count, **options).generations[0]]
+    
+    def _acandidate_call(self, model, messages: List[BaseMessage], count: int, options: Dict[str, Any]):
+        """
+        Create an async callable that asks for several completions in one request.
+        
+        Args:
+            model: Chat model
+            messages: Messages to send to the model
+            count: Number of completions (the n request parameter)
+            options: Request options of the stage
+            
+        Returns:
+            Async callable returning the list of response messages
+        """
+        async def call():
+            result = await model.agenerate([messages], n=count, **options)
+            return [generation.message for generation in result.generations[0]]
+        return call
+    
+    def invoke_llm_candidates(self, messages: List[BaseMessage], stage: str, count: int) -> List[str]:
+        """
+        Generate several candidate completions for the same messages.
+        
+        With Settings.llm_candidates_single_request the candidates are asked for
+        in one request with the n parameter (one round trip, and the prompt is
+        only billed once); otherwise, for servers without n support, they are
+        requested concurrently. Candidates are never served from the cache.
+        
+        Args:
+            messages: Messages to send to the model
+            stage: Name of the pipeline stage making the call
+            count: Number of candidates
+            
+        Returns:
+            List of candidate contents
+        """
+        config = self.settings.get_stage_config(stage)
+        model = get_chat_model(self.settings, config.model, config.temperature, stage)
+        options = self._call_options(stage)
+        predicted_tokens = count_message_tokens(messages, config.model)
+        
+        if self.settings.llm_candidates_single_request:
+            result = self._policy_call(
+                self._candidate_call(model, messages, count, options),
+                stage,
+                config.model,
+                predicted_tokens,
+                candidates=count,
+                key=(f"{stage} x{count}", config.model),
+                hedge=False,
+            )
+            if result.response:
+                return [response.content for response in result.response]
+            # Some servers answer an n request without any choices
+            logger.warning(f"No candidates returned for {stage}; falling back to a single completion")
+            return [self.invoke_llm(messages, stage)]
+        
+        def single() -> str:
+            result = self._policy_call(
+                lambda: model.invoke(messages, **options),
+                stage,
+                config.model,
+                predicted_tokens,
+                key=(stage, config.model),
+            )
+            return result.response.content
+        
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(single) for _ in range(count)]
+            return [future.result() for future in futures]
+    
+    async def ainvoke_llm_candidates(self, messages: List[BaseMessage], stage: str, count: int) -> List[str]:
+        """
+        Generate several candidate completions asynchronously.
+        
+        Async counterpart of invoke_llm_candidates().
+        
+        Args:
+            messages: Messages to send to the model
+            stage: Name of the pipeline stage making the call
+            count: Number of candidates
+            
+        Returns:
+            List of candidate contents
+        """
+        config = self.settings.get_stage_config(stage)
+        model = get_chat_model(self.settings, config.model, config.temperature, stage)
+        options = self._call_options(stage)
+        predicted_tokens = count_message_tokens(messages, config.model)
+        
+        if self.settings.llm_candidates_single_request:
+            result = await self._apolicy_call(
+                self._acandidate_call(model, messages, count, options),
+                stage,
+                config.model,
+                predicted_tokens,
+                candidates=count,
+                key=(f"{stage} x{count}", config.model),
+                hedge=False,
+            )
+            if result.response:
+                return [response.content for response in result.response]
+            # Some servers answer an n request without any choices
+            logger.warning(f"No candidates returned for {stage}; falling back to a single completion")
+            return [await self.ainvoke_llm(messages, stage)]
+        
+        async def single() -> str:
+            result = await self._apolicy_call(
+                lambda: model.ainvoke(messages, **options),
+                stage,
+                config.model,
+                predicted_tokens,
+                key=(stage, config.model),
+            )
+            return result.response.content
+        
+        return list(await asyncio.gather(*(single() for _ in range(count))))
+    
+    def rank_candidates(self, candidates: List[str], jd_content: str, source_content: Optional[str] = None) -> List[str]:
+        """
+        Order candidate documents from best to worst by their local score.
+        
+        Args:
+            candidates: Candidate contents
+            jd_content: Job description content
+            source_content: Optional source document the candidates were derived from
+            
+        Returns:
+            Candidates sorted by descending score
+            
+        Raises:
+            ValueError: If there are no candidates
+        """
+        if not candidates:
+            raise ValueError("No candidates to rank; the model returned no completions")
+        scores = score_candidates(candidates, jd_content, source_content)
+        for index, score in enumerate(scores, 1):
+            logger.info(
+                f"Candidate {index}: score {score.total:.3f} (keyword coverage {score.coverage:.0%}, "
+                f"length {score.length:.2f}, {score.placeholders} placeholder(s))"
+            )
+        order = sorted(range(len(candidates)), key=lambda index: scores[index].total, reverse=True)
+        print(f"✓ Kept candidate {order[0] + 1} of {len(candidates)} (score {scores[order[0]].total:.2f})")
+        return [candidates[index] for index in order]
+    
+    def save_alternatives(self, alternatives: List[str], output_dir: Path, base_name: str) -> List[Path]:
+        """
+        Save the candidates that were not kept as markdown files next to the output.
+        
+        Args:
+            alternatives: Remaining candidates, best first
+            output_dir: Output directory
+            base_name: Base name of the output files
+            
+        Returns:
+            Paths of the saved files
+        """
+        paths = []
+        for index, content in enumerate(alternatives, 2):
+            path = output_dir / f"{base_name} (candidate {index}).md"
+            write_file(content, path)
+            paths.append(path)
+        if paths:
+            logger.info(f"Saved {len(paths)} alternative candidate(s) to: {output_dir}")
+        return paths
+    
     def extract_names(self, cv_content: str, jd_content: str) -> Dict[str, str]:
         """
         Extract candidate name and company name from CV and job description.
@@ -162,40 +961,124 @@ class BasePipeline(ABC):
         """
         logger.info("Extracting candidate name and company name...")
         
-        # Create LLM model
-        model = ChatOpenAI(
-            model=self.settings.llm_model,
-            temperature=0.1  # Lower temperature for factual extraction
+        # Try the local heuristic extractor first and skip the LLM if it is confident
+        guess = extract_names_locally(cv_content, jd_content)
+        if self._is_confident(guess):
+            return self._merge_names(guess, None)
+        
+        # The extraction stage uses a small model at a low temperature for factual extraction
+        messages = self._build_extraction_messages(cv_content, jd_content)
+        response_content = self.invoke_llm(messages, stage="extraction")
+        return self._merge_names(guess, self._parse_extraction_response(response_content))
+    
+    async def aextract_names(self, cv_content: str, jd_content: str) -> Dict[str, str]:
+        """
+        Extract candidate name and company name asynchronously.
+        
+        Args:
+            cv_content: Content of the CV
+            jd_content: Content of the job description
+            
+        Returns:
+            Dictionary containing 'candidate_name' and 'company_name'
+        """
+        logger.info("Extracting candidate name and company name...")
+        
+        guess = extract_names_locally(cv_content, jd_content)
+        if self._is_confident(guess):
+            return self._merge_names(guess, None)
+        
+        messages = self._build_extraction_messages(cv_content, jd_content)
+        response_content = await self.ainvoke_llm(messages, stage="extraction")
+        return self._merge_names(guess, self._parse_extraction_response(response_content))
+    
+    def _is_confident(self, guess: NameGuess) -> bool:
+        """
+        Decide whether a local name extraction is good enough to skip the LLM.
+        
+        Also updates and logs the fast-path counters.
+        
+        Args:
+            guess: Local name extraction result
+            
+        Returns:
+            True if the LLM extraction call can be skipped
+        """
+        confident = guess.confidence >= self.settings.name_extraction_min_confidence
+        name_extraction_stats["fast_path" if confident else "llm_fallback"] += 1
+        
+        total = name_extraction_stats["fast_path"] + name_extraction_stats["llm_fallback"]
+        logger.info(
+            f"Name extraction via {'fast path' if confident else 'LLM fallback'} "
+            f"(local confidence {guess.confidence:.2f}); "
+            f"fast path used in {name_extraction_stats['fast_path']}/{total} extractions"
         )
+        return confident
+    
+    def _merge_names(self, guess: NameGuess, result: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Combine local and LLM name extraction results.
+        
+        Confident local values always win, and local guesses are used where
+        the LLM found nothing.
         
-        # Build system message
-        system_content = """
-        You are an expert at extracting specific information from documents.
-        Your task is to extract the candidate's full name from the CV and the company name from the job description.
-        Provide ONLY these two pieces of information in JSON format with keys 'candidate_name' and 'company_name'.
-        If you cannot find the information, use 'Unknown' as the value.
+        Args:
+            guess: Local name extraction result
+            result: LLM extraction result, or None if the LLM was not called
+            
+        Returns:
+            Dictionary containing 'candidate_name' and 'company_name'
         """
+        min_confidence = self.settings.name_extraction_min_confidence
+        if result is None:
+            result = {"candidate_name": "Unknown", "company_name": "Unknown"}
         
-        messages = [
-            SystemMessage(content=system_content),
-            HumanMessage(content=f"""Extract the candidate name and company name from these documents:
-
-CV:
-```
-{cv_content[:1000]}  # Using first 1000 chars of CV which should contain the name
-```
-
-Job Description:
-```
-{jd_content[:1000]}  # Using first 1000 chars of job description which should contain company name
-```
-
-Respond ONLY with the JSON containing 'candidate_name' and 'company_name'.
-""")
-        ]
+        if guess.candidate_name and (guess.candidate_confidence >= min_confidence or result["candidate_name"] == "Unknown"):
+            result["candidate_name"] = guess.candidate_name
+        if guess.company_name and (guess.company_confidence >= min_confidence or result["company_name"] == "Unknown"):
+            result["company_name"] = guess.company_name
         
-        response = model.invoke(messages)
+        logger.info(f"Extracted candidate name: {result['candidate_name']}")
+        logger.info(f"Extracted company name: {result['company_name']}")
+        
+        return result
+    
+    def _build_extraction_messages(self, cv_content: str, jd_content: str) -> List[BaseMessage]:
+        """
+        Build the messages for extracting names with the LLM.
+        
+        Args:
+            cv_content: Content of the CV
+            jd_content: Content of the job description
+            
+        Returns:
+            List of messages
+        """
+        # The instructions and the CV excerpt form the shared prefix; the job description comes last.
+        # The beginning of each document should contain the names, so both are cut to fit the budget.
+        excerpt_tokens = max(1, self.settings.llm_input_token_budgets.get("extraction", 600) // 3)
+        prompt = PromptBuilder("You are an expert at extracting specific information from documents.")
+        prompt.add_section("""Your task is to extract the candidate's full name from the CV and the company name from the job description.
+Provide ONLY these two pieces of information in JSON format with keys 'candidate_name' and 'company_name'.
+If you cannot find the information, use 'Unknown' as the value.""")
+        prompt.add_document("CV:", cv_content, priority=1, max_tokens=excerpt_tokens)
+        
+        prompt.add_job_section("Extract the candidate name from the CV above and the company name from this job description:")
+        prompt.add_job_document("Job Description:", jd_content, priority=0, max_tokens=excerpt_tokens)
+        prompt.add_job_section("Respond ONLY with the JSON containing 'candidate_name' and 'company_name'.")
+        
+        return self.build_messages(prompt, "extraction")
+    
+    def _parse_extraction_response(self, response_content: str) -> Dict[str, str]:
+        """
+        Parse the JSON names returned by the LLM.
         
+        Args:
+            response_content: Content of the model response
+            
+        Returns:
+            Dictionary containing 'candidate_name' and 'company_name'
+        """
         # Parse the response to extract the JSON
         import json
         import re
@@ -203,10 +1086,10 @@ Respond ONLY with the JSON containing 'candidate_name' and 'company_name'.
         # Try to find JSON in the response
         try:
             # First try to parse the entire response as JSON
-            result = json.loads(response.content)
+            result = json.loads(response_content)
         except json.JSONDecodeError:
             # If that fails, try to extract JSON using regex
-            json_match = re.search(r'\{[^\{\}]*"candidate_name"[^\{\}]*"company_name"[^\{\}]*\}', response.content)
+            json_match = re.search(r'\{[^\{\}]*"candidate_name"[^\{\}]*"company_name"[^\{\}]*\}', response_content)
             if json_match:
                 try:
                     result = json.loads(json_match.group(0))
@@ -222,15 +1105,64 @@ Respond ONLY with the JSON containing 'candidate_name' and 'company_name'.
             result["candidate_name"] = "Unknown"
         if "company_name" not in result:
             result["company_name"] = "Unknown"
-            
-        logger.info(f"Extracted candidate name: {result['candidate_name']}")
-        logger.info(f"Extracted company name: {result['company_name']}")
         
         return result
+    
+    def resolve_names(self, context: RunContext) -> Dict[str, str]:
+        """
+        Get the candidate name and company name for a run, extracting them only once.
         
+        Args:
+            context: Run context
+            
+        Returns:
+            Dictionary containing 'candidate_name' and 'company_name'
+        """
+        return context.memoize("names", lambda: self.extract_names(context.cv_content, context.jd_raw_content or context.jd_content))
+    
+    async def aresolve_names(self, context: RunContext) -> Dict[str, str]:
+        """
+        Get the candidate name and company name for a run asynchronously, extracting them only once.
+        
+        Args:
+            context: Run context
+            
+        Returns:
+            Dictionary containing 'candidate_name' and 'company_name'
+        """
+        return await context.amemoize("names", lambda: self.aextract_names(context.cv_content, context.jd_raw_content or context.jd_content))
+    
+    def resolve_position_title(self, context: RunContext) -> str:
+        """
+        Get the position title for a run from the job description heading.
+        
+        This is a simplified extraction - the LLM does more sophisticated
+        extraction when writing the actual documents.
+        
+        Args:
+            context: Run context
+            
+        Returns:
+            Position title, or 'the position' if none is found
+        """
+        def extract_position_title() -> str:
+            jd_content = context.jd_raw_content or context.jd_content
+            if "# " in jd_content[:200]:
+                return jd_content.split("# ", 1)[1].split("\n", 1)[0].strip()
+            return "the position"
+        
+        return context.memoize("position_title", extract_position_title)
+    
     def save_output(self, content: str, output_dir: Path, base_name: str) -> Dict[str, Path]:
         """
-        Save the output content to markdown and PDF files.
+        Save the output content to markdown, PDF and HTML files.
+        
+        The pipeline's stylesheet (self.css_file in the template directory) is
+        inlined into the HTML, and the markdown is converted to HTML only once.
+        
+        When a render stage is attached (self.render_stage), the document is
+        rendered in its worker processes instead: the paths are returned right
+        away and the job is added to self.pending_renders (see wait_for_renders()).
         
         Args:
             content: Content to save
@@ -241,27 +1173,45 @@ Respond ONLY with the JSON containing 'candidate_name' and 'company_name'.
             Dictionary of output file paths
         """
         # Get CSS content
-        css_path = self.settings.get_template_file("style.css")
-        css_content = read_file(css_path) if css_path.exists() else None
-        
-        # Save markdown file
-        md_path = output_dir / f"{base_name}.md"
-        write_file(content, md_path)
-        logger.info(f"Markdown saved to: {md_path}")
-        
-        # Save PDF file
-        pdf_path = output_dir / f"{base_name}.pdf"
-        FileConverter.markdown_to_pdf(content, pdf_path, css_content)
-        logger.info(f"PDF saved to: {pdf_path}")
-        
-        # Save HTML file
-        html_content = FileConverter.markdown_to_html(content, css_content)
-        html_path = output_dir / f"{base_name}.html"
-        write_file(html_content, html_path)
-        logger.info(f"HTML saved to: {html_path}")
-        
-        return {
-            "markdown": md_path,
-            "pdf": pdf_path,
-            "html": html_path
-        }
+        css_path = self.settings.get_template_file(self.css_file)
+        css_content = None
+        if css_path.exists():
+            css_content = read_file(css_path)
+            logger.debug(f"Using CSS from: {css_path}")
+        else:
+            logger.warning(f"CSS file not found: {css_path}")
+        
+        # Hand the document to the background render stage
+        if self.render_stage is not None:
+            self.pending_renders.append(self.render_stage.submit(content, css_content, output_dir, base_name))
+            logger.info(f"Rendering in background: {output_dir / base_name}")
+            return FileConverter.output_paths(output_dir, base_name)
+        
+        # Save markdown, HTML and PDF files
+        document = FileConverter.render(
+            content, 
+            output_dir, 
+            base_name, 
+            css_content, 
+            self.settings.markdown_backend, 
+            get_pdf_worker(self.settings), 
+            get_chromium_pool(self.settings)
+        )
+        logger.info(f"Markdown saved to: {document.markdown_path}")
+        logger.info(f"HTML saved to: {document.html_path}")
+        logger.info(f"PDF saved to: {document.pdf_path}")
+        
+        return document.paths
+    
+    async def wait_for_renders(self) -> None:
+        """
+        Wait for the documents submitted to the render stage.
+        
+        Raises:
+            Exception: The first rendering error, after all renders have finished
+        """
+        futures, self.pending_renders = self.pending_renders, []
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
@@ -0,0 +1,194 @@
+"""
+Batch pipeline module for the CV Assistant application.
+
+This module provides a pipeline that runs the CV or cover letter pipeline
+for every job description in a directory with bounded concurrency.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List
+
+from app.config.settings import Settings
+from app.pipelines.base import BasePipeline
+from app.pipelines.cv import CVPipeline
+from app.pipelines.letter import LetterPipeline
+from app.utils.file_io import list_files, write_file
+from app.utils.jd_clean import JOB_DESCRIPTION_EXTENSIONS
+from app.utils.logger import get_logger
+from app.utils.render_pool import get_render_stage
+
+logger = get_logger(__name__)
+
+# Pipelines that can be run in batch mode
+BATCH_PIPELINES = {
+    "cv": CVPipeline,
+    "letter": LetterPipeline,
+}
+
+
+@dataclass
+class BatchJobResult:
+    """
+    Result of one job in a batch run.
+    """
+    job_description: Path
+    status: str = "pending"
+    duration: float = 0.0
+    output_files: Dict[str, Path] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class BatchPipeline(BasePipeline):
+    """
+    Pipeline for tailoring one CV against many job descriptions.
+    
+    Every job description in the directory is processed by the selected
+    pipeline's arun(), with at most `concurrency` jobs in flight at a time.
+    Failed jobs do not stop the batch; a per-job status summary is printed
+    and written to the batch output directory at the end.
+    """
+    
+    def __init__(self, settings: Settings, target: str, concurrency: Optional[int] = None):
+        """
+        Initialize the batch pipeline with settings.
+        
+        Args:
+            settings: Application settings
+            target: Name of the pipeline to run for each job ('cv' or 'letter')
+            concurrency: Maximum number of concurrent jobs (defaults to Settings.batch_concurrency)
+            
+        Raises:
+            ValueError: If the target pipeline or concurrency is invalid
+        """
+        super().__init__(settings)
+        if target not in BATCH_PIPELINES:
+            raise ValueError(f"Unsupported batch pipeline: {target} (choose from {', '.join(BATCH_PIPELINES)})")
+        
+        self.pipeline_name = "batch"
+        self.target = target
+        self.concurrency = concurrency or settings.batch_concurrency
+        if self.concurrency < 1:
+            raise ValueError(f"Concurrency must be at least 1, got {self.concurrency}")
+    
+    def run(self, cv_file: Optional[str] = None, jd_dir: Optional[str] = None) -> List[BatchJobResult]:
+        """
+        Run the batch pipeline.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_dir: Optional directory of job descriptions (defaults to the job descriptions directory)
+            
+        Returns:
+            List of per-job results
+        """
+        return asyncio.run(self.arun(cv_file, jd_dir))
+    
+    async def arun(self, cv_file: Optional[str] = None, jd_dir: Optional[str] = None) -> List[BatchJobResult]:
+        """
+        Run the batch pipeline asynchronously.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_dir: Optional directory of job descriptions (defaults to the job descriptions directory)
+            
+        Returns:
+            List of per-job results
+            
+        Raises:
+            FileNotFoundError: If the directory contains no job descriptions
+        """
+        jd_directory = Path(jd_dir) if jd_dir else self.settings.job_descriptions_dir
+        jd_paths = list_files(jd_directory, JOB_DESCRIPTION_EXTENSIONS)
+        if not jd_paths:
+            error = FileNotFoundError(f"No job description files found in: {jd_directory}")
+            self.report_error(error, "batch processing")
+            raise error
+        
+        logger.debug(f"Starting batch {self.target} pipeline: {len(jd_paths)} jobs, concurrency={self.concurrency}")
+        print(f"Processing {len(jd_paths)} job descriptions with concurrency {self.concurrency}...")
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = [BatchJobResult(job_description=jd_path) for jd_path in jd_paths]
+        completed = 0
+        started = time.perf_counter()
+        
+        # PDFs are rendered in worker processes; a job gives up its slot once its
+        # documents are generated, so the next job's LLM calls overlap its rendering
+        render_stage = get_render_stage(self.settings)
+        
+        async def run_job(result: BatchJobResult) -> None:
+            nonlocal completed
+            pipeline = BATCH_PIPELINES[self.target](self.settings)
+            pipeline.render_stage = render_stage
+            async with semaphore:
+                job_started = time.perf_counter()
+                try:
+                    result.output_files = await pipeline.arun(cv_file, str(result.job_description))
+                    result.status = "ok"
+                except Exception as e:
+                    result.status = "failed"
+                    result.error = str(e)
+                    logger.debug(f"Batch job failed: {result.job_description.name}", exc_info=e)
+            try:
+                await pipeline.wait_for_renders()
+            except Exception as e:
+                result.status = "failed"
+                result.error = f"Rendering failed: {e}"
+                logger.debug(f"Batch job rendering failed: {result.job_description.name}", exc_info=e)
+            result.duration = time.perf_counter() - job_started
+            
+            # Progress line for each finished job
+            completed += 1
+            mark = "✓" if result.status == "ok" else "✗"
+            print(f"[{completed}/{len(results)}] {mark} {result.job_description.name} ({result.duration:.1f}s)")
+        
+        await asyncio.gather(*(run_job(result) for result in results))
+        
+        elapsed = time.perf_counter() - started
+        await asyncio.to_thread(self.write_summary, results, elapsed)
+        return results
+    
+    def write_summary(self, results: List[BatchJobResult], elapsed: float) -> Path:
+        """
+        Print the per-job status summary and write it to the batch output directory.
+        
+        Args:
+            results: List of per-job results
+            elapsed: Wall-clock duration of the batch in seconds
+            
+        Returns:
+            Path to the summary file
+        """
+        succeeded = sum(1 for result in results if result.status == "ok")
+        summary = {
+            "pipeline": self.target,
+            "concurrency": self.concurrency,
+            "jobs": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "elapsed_seconds": round(elapsed, 3),
+            "results": [
+                {
+                    "job_description": str(result.job_description),
+                    "status": result.status,
+                    "duration_seconds": round(result.duration, 3),
+                    "output_files": {kind: str(path) for kind, path in result.output_files.items()},
+                    "error": result.error,
+                }
+                for result in results
+            ],
+        }
+        
+        output_dir = self.setup_output_directory("batch", self.target)
+        summary_path = write_file(json.dumps(summary, indent=2, ensure_ascii=False), output_dir / "summary.json")
+        
+        print(f"\nBatch {self.target}: {succeeded}/{len(results)} jobs succeeded in {elapsed:.1f}s")
+        for result in results:
+            if result.status != "ok":
+                print(f"  ✗ {result.job_description.name}: {result.error}")
+        print(f"✓ Summary: {summary_path}")
+        
+        return summary_path
@@ -0,0 +1,119 @@
+"""
+Run context module for the CV Assistant application.
+
+This module provides a per-run context object that holds the inputs of a
+pipeline run and memoizes values derived from them, so that every stage
+of the run computes them only once.
+"""
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+@dataclass
+class RunContext:
+    """
+    Per-run context shared by all stages of a pipeline run.
+    
+    Holds the loaded inputs (the job description both cleaned and as read
+    from disk) and a memo of derived facts (content hashes,
+    candidate name, company name, position title, ...).
+    """
+    cv_path: Optional[Path] = None
+    cv_content: str = ""
+    jd_path: Optional[Path] = None
+    jd_content: str = ""
+    jd_raw_content: str = ""  # Job description before boilerplate removal
+    _memo: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _tasks: Dict[str, "asyncio.Future"] = field(default_factory=dict, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    
+    def memoize(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Get a derived value, computing it on first use.
+        
+        Args:
+            key: Name of the derived value
+            factory: Callable computing the value
+            
+        Returns:
+            The memoized value
+        """
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = factory()
+            return self._memo[key]
+    
+    async def amemoize(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a derived value asynchronously, computing it on first use.
+        
+        Concurrent callers asking for the same key share a single computation.
+        
+        Args:
+            key: Name of the derived value
+            factory: Callable returning an awaitable that computes the value
+            
+        Returns:
+            The memoized value
+        """
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+            task = self._tasks.get(key)
+            if task is None:
+                task = asyncio.ensure_future(factory())
+                self._tasks[key] = task
+        
+        try:
+            value = await task
+        finally:
+            # Drop the task so a failed computation can be retried
+            with self._lock:
+                self._tasks.pop(key, None)
+        
+        with self._lock:
+            self._memo[key] = value
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a derived value computed elsewhere.
+        
+        Args:
+            key: Name of the derived value
+            value: Value to store
+        """
+        with self._lock:
+            self._memo[key] = value
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a derived value if it has already been computed.
+        
+        Args:
+            key: Name of the derived value
+            default: Value returned if nothing is stored under the key
+            
+        Returns:
+            The stored value or the default
+        """
+        with self._lock:
+            return self._memo.get(key, default)
+    
+    @property
+    def cv_hash(self) -> str:
+        """
+        SHA-256 hash of the CV content.
+        """
+        return self.memoize("cv_hash", lambda: hashlib.sha256(self.cv_content.encode("utf-8")).hexdigest())
+    
+    @property
+    def jd_hash(self) -> str:
+        """
+        SHA-256 hash of the job description content.
+        """
+        return self.memoize("jd_hash", lambda: hashlib.sha256(self.jd_content.encode("utf-8")).hexdigest())
@@ -3,17 +3,21 @@ CV tailoring pipeline module for the CV Assistant application.
 
 This module provides a pipeline for tailoring a CV to a job description.
 """
+import asyncio
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage
 
 from app.config.settings import Settings
+from app.llm.prompts import PromptBuilder
 from app.pipelines.base import BasePipeline
+from app.pipelines.context import RunContext
 from app.utils.logger import get_logger
+from app.utils.sections import OMIT_MARKER, TemplateSection, assemble_sections, normalize_section, split_sections
 
 logger = get_logger(__name__)
 
@@ -35,6 +39,7 @@ class CVPipeline(BasePipeline):
         """
         super().__init__(settings)
         self.pipeline_name = "cv"
+        self.css_file = "cv_style.css"
     
     def run(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> Dict[str, Path]:
         """
@@ -51,69 +56,206 @@ class CVPipeline(BasePipeline):
             # Log detailed information to file
             logger.debug(f"Starting CV tailoring pipeline with parameters: cv_file={cv_file}, jd_file={jd_file}")
             
+            # Bound the total time spent on LLM calls in this run
+            self.start_deadline()
+            
             # Load CV and job description
-            cv_path, cv_content = self.load_cv(cv_file)
-            jd_path, jd_content = self.load_job_description(jd_file)
+            context = self.create_context(cv_file, jd_file)
             
             # Load CV template and instructions
-            template_name = self.settings.template_dir
-            cv_template = self.load_template("cv_template.md")
-            cv_instructions = self.load_template("cv_instructions.md") if self.settings.get_template_file("cv_instructions.md").exists() else ""
-            
-            # Log essential information - debug for file logs only
-            logger.debug(f"CV: {cv_path.name} | Job: {jd_path.name} | Template: {template_name}")
+            cv_template, cv_instructions = self.load_cv_templates(context)
             
             # Extract candidate name and company name
-            names = self.extract_names(cv_content, jd_content)
-            candidate_name = names["candidate_name"]
-            company_name = names["company_name"]
-            logger.debug(f"Extracted candidate name: {candidate_name}")
-            logger.debug(f"Extracted company name: {company_name}")
+            names = self.resolve_names(context)
             
-            # Extract base name from job description file (without extension) for directory naming
-            job_name = jd_path.stem
+            # Generate tailored CV
+            logger.debug(f"Generating tailored CV using {self.settings.get_stage_config('tailoring').model}...")
+            candidates = self.generate_tailored_cv_candidates(
+                context.cv_content, context.jd_content, cv_template, cv_instructions, 
+                self.settings.llm_candidates, self.get_stream_path(context)
+            )
             
-            # Set up output directory
-            output_dir = self.setup_output_directory(job_name, self.pipeline_name)
+            return self.finish(context, names, candidates[0], candidates[1:])
             
-            # Generate tailored CV
-            logger.debug(f"Generating tailored CV using {self.settings.llm_model}...")
-            tailored_cv = self.generate_tailored_cv(cv_content, jd_content, cv_template, cv_instructions)
+        except Exception as e:
+            self.report_error(e, "CV tailoring")
+            raise
+    
+    async def arun(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> Dict[str, Path]:
+        """
+        Run the CV tailoring pipeline asynchronously.
+        
+        Name extraction and CV generation are independent, so both LLM calls
+        run concurrently. File I/O and rendering run in worker threads.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_file: Optional path to the job description file
             
-            # Create file name with candidate name and company name
-            file_name = f"{candidate_name} - cv ({company_name})"
+        Returns:
+            Dictionary of output file paths
+        """
+        try:
+            logger.debug(f"Starting async CV tailoring pipeline with parameters: cv_file={cv_file}, jd_file={jd_file}")
             
-            # Save results
-            output_files = self.save_output(tailored_cv, output_dir, file_name)
+            # Bound the total time spent on LLM calls in this run
+            self.start_deadline()
             
-            # Copy the job description to the output directory for reference
-            self.copy_job_description(jd_path, output_dir)
+            # Load inputs off the event loop
+            context = await asyncio.to_thread(self.create_context, cv_file, jd_file)
+            cv_template, cv_instructions = await asyncio.to_thread(self.load_cv_templates, context)
             
-            # Success message with clear output information
-            print("✓ CV tailoring completed successfully")
-            print(f"✓ Output: {output_dir}")
-            logger.debug(f"Generated files: {', '.join([path.name for path in output_files.values()])}")
+            # Overlap name extraction with CV generation
+            logger.debug(f"Generating tailored CV using {self.settings.get_stage_config('tailoring').model}...")
+            names, candidates = await asyncio.gather(
+                self.aresolve_names(context),
+                self.agenerate_tailored_cv_candidates(
+                    context.cv_content, context.jd_content, cv_template, cv_instructions, 
+                    self.settings.llm_candidates, self.get_stream_path(context)
+                ),
+            )
             
-            return output_files
+            return await asyncio.to_thread(self.finish, context, names, candidates[0], candidates[1:])
             
-        except FileNotFoundError as e:
-            error_msg = f"Error: {str(e)}\nCheck files in: CV dir: {self.settings.cv_dir}, Job dir: {self.settings.job_descriptions_dir}"
-            logger.error(error_msg)
-            print(error_msg)
-            raise
         except Exception as e:
-            error_msg = f"Error during CV tailoring: {str(e)}\nCheck log file for details: {os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs', 'run.log')}"
-            logger.error(error_msg)
-            logger.debug("Detailed error information:", exc_info=True)
-            print(error_msg)
+            self.report_error(e, "CV tailoring")
             raise
     
+    def load_cv_templates(self, context: RunContext) -> Tuple[str, str]:
+        """
+        Load the CV template and the optional CV instructions.
+        
+        Args:
+            context: Run context
+            
+        Returns:
+            Tuple of (cv_template, cv_instructions)
+        """
+        cv_template = self.load_template("cv_template.md")
+        cv_instructions = self.load_optional_template("cv_instructions.md")
+        
+        # Log essential information - debug for file logs only
+        logger.debug(f"CV: {context.cv_path.name} | Job: {context.jd_path.name} | Template: {self.settings.template_dir}")
+        return cv_template, cv_instructions
+    
+    def get_file_name(self, names: Dict[str, str]) -> str:
+        """
+        Get the base name of the output files.
+        
+        Args:
+            names: Dictionary containing 'candidate_name' and 'company_name'
+            
+        Returns:
+            Base name including the candidate name and company name
+        """
+        return f"{names['candidate_name']} - cv ({names['company_name']})"
+    
+    def finish(
+        self, 
+        context: RunContext, 
+        names: Dict[str, str], 
+        tailored_cv: str, 
+        alternatives: Optional[List[str]] = None
+    ) -> Dict[str, Path]:
+        """
+        Save the tailored CV and report the result.
+        
+        Args:
+            context: Run context
+            names: Dictionary containing 'candidate_name' and 'company_name'
+            tailored_cv: Tailored CV content
+            alternatives: Optional candidates that were not kept, saved as markdown alongside
+            
+        Returns:
+            Dictionary of output file paths
+        """
+        candidate_name = names["candidate_name"]
+        company_name = names["company_name"]
+        logger.debug(f"Extracted candidate name: {candidate_name}")
+        logger.debug(f"Extracted company name: {company_name}")
+        
+        # Extract base name from job description file (without extension) for directory naming
+        job_name = context.jd_path.stem
+        
+        # Set up output directory
+        output_dir = self.setup_output_directory(job_name, self.pipeline_name)
+        
+        # Create file name with candidate name and company name
+        file_name = self.get_file_name(names)
+        
+        # Save results
+        output_files = self.save_output(tailored_cv, output_dir, file_name)
+        self.save_alternatives(alternatives or [], output_dir, file_name)
+        
+        # The complete output replaces the partial file written while streaming
+        self.remove_partial_output(output_dir)
+        
+        # Copy the job description to the output directory for reference
+        self.copy_job_description(context.jd_path, output_dir)
+        
+        # Success message with clear output information
+        print("✓ CV tailoring completed successfully")
+        print(f"✓ Output: {output_dir}")
+        logger.debug(f"Generated files: {', '.join([path.name for path in output_files.values()])}")
+        
+        return output_files
+    
+    def build_tailored_cv_messages(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        cv_template: str, 
+        cv_instructions: str,
+        section: Optional[TemplateSection] = None
+    ) -> List[BaseMessage]:
+        """
+        Build the messages for generating a tailored CV, or one of its sections.
+        
+        The system message is the same for the whole CV and for every section,
+        so section requests share the provider's cached prefix.
+        
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            cv_template: CV template
+            cv_instructions: CV instructions
+            section: Optional template section to generate on its own
+            
+        Returns:
+            List of messages
+        """
+        # Shared across jobs: role, template, instructions and task rules, then the CV;
+        # the job description goes last so the prefix can be cached by the provider
+        prompt = PromptBuilder("You are expert in writing CVs and you excel in this.")
+        prompt.add_document("Read the template:", cv_template)
+        prompt.add_document("Follow these instructions for CV writing:", cv_instructions)
+        prompt.add_section("""# Task:
+1. Strictly using the template, rewrite the CV using the template format.
+2. Using the important keywords and phrases from the job description, tailor the rewritten CV is it would best match the job description.
+3. You are allowed to tune the expression of the source CV data so it would best match the job description, but do not add items which are not derived as facts from the original CV.
+4. Do not mention the company name from the job description into the CV.
+5. Generate Tailored complete CV and nothing else.""")
+        prompt.add_document("Read the source cv:", cv_content, priority=1)
+        
+        # Per job: the job description (and the section to generate)
+        if section is None:
+            prompt.add_job_section("# Task: Generate tailored CV and nothing else.")
+        else:
+            prompt.add_job_section(f"""# Task: Generate ONLY the "{section.name}" part of the tailored CV and nothing else.
+- Follow this part of the template, starting with its heading; other parts are generated separately.
+- If the source CV has no information for this part, reply with {OMIT_MARKER} and nothing else.""")
+            prompt.add_job_document("Part of the template to generate:", section.text)
+        prompt.add_job_document("Job Description:", jd_content, priority=0)
+        
+        return self.build_messages(prompt, "tailoring")
+    
     def generate_tailored_cv(
         self, 
         cv_content: str, 
         jd_content: str, 
         cv_template: str, 
-        cv_instructions: str
+        cv_instructions: str,
+        stream_to: Optional[Path] = None
     ) -> str:
         """
         Generate a tailored CV using LangChain.
@@ -123,103 +265,196 @@ class CVPipeline(BasePipeline):
             jd_content: Job description content
             cv_template: CV template
             cv_instructions: CV instructions
+            stream_to: Optional file to stream the CV into as it is generated
             
         Returns:
             Tailored CV content
         """
         logger.info("Generating tailored CV...")
+        sections = self.get_parallel_sections(cv_template)
+        if sections:
+            return self.generate_tailored_cv_sections(cv_content, jd_content, cv_template, cv_instructions, sections)
+        messages = self.build_tailored_cv_messages(cv_content, jd_content, cv_template, cv_instructions)
         
-        # Create LLM model
-        model = ChatOpenAI(
-            model=self.settings.llm_model,
-            temperature=self.settings.llm_temperature
-        )
-        
-        # Build system message with instructions
-        system_content = f"""
-You are expert in writing CVs and you excel in this.
-
-Read the source cv:
-```
-{cv_content}
-```
-
-Read the template:
-```
-{cv_template}
-```
-
-Follow these instructions for CV writing:
-```
-{cv_instructions}
-```
-
-# Task:
-1. Strictly using the template, rewrite the CV using the template format.
-2. Using the important keywords and phrases from the job description, tailor the rewritten CV is it would best match the job description.
-3. You are allowed to tune the expression of the source CV data so it would best match the job description, but do not add items which are not derived as facts from the original CV.
-4. Do not mention the company name from the job description into the CV.
-5. Generate Tailored complete CV and nothing else.
-"""
+        logger.info("Calling LLM to generate tailored CV...")
+        return self.invoke_llm(messages, stage="tailoring", stream_to=stream_to)
+    
+    async def agenerate_tailored_cv(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        cv_template: str, 
+        cv_instructions: str,
+        stream_to: Optional[Path] = None
+    ) -> str:
+        """
+        Generate a tailored CV asynchronously.
         
-        messages = [
-            SystemMessage(content=system_content),
-            HumanMessage(content=f"# Task: Generate tailored CV and nothing else.\n\nJob Description:\n\n{jd_content}"),
-        ]
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            cv_template: CV template
+            cv_instructions: CV instructions
+            stream_to: Optional file to stream the CV into as it is generated
+            
+        Returns:
+            Tailored CV content
+        """
+        logger.info("Generating tailored CV...")
+        sections = self.get_parallel_sections(cv_template)
+        if sections:
+            return await self.agenerate_tailored_cv_sections(cv_content, jd_content, cv_template, cv_instructions, sections)
+        messages = self.build_tailored_cv_messages(cv_content, jd_content, cv_template, cv_instructions)
         
         logger.info("Calling LLM to generate tailored CV...")
-        response = model.invoke(messages)
+        return await self.ainvoke_llm(messages, stage="tailoring", stream_to=stream_to)
+    
+    def get_parallel_sections(self, cv_template: str) -> List[TemplateSection]:
+        """
+        Get the template sections to generate concurrently, if section-parallel generation applies.
         
-        return response.content
+        Args:
+            cv_template: CV template
+            
+        Returns:
+            Template sections, or an empty list to generate the CV in one call
+        """
+        if not self.settings.cv_parallel_sections:
+            return []
+        sections = split_sections(cv_template)
+        if len(sections) < 2:
+            logger.debug("CV template has no ## sections to generate in parallel")
+            return []
+        if self.settings.llm_streaming:
+            logger.info("Streaming is not used when CV sections are generated in parallel")
+        return sections
     
-    def save_output(self, content: str, output_dir: Path, base_name: str) -> Dict[str, Path]:
+    def generate_tailored_cv_sections(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        cv_template: str, 
+        cv_instructions: str,
+        sections: List[TemplateSection]
+    ) -> str:
         """
-        Save the output content to markdown, PDF, and HTML files using CV-specific styling.
+        Generate a tailored CV section by section, with all sections requested concurrently.
         
         Args:
-            content: Content to save
-            output_dir: Output directory
-            base_name: Base name for the output files
+            cv_content: CV content
+            jd_content: Job description content
+            cv_template: CV template
+            cv_instructions: CV instructions
+            sections: Template sections to generate
             
         Returns:
-            Dictionary of output file paths
+            Assembled tailored CV content
         """
-        # Get CV-specific CSS content
-        css_path = self.settings.get_template_file("cv_style.css")
-        css_content = None
-        if css_path.exists():
-            with open(css_path, 'r', encoding='utf-8') as f:
-                css_content = f.read()
-            logger.debug(f"Using CV-specific CSS from: {css_path}")
-        else:
-            logger.warning(f"CV CSS file not found: {css_path}")
-        
-        # Use the parent class's save_output method but with our CSS content
-        from app.utils.file_io import read_file, write_file
-        from app.utils.converter import FileConverter
-        
-        # Save markdown file
-        md_path = output_dir / f"{base_name}.md"
-        write_file(content, md_path)
-        logger.info(f"Markdown saved to: {md_path}")
-        
-        # Save PDF file
-        pdf_path = output_dir / f"{base_name}.pdf"
-        FileConverter.markdown_to_pdf(content, pdf_path, css_content)
-        logger.info(f"PDF saved to: {pdf_path}")
-        
-        # Save HTML file
-        html_content = FileConverter.markdown_to_html(content, css_content)
-        html_path = output_dir / f"{base_name}.html"
-        write_file(html_content, html_path)
-        logger.info(f"HTML saved to: {html_path}")
-        
-        return {
-            "markdown": md_path,
-            "pdf": pdf_path,
-            "html": html_path
-        }
+        logger.info(f"Calling LLM to generate {len(sections)} CV sections in parallel...")
+        
+        def generate(section: TemplateSection) -> str:
+            messages = self.build_tailored_cv_messages(cv_content, jd_content, cv_template, cv_instructions, section)
+            return normalize_section(self.invoke_llm(messages, stage="tailoring"), section)
+        
+        with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+            parts = list(executor.map(generate, sections))
+        return assemble_sections(parts)
+    
+    async def agenerate_tailored_cv_sections(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        cv_template: str, 
+        cv_instructions: str,
+        sections: List[TemplateSection]
+    ) -> str:
+        """
+        Generate a tailored CV section by section asynchronously.
+        
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            cv_template: CV template
+            cv_instructions: CV instructions
+            sections: Template sections to generate
+            
+        Returns:
+            Assembled tailored CV content
+        """
+        logger.info(f"Calling LLM to generate {len(sections)} CV sections in parallel...")
+        
+        async def generate(section: TemplateSection) -> str:
+            messages = self.build_tailored_cv_messages(cv_content, jd_content, cv_template, cv_instructions, section)
+            return normalize_section(await self.ainvoke_llm(messages, stage="tailoring"), section)
+        
+        parts = await asyncio.gather(*(generate(section) for section in sections))
+        return assemble_sections(parts)
+    
+    def generate_tailored_cv_candidates(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        cv_template: str, 
+        cv_instructions: str,
+        count: int = 1,
+        stream_to: Optional[Path] = None
+    ) -> List[str]:
+        """
+        Generate one or more tailored CV candidates, best first.
+        
+        A single candidate is generated (and streamed) as usual; several are
+        generated in one round trip and ranked by their local score.
         
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            cv_template: CV template
+            cv_instructions: CV instructions
+            count: Number of candidates
+            stream_to: Optional file to stream a single candidate into
+            
+        Returns:
+            Tailored CV candidates sorted by descending score
+        """
+        if count <= 1:
+            return [self.generate_tailored_cv(cv_content, jd_content, cv_template, cv_instructions, stream_to)]
+        
+        logger.info(f"Generating {count} tailored CV candidates...")
+        messages = self.build_tailored_cv_messages(cv_content, jd_content, cv_template, cv_instructions)
+        candidates = self.invoke_llm_candidates(messages, stage="tailoring", count=count)
+        return self.rank_candidates(candidates, jd_content, cv_content)
+    
+    async def agenerate_tailored_cv_candidates(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        cv_template: str, 
+        cv_instructions: str,
+        count: int = 1,
+        stream_to: Optional[Path] = None
+    ) -> List[str]:
+        """
+        Generate one or more tailored CV candidates asynchronously, best first.
+        
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            cv_template: CV template
+            cv_instructions: CV instructions
+            count: Number of candidates
+            stream_to: Optional file to stream a single candidate into
+            
+        Returns:
+            Tailored CV candidates sorted by descending score
+        """
+        if count <= 1:
+            return [await self.agenerate_tailored_cv(cv_content, jd_content, cv_template, cv_instructions, stream_to)]
+        
+        logger.info(f"Generating {count} tailored CV candidates...")
+        messages = self.build_tailored_cv_messages(cv_content, jd_content, cv_template, cv_instructions)
+        candidates = await self.ainvoke_llm_candidates(messages, stage="tailoring", count=count)
+        return await asyncio.to_thread(self.rank_candidates, candidates, jd_content, cv_content)
+    
     def copy_job_description(self, jd_path: Path, output_dir: Path) -> Path:
         """
         Copy the job description to the output directory.
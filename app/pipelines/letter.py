@@ -3,17 +3,20 @@ Cover letter generation pipeline module for the CV Assistant application.
 
 This module provides a pipeline for generating a cover letter based on a CV and job description.
 """
+import asyncio
 import os
 import logging
 import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage
 
 from app.config.settings import Settings
+from app.llm.prompts import PromptBuilder
 from app.pipelines.base import BasePipeline
+from app.pipelines.context import RunContext
+from app.utils.cv_index import select_relevant
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -36,6 +39,7 @@ class LetterPipeline(BasePipeline):
         """
         super().__init__(settings)
         self.pipeline_name = "letter"
+        self.css_file = "letter_style.css"
     
     def run(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> Dict[str, Path]:
         """
@@ -52,124 +56,199 @@ class LetterPipeline(BasePipeline):
             # Log detailed information to file
             logger.debug(f"Starting cover letter generation pipeline with parameters: cv_file={cv_file}, jd_file={jd_file}")
             
+            # Bound the total time spent on LLM calls in this run
+            self.start_deadline()
+            
             # Load CV and job description
-            cv_path, cv_content = self.load_cv(cv_file)
-            jd_path, jd_content = self.load_job_description(jd_file)
+            context = self.create_context(cv_file, jd_file)
             
             # Load letter template and instructions
-            template_name = self.settings.template_dir
-            letter_template = self.load_template("letter_template.md")
-            letter_instructions = self.load_template("letter_instructions.md") if self.settings.get_template_file("letter_instructions.md").exists() else ""
-            
-            # Log essential information - debug for file logs only
-            logger.debug(f"CV: {cv_path.name} | Job: {jd_path.name} | Template: {template_name}")
+            letter_template, letter_instructions = self.load_letter_templates(context)
             
             # Extract candidate name and company name
-            names = self.extract_names(cv_content, jd_content)
-            candidate_name = names["candidate_name"]
-            company_name = names["company_name"]
-            logger.debug(f"Extracted candidate name: {candidate_name}")
-            logger.debug(f"Extracted company name: {company_name}")
+            names = self.resolve_names(context)
             
-            # Extract base name from job description file (without extension) for directory naming
-            job_name = jd_path.stem
+            # Generate cover letter
+            logger.debug(f"Generating cover letter using {self.settings.get_stage_config('letter').model}...")
+            candidates = self.generate_cover_letter_candidates(
+                context.cv_content, context.jd_content, letter_template, letter_instructions, context, 
+                self.settings.llm_candidates, self.get_stream_path(context)
+            )
             
-            # Set up output directory
-            output_dir = self.setup_output_directory(job_name, self.pipeline_name)
+            return self.finish(context, names, candidates[0], candidates[1:])
             
-            # Generate cover letter
-            logger.debug(f"Generating cover letter using {self.settings.llm_model}...")
-            cover_letter = self.generate_cover_letter(cv_content, jd_content, letter_template, letter_instructions)
+        except Exception as e:
+            self.report_error(e, "cover letter generation")
+            raise
+    
+    async def arun(self, cv_file: Optional[str] = None, jd_file: Optional[str] = None) -> Dict[str, Path]:
+        """
+        Run the cover letter generation pipeline asynchronously.
+        
+        The letter prompt needs the extracted names, so name extraction
+        overlaps with template loading rather than with generation. File I/O
+        and rendering run in worker threads.
+        
+        Args:
+            cv_file: Optional path to the CV file
+            jd_file: Optional path to the job description file
+            
+        Returns:
+            Dictionary of output file paths
+        """
+        try:
+            logger.debug(f"Starting async cover letter generation pipeline with parameters: cv_file={cv_file}, jd_file={jd_file}")
             
-            # Create file name with candidate name and company name
-            file_name = f"{candidate_name} - cover letter ({company_name})"
+            # Bound the total time spent on LLM calls in this run
+            self.start_deadline()
             
-            # Save results
-            output_files = self.save_output(cover_letter, output_dir, file_name)
+            context = await asyncio.to_thread(self.create_context, cv_file, jd_file)
             
-            # Copy the job description to the output directory for reference
-            self.copy_job_description(jd_path, output_dir)
+            # Overlap name extraction with template loading
+            names, (letter_template, letter_instructions) = await asyncio.gather(
+                self.aresolve_names(context),
+                asyncio.to_thread(self.load_letter_templates, context),
+            )
             
-            # Success message with clear output information
-            print("✓ Cover letter generation completed successfully")
-            print(f"✓ Output: {output_dir}")
-            logger.debug(f"Generated files: {', '.join([path.name for path in output_files.values()])}")
+            logger.debug(f"Generating cover letter using {self.settings.get_stage_config('letter').model}...")
+            candidates = await self.agenerate_cover_letter_candidates(
+                context.cv_content, context.jd_content, letter_template, letter_instructions, context, 
+                self.settings.llm_candidates, self.get_stream_path(context)
+            )
             
-            return output_files
+            return await asyncio.to_thread(self.finish, context, names, candidates[0], candidates[1:])
             
-        except FileNotFoundError as e:
-            error_msg = f"Error: {str(e)}\nCheck files in: CV dir: {self.settings.cv_dir}, Job dir: {self.settings.job_descriptions_dir}"
-            logger.error(error_msg)
-            print(error_msg)
-            raise
         except Exception as e:
-            error_msg = f"Error during cover letter generation: {str(e)}\nCheck log file for details: {os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs', 'run.log')}"
-            logger.error(error_msg)
-            logger.debug("Detailed error information:", exc_info=True)
-            print(error_msg)
+            self.report_error(e, "cover letter generation")
             raise
     
-    def generate_cover_letter(
+    def load_letter_templates(self, context: RunContext) -> Tuple[str, str]:
+        """
+        Load the letter template and the optional letter instructions.
+        
+        Args:
+            context: Run context
+            
+        Returns:
+            Tuple of (letter_template, letter_instructions)
+        """
+        letter_template = self.load_template("letter_template.md")
+        letter_instructions = self.load_optional_template("letter_instructions.md")
+        
+        # Log essential information - debug for file logs only
+        logger.debug(f"CV: {context.cv_path.name} | Job: {context.jd_path.name} | Template: {self.settings.template_dir}")
+        return letter_template, letter_instructions
+    
+    def get_file_name(self, names: Dict[str, str]) -> str:
+        """
+        Get the base name of the output files.
+        
+        Args:
+            names: Dictionary containing 'candidate_name' and 'company_name'
+            
+        Returns:
+            Base name including the candidate name and company name
+        """
+        return f"{names['candidate_name']} - cover letter ({names['company_name']})"
+    
+    def finish(
+        self, 
+        context: RunContext, 
+        names: Dict[str, str], 
+        cover_letter: str, 
+        alternatives: Optional[List[str]] = None
+    ) -> Dict[str, Path]:
+        """
+        Save the cover letter and report the result.
+        
+        Args:
+            context: Run context
+            names: Dictionary containing 'candidate_name' and 'company_name'
+            cover_letter: Cover letter content
+            alternatives: Optional candidates that were not kept, saved as markdown alongside
+            
+        Returns:
+            Dictionary of output file paths
+        """
+        candidate_name = names["candidate_name"]
+        company_name = names["company_name"]
+        logger.debug(f"Extracted candidate name: {candidate_name}")
+        logger.debug(f"Extracted company name: {company_name}")
+        
+        # Extract base name from job description file (without extension) for directory naming
+        job_name = context.jd_path.stem
+        
+        # Set up output directory
+        output_dir = self.setup_output_directory(job_name, self.pipeline_name)
+        
+        # Create file name with candidate name and company name
+        file_name = self.get_file_name(names)
+        
+        # Save results
+        output_files = self.save_output(cover_letter, output_dir, file_name)
+        self.save_alternatives(alternatives or [], output_dir, file_name)
+        
+        # The complete output replaces the partial file written while streaming
+        self.remove_partial_output(output_dir)
+        
+        # Copy the job description to the output directory for reference
+        self.copy_job_description(context.jd_path, output_dir)
+        
+        # Success message with clear output information
+        print("✓ Cover letter generation completed successfully")
+        print(f"✓ Output: {output_dir}")
+        logger.debug(f"Generated files: {', '.join([path.name for path in output_files.values()])}")
+        
+        return output_files
+    
+    def build_cover_letter_messages(
         self, 
         cv_content: str, 
         jd_content: str, 
         letter_template: str, 
-        letter_instructions: str
-    ) -> str:
+        letter_instructions: str,
+        names: Dict[str, str],
+        position_title: str
+    ) -> List[BaseMessage]:
         """
-        Generate a cover letter using LangChain.
+        Build the messages for generating a cover letter.
         
         Args:
             cv_content: CV content
             jd_content: Job description content
             letter_template: Letter template
             letter_instructions: Letter instructions
+            names: Dictionary containing 'candidate_name' and 'company_name'
+            position_title: Position title
             
         Returns:
-            Cover letter content
+            List of messages
         """
-        logger.info("Generating cover letter...")
-        
-        # Create LLM model
-        model = ChatOpenAI(
-            model=self.settings.llm_model,
-            temperature=self.settings.llm_temperature
-        )
-        
         # Get current date in a formal format
         current_date = datetime.datetime.now().strftime("%B %d, %Y")
         
-        # Extract candidate and company information
-        names = self.extract_names(cv_content, jd_content)
         candidate_name = names["candidate_name"]
         company_name = names["company_name"]
         
-        # Extract position title from job description
-        # This is a simplified extraction - the LLM will do more sophisticated extraction in the actual letter
-        position_title = "the position" 
-        if "# " in jd_content[:200]:
-            position_title = jd_content.split("# ", 1)[1].split("\n", 1)[0].strip()
+        # Shared across jobs: role, template, instructions and task rules, then the CV.
+        # When only the CV entries relevant to the job are sent, they are per-job and go last.
+        top_k = self.settings.letter_cv_top_k
+        prompt = PromptBuilder("You are an expert in writing professional Cover Letters and you excel in this.")
+        prompt.add_document("Read the cover letter template:", letter_template)
+        prompt.add_document("Follow these instructions for Cover Letter writing:", letter_instructions)
+        prompt.add_section("""# Task:
+1. Strictly follow the provided cover letter template format.
+2. Replace ALL placeholders with actual content - do not leave any [bracketed placeholders] in the final letter.
+3. Use the important keywords and phrases from the job description to tailor the cover letter.
+4. Highlight relevant skills and experiences from the CV that match the job requirements.
+5. Maintain a professional tone and ensure the letter is concise (no more than one page).
+6. Generate a tailored cover letter and nothing else.""")
+        if top_k <= 0:
+            prompt.add_document("Read the source CV:", cv_content, priority=1)
         
-        # Build system message with instructions
-        system_content = f"""
-You are an expert in writing professional Cover Letters and you excel in this.
-
-Read the source CV:
-```
-{cv_content}
-```
-
-Read the cover letter template:
-```
-{letter_template}
-```
-
-Follow these instructions for Cover Letter writing:
-```
-{letter_instructions}
-```
-
-# Important Information to Include:
+        # Per job: names, position and date, then the job description
+        prompt.add_job_section("# Task: Generate a tailored cover letter and nothing else.")
+        prompt.add_job_section(f"""# Important Information to Include:
 - Candidate's Name: {candidate_name}
 - Company Name: {company_name}
 - Position Title: {position_title}
@@ -181,75 +260,173 @@ Follow these instructions for Cover Letter writing:
 - Replace [Company Name] with {company_name}
 - Replace [Position Title] with {position_title}
 - Replace [Your Full Name] with {candidate_name}
-- Replace other placeholders with appropriate content based on the CV and job description
-
-# Task:
-1. Strictly follow the provided cover letter template format.
-2. Replace ALL placeholders with actual content - do not leave any [bracketed placeholders] in the final letter.
-3. Use the important keywords and phrases from the job description to tailor the cover letter.
-4. Highlight relevant skills and experiences from the CV that match the job requirements.
-5. Maintain a professional tone and ensure the letter is concise (no more than one page).
-6. Generate a tailored cover letter and nothing else.
-"""
+- Replace other placeholders with appropriate content based on the CV and job description""")
+        if top_k > 0:
+            prompt.add_job_document(
+                "Read the parts of the source CV most relevant to this job:", 
+                select_relevant(cv_content, jd_content, top_k), 
+                priority=1
+            )
+        prompt.add_job_document("Job Description:", jd_content, priority=0)
         
-        messages = [
-            SystemMessage(content=system_content),
-            HumanMessage(content=f"# Task: Generate a tailored cover letter and nothing else.\n\nJob Description:\n\n{jd_content}"),
-        ]
+        return self.build_messages(prompt, "letter")
+    
+    def generate_cover_letter(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        letter_template: str, 
+        letter_instructions: str,
+        context: Optional[RunContext] = None,
+        stream_to: Optional[Path] = None
+    ) -> str:
+        """
+        Generate a cover letter using LangChain.
+        
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            letter_template: Letter template
+            letter_instructions: Letter instructions
+            context: Optional run context holding already extracted names
+            stream_to: Optional file to stream the letter into as it is generated
+            
+        Returns:
+            Cover letter content
+        """
+        logger.info("Generating cover letter...")
+        
+        # Reuse the run context so names are not extracted a second time
+        if context is None:
+            context = RunContext(cv_content=cv_content, jd_content=jd_content)
+        
+        messages = self.build_cover_letter_messages(
+            cv_content, jd_content, letter_template, letter_instructions,
+            self.resolve_names(context), self.resolve_position_title(context)
+        )
         
         logger.info("Calling LLM to generate cover letter...")
-        response = model.invoke(messages)
+        return self.invoke_llm(messages, stage="letter", stream_to=stream_to)
+    
+    async def agenerate_cover_letter(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        letter_template: str, 
+        letter_instructions: str,
+        context: Optional[RunContext] = None,
+        stream_to: Optional[Path] = None
+    ) -> str:
+        """
+        Generate a cover letter asynchronously.
         
-        return response.content
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            letter_template: Letter template
+            letter_instructions: Letter instructions
+            context: Optional run context holding already extracted names
+            stream_to: Optional file to stream the letter into as it is generated
+            
+        Returns:
+            Cover letter content
+        """
+        logger.info("Generating cover letter...")
+        
+        if context is None:
+            context = RunContext(cv_content=cv_content, jd_content=jd_content)
+        
+        messages = self.build_cover_letter_messages(
+            cv_content, jd_content, letter_template, letter_instructions,
+            await self.aresolve_names(context), self.resolve_position_title(context)
+        )
+        
+        logger.info("Calling LLM to generate cover letter...")
+        return await self.ainvoke_llm(messages, stage="letter", stream_to=stream_to)
     
-    def save_output(self, content: str, output_dir: Path, base_name: str) -> Dict[str, Path]:
+    def generate_cover_letter_candidates(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        letter_template: str, 
+        letter_instructions: str,
+        context: Optional[RunContext] = None,
+        count: int = 1,
+        stream_to: Optional[Path] = None
+    ) -> List[str]:
         """
-        Save the output content to markdown, PDF, and HTML files using letter-specific styling.
+        Generate one or more cover letter candidates, best first.
+        
+        A single candidate is generated (and streamed) as usual; several are
+        generated in one round trip and ranked by their local score.
         
         Args:
-            content: Content to save
-            output_dir: Output directory
-            base_name: Base name for the output files
+            cv_content: CV content
+            jd_content: Job description content
+            letter_template: Letter template
+            letter_instructions: Letter instructions
+            context: Optional run context holding already extracted names
+            count: Number of candidates
+            stream_to: Optional file to stream a single candidate into
             
         Returns:
-            Dictionary of output file paths
+            Cover letter candidates sorted by descending score
+        """
+        if count <= 1:
+            return [self.generate_cover_letter(cv_content, jd_content, letter_template, letter_instructions, context, stream_to)]
+        
+        logger.info(f"Generating {count} cover letter candidates...")
+        if context is None:
+            context = RunContext(cv_content=cv_content, jd_content=jd_content)
+        
+        messages = self.build_cover_letter_messages(
+            cv_content, jd_content, letter_template, letter_instructions,
+            self.resolve_names(context), self.resolve_position_title(context)
+        )
+        candidates = self.invoke_llm_candidates(messages, stage="letter", count=count)
+        return self.rank_candidates(candidates, jd_content, cv_content)
+    
+    async def agenerate_cover_letter_candidates(
+        self, 
+        cv_content: str, 
+        jd_content: str, 
+        letter_template: str, 
+        letter_instructions: str,
+        context: Optional[RunContext] = None,
+        count: int = 1,
+        stream_to: Optional[Path] = None
+    ) -> List[str]:
         """
-        # Get letter-specific CSS content
-        css_path = self.settings.get_template_file("letter_style.css")
-        css_content = None
-        if css_path.exists():
-            with open(css_path, 'r', encoding='utf-8') as f:
-                css_content = f.read()
-            logger.debug(f"Using letter-specific CSS from: {css_path}")
-        else:
-            logger.warning(f"Letter CSS file not found: {css_path}")
-        
-        # Use the parent class's save_output method but with our CSS content
-        from app.utils.file_io import read_file, write_file
-        from app.utils.converter import FileConverter
-        
-        # Save markdown file
-        md_path = output_dir / f"{base_name}.md"
-        write_file(content, md_path)
-        logger.info(f"Markdown saved to: {md_path}")
-        
-        # Save PDF file
-        pdf_path = output_dir / f"{base_name}.pdf"
-        FileConverter.markdown_to_pdf(content, pdf_path, css_content)
-        logger.info(f"PDF saved to: {pdf_path}")
-        
-        # Save HTML file
-        html_content = FileConverter.markdown_to_html(content, css_content)
-        html_path = output_dir / f"{base_name}.html"
-        write_file(html_content, html_path)
-        logger.info(f"HTML saved to: {html_path}")
-        
-        return {
-            "markdown": md_path,
-            "pdf": pdf_path,
-            "html": html_path
-        }
+        Generate one or more cover letter candidates asynchronously, best first.
         
+        Args:
+            cv_content: CV content
+            jd_content: Job description content
+            letter_template: Letter template
+            letter_instructions: Letter instructions
+            context: Optional run context holding already extracted names
+            count: Number of candidates
+            stream_to: Optional file to stream a single candidate into
+            
+        Returns:
+            Cover letter candidates sorted by descending score
+        """
+        if count <= 1:
+            return [await self.agenerate_cover_letter(
+                cv_content, jd_content, letter_template, letter_instructions, context, stream_to
+            )]
+        
+        logger.info(f"Generating {count} cover letter candidates...")
+        if context is None:
+            context = RunContext(cv_content=cv_content, jd_content=jd_content)
+        
+        messages = self.build_cover_letter_messages(
+            cv_content, jd_content, letter_template, letter_instructions,
+            await self.aresolve_names(context), self.resolve_position_title(context)
+        )
+        candidates = await self.ainvoke_llm_candidates(messages, stage="letter", count=count)
+        return await asyncio.to_thread(self.rank_candidates, candidates, jd_content, cv_content)
+    
     def copy_job_description(self, jd_path: Path, output_dir: Path) -> Path:
         """
         Copy the job description to the output directory.
@@ -0,0 +1,368 @@
+"""
+Headless Chromium rendering module for the CV Assistant application.
+
+This module prints HTML pages to PDF with a few long-lived headless Chromium
+processes driven over the DevTools protocol, instead of starting a browser for
+every document. Each document is rendered in its own tab from in-memory HTML,
+with a per-job timeout and a bound on the number of concurrently open tabs.
+"""
+import atexit
+import base64
+import contextlib
+import importlib.util
+import itertools
+import json
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The DevTools protocol runs over a WebSocket; websockets is optional
+websockets_available = importlib.util.find_spec("websockets") is not None
+if websockets_available:
+    from websockets.sync.client import connect as websocket_connect
+
+# Browser executables tried in order when none is configured
+CHROMIUM_BINARIES = ("chromium", "chromium-browser", "google-chrome", "google-chrome-stable", "chrome-headless-shell")
+
+# Line Chromium prints to stderr once its DevTools endpoint is ready
+DEVTOOLS_LISTENING = re.compile(r"DevTools listening on (ws://\S+)")
+
+# Seconds to wait for a browser to start
+LAUNCH_TIMEOUT = 20.0
+
+# Page.printToPDF options: honour the stylesheet's @page size and print backgrounds
+PRINT_OPTIONS = {"printBackground": True, "preferCSSPageSize": True}
+
+
+def find_chromium(binary: Optional[str] = None) -> Optional[str]:
+    """
+    Find a Chromium or Chrome executable.
+    
+    Args:
+        binary: Optional executable name or path to use instead of the defaults
+        
+    Returns:
+        Path of the executable, or None if none is found
+    """
+    for candidate in ([binary] if binary else CHROMIUM_BINARIES):
+        path = shutil.which(candidate)
+        if path:
+            return path
+    return None
+
+
+class ChromiumBrowser:
+    """
+    One headless Chromium process and its DevTools connection.
+    
+    Commands may be sent from several threads; a reader thread matches
+    responses to the waiting commands by id.
+    """
+    
+    def __init__(self, binary: str):
+        """
+        Initialize the browser without starting it.
+        
+        Args:
+            binary: Path of the Chromium executable
+        """
+        self.binary = binary
+        self.process: Optional[subprocess.Popen] = None
+        self.connection = None
+        self.connection_stack = contextlib.ExitStack()
+        self.profile_dir: Optional[str] = None
+        self.message_ids = itertools.count(1)
+        self.pending: Dict[int, "queue.Queue[Dict[str, Any]]"] = {}
+        self.pending_lock = threading.Lock()
+        self.reader: Optional[threading.Thread] = None
+    
+    @property
+    def alive(self) -> bool:
+        """
+        Whether the browser process is running and connected.
+        """
+        return self.process is not None and self.process.poll() is None and self.reader is not None and self.reader.is_alive()
+    
+    def start(self) -> None:
+        """
+        Start the browser and connect to its DevTools endpoint.
+        
+        Raises:
+            RuntimeError: If the browser does not start within LAUNCH_TIMEOUT
+        """
+        self.profile_dir = tempfile.mkdtemp(prefix="cv-assistant-chromium-")
+        self.process = subprocess.Popen(
+            [
+                self.binary,
+                "--headless",
+                "--disable-gpu",
+                "--no-first-run",
+                "--no-default-browser-check",
+                "--remote-debugging-port=0",
+                f"--user-data-dir={self.profile_dir}",
+                "about:blank",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        
+        # Read the endpoint from stderr in a thread so a silent browser cannot block us
+        endpoint: "queue.Queue[Optional[str]]" = queue.Queue()
+        
+        def read_stderr():
+            found = False
+            for line in self.process.stderr:
+                match = DEVTOOLS_LISTENING.search(line)
+                if match and not found:
+                    found = True
+                    endpoint.put(match.group(1))
+            if not found:
+                endpoint.put(None)
+        
+        threading.Thread(target=read_stderr, daemon=True).start()
+        try:
+            url = endpoint.get(timeout=LAUNCH_TIMEOUT)
+        except queue.Empty:
+            url = None
+        if url is None:
+            self.close()
+            raise RuntimeError(f"Chromium did not start: {self.binary}")
+        
+        self.connection = self.connection_stack.enter_context(
+            websocket_connect(url, max_size=None, open_timeout=LAUNCH_TIMEOUT)
+        )
+        self.reader = threading.Thread(target=self._read_messages, daemon=True)
+        self.reader.start()
+        logger.debug(f"Started headless Chromium {self.process.pid} at {url}")
+    
+    def _read_messages(self) -> None:
+        """
+        Deliver command responses to the threads waiting for them.
+        """
+        try:
+            for raw in self.connection:
+                message = json.loads(raw)
+                with self.pending_lock:
+                    waiter = self.pending.pop(message.get("id"), None)
+                if waiter is not None:
+                    waiter.put(message)
+        except Exception as e:
+            logger.debug(f"DevTools connection closed: {e}")
+        finally:
+            # Wake up all waiting commands
+            with self.pending_lock:
+                waiters, self.pending = list(self.pending.values()), {}
+            for waiter in waiters:
+                waiter.put({"error": {"message": "DevTools connection closed"}})
+    
+    def send(self, method: str, params: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None, timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Send a DevTools command and wait for its result.
+        
+        Args:
+            method: DevTools method, e.g. 'Page.printToPDF'
+            params: Optional method parameters
+            session_id: Optional session of the tab the command is for
+            timeout: Seconds to wait for the response
+            
+        Returns:
+            Result of the command
+            
+        Raises:
+            TimeoutError: If no response arrives in time
+            RuntimeError: If the command fails
+        """
+        message_id = next(self.message_ids)
+        message: Dict[str, Any] = {"id": message_id, "method": method, "params": params or {}}
+        if session_id is not None:
+            message["sessionId"] = session_id
+        
+        waiter: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=1)
+        with self.pending_lock:
+            self.pending[message_id] = waiter
+        try:
+            self.connection.send(json.dumps(message))
+            response = waiter.get(timeout=max(timeout, 0.0))
+        except queue.Empty:
+            raise TimeoutError(f"DevTools command {method} timed out after {timeout:.1f}s") from None
+        finally:
+            with self.pending_lock:
+                self.pending.pop(message_id, None)
+        
+        if "error" in response:
+            raise RuntimeError(f"DevTools command {method} failed: {response['error'].get('message')}")
+        return response.get("result", {})
+    
+    def print_to_pdf(self, html_content: str, timeout: float) -> bytes:
+        """
+        Print an HTML page to PDF in a new tab.
+        
+        Args:
+            html_content: HTML page
+            timeout: Seconds the whole job may take
+            
+        Returns:
+            PDF data
+        """
+        deadline = time.monotonic() + timeout
+        remaining = lambda: deadline - time.monotonic()
+        
+        target_id = self.send("Target.createTarget", {"url": "about:blank"}, timeout=remaining())["targetId"]
+        try:
+            session_id = self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True}, timeout=remaining())["sessionId"]
+            frame_id = self.send("Page.getFrameTree", session_id=session_id, timeout=remaining())["frameTree"]["frame"]["id"]
+            self.send("Page.setDocumentContent", {"frameId": frame_id, "html": html_content}, session_id, remaining())
+            result = self.send("Page.printToPDF", PRINT_OPTIONS, session_id, remaining())
+            return base64.b64decode(result["data"])
+        finally:
+            try:
+                self.send("Target.closeTarget", {"targetId": target_id}, timeout=5.0)
+            except Exception as e:
+                logger.debug(f"Could not close Chromium tab {target_id}: {e}")
+    
+    def close(self) -> None:
+        """
+        Close the browser and remove its profile directory.
+        """
+        if self.connection is not None:
+            try:
+                self.send("Browser.close", timeout=2.0)
+            except Exception:
+                pass
+            self.connection_stack.close()
+            self.connection = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process.stderr.close()
+            logger.debug(f"Stopped headless Chromium {self.process.pid}")
+            self.process = None
+        if self.profile_dir is not None:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+
+class ChromiumPool:
+    """
+    Pool of long-lived headless Chromium browsers printing PDFs.
+    
+    Browsers are started on first use and restarted when they die or stop
+    responding; at most max_tabs documents are rendered at the same time.
+    """
+    
+    def __init__(self, binary: str, browsers: int = 1, max_tabs: int = 4, timeout: float = 30.0):
+        """
+        Initialize the pool without starting any browser.
+        
+        Args:
+            binary: Path of the Chromium executable
+            browsers: Number of browser processes
+            max_tabs: Maximum number of concurrently open tabs over all browsers
+            timeout: Seconds a document may take
+        """
+        self.binary = binary
+        self.timeout = timeout
+        self.browsers: List[ChromiumBrowser] = [ChromiumBrowser(binary) for _ in range(max(1, browsers))]
+        self.browser_locks = [threading.Lock() for _ in self.browsers]
+        self.tabs = threading.BoundedSemaphore(max(1, max_tabs))
+        self.next_browser = itertools.count()
+    
+    def _get_browser(self) -> int:
+        """
+        Pick the next browser round-robin, (re)starting it if needed.
+        
+        Returns:
+            Index of the running browser
+        """
+        index = next(self.next_browser) % len(self.browsers)
+        with self.browser_locks[index]:
+            browser = self.browsers[index]
+            if not browser.alive:
+                browser.close()
+                browser.start()
+        return index
+    
+    def render(self, html_content: str, output_path: Union[str, Path]) -> Path:
+        """
+        Print an HTML page to a PDF file.
+        
+        Args:
+            html_content: HTML page, including its CSS
+            output_path: Path to save the PDF
+            
+        Returns:
+            Path to the saved PDF file
+            
+        Raises:
+            TimeoutError: If no tab becomes free or the document takes longer than the timeout
+            RuntimeError: If the browser cannot start or printing fails
+        """
+        if not self.tabs.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No Chromium tab became free within {self.timeout:.0f}s")
+        try:
+            index = self._get_browser()
+            try:
+                pdf = self.browsers[index].print_to_pdf(html_content, self.timeout)
+            except TimeoutError:
+                # A hung page may leave the browser unusable; start a fresh one next time
+                logger.warning(f"Chromium timed out after {self.timeout:.0f}s; restarting it")
+                with self.browser_locks[index]:
+                    self.browsers[index].close()
+                raise
+        finally:
+            self.tabs.release()
+        
+        output_path = Path(output_path)
+        output_path.write_bytes(pdf)
+        return output_path
+    
+    def close(self) -> None:
+        """
+        Close all browsers.
+        """
+        for lock, browser in zip(self.browser_locks, self.browsers):
+            with lock:
+                browser.close()
+
+
+_pool: Optional[ChromiumPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_chromium_pool(settings) -> Optional[ChromiumPool]:
+    """
+    Get the process-wide Chromium pool.
+    
+    Args:
+        settings: Application settings
+        
+    Returns:
+        ChromiumPool, or None if it is disabled, websockets is not installed or
+        no Chromium executable is found
+    """
+    global _pool
+    if not settings.chromium_pool_enabled or not websockets_available:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            binary = find_chromium(settings.chromium_binary)
+            if binary is None:
+                return None
+            _pool = ChromiumPool(binary, settings.chromium_browsers, settings.chromium_max_tabs, settings.pdf_render_timeout)
+            atexit.register(_pool.close)
+        return _pool
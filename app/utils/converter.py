@@ -5,23 +5,131 @@ This module provides functions for converting between different file formats.
 """
 import importlib.util
 import subprocess
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Optional, Tuple, Union
 
 import markdown
 
+from app.utils.chromium import ChromiumPool
 from app.utils.logger import get_logger
+from app.utils.pdf_worker import PDFWorkerPool, get_local_renderer, weasyprint_available
 
 logger = get_logger(__name__)
 
 # Check if optional libraries are available
 pdfkit_available = importlib.util.find_spec("pdfkit") is not None
-weasyprint_available = importlib.util.find_spec("weasyprint") is not None
+markdown_it_available = importlib.util.find_spec("markdown_it") is not None
 
 if pdfkit_available:
     import pdfkit
-if weasyprint_available:
-    import weasyprint
+if markdown_it_available:
+    from markdown_it import MarkdownIt
+
+# Markdown backends: Python-Markdown (the default) or markdown-it-py, a faster
+# CommonMark parser (with GFM tables) that renders the templates identically
+MARKDOWN_BACKEND = "markdown"
+MARKDOWN_IT_BACKEND = "markdown-it"
+MARKDOWN_BACKENDS = (MARKDOWN_BACKEND, MARKDOWN_IT_BACKEND)
+
+# Seconds a headless Chrome/Chromium process started for one document may run
+CHROMIUM_TIMEOUT = 120
+
+# Python-Markdown extensions used for all documents
+MARKDOWN_EXTENSIONS: Tuple[str, ...] = ('tables', 'fenced_code')
+
+# Converter instances are not thread-safe, so each thread keeps its own
+_converters = threading.local()
+
+
+def get_markdown_converter(extensions: Tuple[str, ...] = MARKDOWN_EXTENSIONS) -> markdown.Markdown:
+    """
+    Get this thread's Python-Markdown converter for a set of extensions.
+    
+    Building a Markdown instance loads and registers every extension, so the
+    instance is created once per thread and reset() after each document.
+    
+    Args:
+        extensions: Python-Markdown extension names
+        
+    Returns:
+        Markdown instance
+    """
+    cache = getattr(_converters, "markdown", None)
+    if cache is None:
+        cache = _converters.markdown = {}
+    key = tuple(extensions)
+    if key not in cache:
+        cache[key] = markdown.Markdown(extensions=list(key))
+    return cache[key]
+
+
+def get_markdown_it_converter() -> "MarkdownIt":
+    """
+    Get this thread's markdown-it-py converter (CommonMark with tables).
+    
+    Returns:
+        MarkdownIt instance
+    """
+    converter = getattr(_converters, "markdown_it", None)
+    if converter is None:
+        converter = _converters.markdown_it = MarkdownIt("commonmark").enable("table")
+    return converter
+
+
+def convert_markdown(markdown_content: str, backend: Optional[str] = None) -> str:
+    """
+    Convert Markdown to an HTML fragment with a cached converter.
+    
+    Args:
+        markdown_content: Markdown content to convert
+        backend: MARKDOWN_BACKEND or MARKDOWN_IT_BACKEND (defaults to MARKDOWN_BACKEND);
+            markdown-it falls back to Python-Markdown when it is not installed
+            
+    Returns:
+        HTML fragment
+        
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or MARKDOWN_BACKEND
+    if backend not in MARKDOWN_BACKENDS:
+        raise ValueError(f"Unknown markdown backend: {backend} (expected one of {', '.join(MARKDOWN_BACKENDS)})")
+    
+    if backend == MARKDOWN_IT_BACKEND:
+        if markdown_it_available:
+            return get_markdown_it_converter().render(markdown_content)
+        logger.warning("markdown-it-py is not installed; using Python-Markdown")
+    
+    converter = get_markdown_converter()
+    try:
+        return converter.convert(markdown_content)
+    finally:
+        # Clear per-document state (footnotes, reference links) for the next document
+        converter.reset()
+
+
+@dataclass
+class RenderedDocument:
+    """
+    Artifacts of a document rendered from Markdown.
+    """
+    html: str  # Complete HTML page, including the CSS
+    markdown_path: Path
+    html_path: Path
+    pdf_path: Path
+    
+    @property
+    def paths(self) -> Dict[str, Path]:
+        """
+        Output file paths keyed by format, as returned by the pipelines.
+        """
+        return {
+            "markdown": self.markdown_path,
+            "pdf": self.pdf_path,
+            "html": self.html_path
+        }
 
 
 class FileConverter:
@@ -32,20 +140,33 @@ class FileConverter:
     """
     
     @staticmethod
-    def markdown_to_html(markdown_content: str, css: Optional[str] = None) -> str:
+    def markdown_to_html(markdown_content: str, css: Optional[str] = None, backend: Optional[str] = None) -> str:
         """
         Convert Markdown content to HTML.
         
         Args:
             markdown_content: Markdown content to convert
             css: Optional CSS styling to include
+            backend: Optional markdown backend (see convert_markdown())
             
         Returns:
             HTML content
         """
         # Convert markdown to HTML
-        html_content = markdown.markdown(markdown_content, extensions=['tables', 'fenced_code'])
+        return FileConverter.html_page(convert_markdown(markdown_content, backend), css)
+    
+    @staticmethod
+    def html_page(html_content: str, css: Optional[str] = None) -> str:
+        """
+        Wrap an HTML fragment in a complete HTML page.
         
+        Args:
+            html_content: HTML fragment (the page body)
+            css: Optional CSS styling to include
+            
+        Returns:
+            HTML page
+        """
         # Add CSS if provided
         if css:
             html = f"""
@@ -77,6 +198,22 @@ class FileConverter:
         
         return html
     
+    @staticmethod
+    def add_stylesheet(html_page: str, css: Optional[str] = None) -> str:
+        """
+        Inline CSS into the head of an HTML page built by html_page().
+        
+        Args:
+            html_page: HTML page
+            css: Optional CSS styling to include
+            
+        Returns:
+            HTML page with the CSS
+        """
+        if not css:
+            return html_page
+        return html_page.replace("</head>", f"<style>\n{css}\n</style>\n</head>", 1)
+    
     @staticmethod
     def markdown_to_pdf(
         markdown_content: str, 
@@ -100,20 +237,128 @@ class FileConverter:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Convert markdown to HTML
-        html_content = FileConverter.markdown_to_html(markdown_content, css)
+        body = convert_markdown(markdown_content)
         
         # Create an HTML file as an intermediate step
         html_path = output_path.with_suffix('.html')
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(FileConverter.html_page(body, css))
+        
+        return FileConverter.html_to_pdf(FileConverter.html_page(body), output_path, html_path, markdown_content, css)
+    
+    @staticmethod
+    def output_paths(output_dir: Union[str, Path], base_name: str) -> Dict[str, Path]:
+        """
+        Get the paths render() saves a document to.
+        
+        Args:
+            output_dir: Directory the files are saved in
+            base_name: Base name of the files
+            
+        Returns:
+            Dictionary of output file paths keyed by format
+        """
+        output_dir = Path(output_dir)
+        return {
+            "markdown": output_dir / f"{base_name}.md",
+            "pdf": output_dir / f"{base_name}.pdf",
+            "html": output_dir / f"{base_name}.html"
+        }
+    
+    @staticmethod
+    def render(
+        markdown_content: str, 
+        output_dir: Union[str, Path], 
+        base_name: str, 
+        css: Optional[str] = None, 
+        backend: Optional[str] = None, 
+        worker: Optional[PDFWorkerPool] = None, 
+        chromium: Optional[ChromiumPool] = None
+    ) -> RenderedDocument:
+        """
+        Save Markdown content as Markdown, HTML and PDF files.
+        
+        The Markdown is converted to HTML once; the same HTML is written to the
+        .html file and handed to the PDF converter together with the CSS, which
+        each PDF method inlines into the page like the .html file.
+        
+        Args:
+            markdown_content: Markdown content to render
+            output_dir: Directory to save the files in
+            base_name: Base name of the files
+            css: Optional CSS styling to include
+            backend: Optional markdown backend (see convert_markdown())
+            worker: Optional pool of WeasyPrint worker processes to render the PDF in
+            chromium: Optional headless Chromium pool to render the PDF with
+            
+        Returns:
+            RenderedDocument with the HTML and the paths of the saved files
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = FileConverter.output_paths(output_dir, base_name)
+        
+        markdown_path = paths["markdown"]
+        with open(markdown_path, 'w', encoding='utf-8') as f:
+            f.write(markdown_content)
+        
+        body = convert_markdown(markdown_content, backend)
+        html_content = FileConverter.html_page(body, css)
+        html_path = paths["html"]
         with open(html_path, 'w', encoding='utf-8') as f:
             f.write(html_content)
         
+        pdf_path = FileConverter.html_to_pdf(
+            FileConverter.html_page(body), 
+            paths["pdf"], 
+            html_path, 
+            markdown_content, 
+            css, 
+            worker, 
+            chromium
+        )
+        
+        return RenderedDocument(html=html_content, markdown_path=markdown_path, html_path=html_path, pdf_path=pdf_path)
+    
+    @staticmethod
+    def html_to_pdf(
+        html_content: str, 
+        output_path: Union[str, Path], 
+        html_path: Optional[Path] = None, 
+        markdown_content: Optional[str] = None, 
+        css: Optional[str] = None, 
+        worker: Optional[PDFWorkerPool] = None, 
+        chromium: Optional[ChromiumPool] = None
+    ) -> Path:
+        """
+        Convert an HTML page to PDF and save it.
+        
+        Args:
+            html_content: HTML page to convert, without the CSS
+            output_path: Path to save the PDF
+            html_path: Optional file the styled HTML page was saved to (needed by Chrome/Chromium)
+            markdown_content: Optional Markdown source (needed by pandoc)
+            css: Optional CSS styling applied to the page
+            worker: Optional pool of WeasyPrint worker processes (WeasyPrint runs in-process without one)
+            chromium: Optional headless Chromium pool (without one, a browser is started per document)
+            
+        Returns:
+            Path to the saved PDF file
+            
+        Raises:
+            RuntimeError: If no conversion method succeeds
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
         # Try different PDF conversion methods in order of preference
         pdf_generated = False
         
-        # Method 1: Try WeasyPrint
+        # Method 1: Try WeasyPrint, reusing its font configuration between documents
         if weasyprint_available:
             try:
-                weasyprint.HTML(string=html_content).write_pdf(output_path)
+                renderer = worker if worker is not None else get_local_renderer()
+                renderer.render(html_content, output_path, css)
                 pdf_generated = True
                 logger.info(f"PDF generated using WeasyPrint: {output_path}")
             except Exception as e:
@@ -122,21 +367,31 @@ class FileConverter:
         # Method 2: Try pdfkit (wkhtmltopdf)
         if not pdf_generated and pdfkit_available:
             try:
-                pdfkit.from_string(html_content, str(output_path))
+                pdfkit.from_string(FileConverter.add_stylesheet(html_content, css), str(output_path))
                 pdf_generated = True
                 logger.info(f"PDF generated using pdfkit: {output_path}")
             except Exception as e:
                 logger.warning(f"pdfkit conversion failed: {e}")
         
-        # Method 3: Try using headless Chrome/Chromium
-        if not pdf_generated:
+        # Method 3: Try the pooled headless Chromium (one long-lived browser, a tab per document)
+        if not pdf_generated and chromium is not None:
+            try:
+                chromium.render(FileConverter.add_stylesheet(html_content, css), output_path)
+                pdf_generated = True
+                logger.info(f"PDF generated using pooled headless Chromium: {output_path}")
+            except Exception as e:
+                logger.warning(f"Pooled Chromium conversion failed: {e}")
+        
+        # Method 4: Try starting headless Chrome/Chromium for this document
+        if not pdf_generated and html_path is not None:
             try:
                 # Try with chromium first
                 result = subprocess.run(
                     ["chromium", "--headless", "--disable-gpu", f"--print-to-pdf={output_path}", str(html_path)],
                     capture_output=True,
                     text=True,
-                    check=False
+                    check=False,
+                    timeout=CHROMIUM_TIMEOUT
                 )
                 
                 if result.returncode == 0:
@@ -148,7 +403,8 @@ class FileConverter:
                         ["google-chrome", "--headless", "--disable-gpu", f"--print-to-pdf={output_path}", str(html_path)],
                         capture_output=True,
                         text=True,
-                        check=False
+                        check=False,
+                        timeout=CHROMIUM_TIMEOUT
                     )
                     
                     if result.returncode == 0:
@@ -158,16 +414,19 @@ class FileConverter:
                         logger.warning("Chrome/Chromium conversion failed")
             except FileNotFoundError:
                 logger.warning("Chrome/Chromium not found on the system")
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Chrome/Chromium conversion timed out after {CHROMIUM_TIMEOUT}s")
             except Exception as e:
                 logger.warning(f"Error using Chrome/Chromium: {e}")
         
-        # Method 4: Try pandoc if available
-        if not pdf_generated:
+        # Method 5: Try pandoc if available
+        if not pdf_generated and markdown_content is not None:
             try:
-                # Save markdown to a temporary file
+                # Save markdown to a temporary file (unless it is already saved there)
                 md_path = output_path.with_suffix('.md')
-                with open(md_path, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
+                if not md_path.exists() or md_path.read_text(encoding='utf-8') != markdown_content:
+                    with open(md_path, 'w', encoding='utf-8') as f:
+                        f.write(markdown_content)
                 
                 result = subprocess.run(
                     ["pandoc", str(md_path), "-o", str(output_path)],
@@ -0,0 +1,279 @@
+"""
+CV index utility module for the CV Assistant application.
+
+This module parses a Markdown CV into an index of sections, bullets and
+paragraphs, and ranks the entries against a job description with BM25 so a
+prompt can include only the parts of the CV that matter for the job. Indexes
+are cached by the CV's content hash.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Words ignored when scoring
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "was", "we", "were", "will",
+    "with", "you", "your", "i", "my", "me", "who", "which", "about", "into", "over", "using", "used",
+}
+
+# List item at the start of a line
+BULLET = re.compile(r"^\s{0,3}(?:[-*+•]|\d+[.)])\s+")
+
+# Number of indexes kept in memory
+MAX_CACHED_INDEXES = 32
+
+_index_cache: "OrderedDict[str, CVIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def _is_bullet(text: str) -> bool:
+    """
+    Check whether a text block is a list item.
+    
+    Args:
+        text: Text block
+        
+    Returns:
+        True if the block starts with a bullet or number
+    """
+    return bool(BULLET.match(text))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for scoring.
+    
+    Terms keep characters common in technology names (C++, C#, Node.js).
+    
+    Args:
+        text: Text to split
+        
+    Returns:
+        List of terms without stopwords
+    """
+    terms = (term.rstrip(".-") for term in re.findall(r"[a-z0-9][a-z0-9+#.\-]*", text.lower()))
+    return [term for term in terms if term and term not in STOPWORDS]
+
+
+@dataclass
+class CVEntry:
+    """
+    A bullet or paragraph of the CV with the headings it belongs to.
+    """
+    text: str
+    headings: List[str]
+    position: int
+
+
+@dataclass
+class CVIndex:
+    """
+    Index of a CV's entries with their BM25 term statistics.
+    """
+    content_hash: str
+    header: str  # Name and contact details before the first section
+    entries: List[CVEntry]
+    vocabulary: Dict[str, int] = field(default_factory=dict)
+    term_weights: Optional[np.ndarray] = None  # BM25 weight of each term in each entry
+    idf: Optional[np.ndarray] = None
+    
+    def score(self, query: str) -> np.ndarray:
+        """
+        Score every entry against a query with BM25.
+        
+        Args:
+            query: Query text (e.g. a job description)
+            
+        Returns:
+            Array with one score per entry
+        """
+        query_counts = np.zeros(len(self.vocabulary))
+        for term in tokenize(query):
+            column = self.vocabulary.get(term)
+            if column is not None:
+                query_counts[column] += 1
+        
+        # Repeated query terms count, but with diminishing weight
+        query_weights = np.log1p(query_counts) * self.idf
+        return self.term_weights @ query_weights
+
+
+def parse_cv(cv_content: str) -> CVIndex:
+    """
+    Parse a Markdown CV into an index of its entries.
+    
+    Every bullet (with its continuation lines) and every paragraph outside a
+    list becomes an entry. Entries remember the headings they appear under,
+    so a selection can be rendered with its context.
+    
+    Args:
+        cv_content: CV in Markdown
+        
+    Returns:
+        CV index
+    """
+    content_hash = hashlib.sha256(cv_content.encode("utf-8")).hexdigest()
+    header_lines: List[str] = []
+    entries: List[CVEntry] = []
+    headings: List[str] = []
+    heading_levels: List[int] = []
+    current: List[str] = []
+    in_sections = False
+    
+    def flush() -> None:
+        if current:
+            entries.append(CVEntry("\n".join(current).strip(), list(headings), len(entries)))
+            current.clear()
+    
+    for line in cv_content.replace("\r\n", "\n").split("\n"):
+        heading = re.match(r"^(#{2,6})\s+(.*)$", line)
+        if heading:
+            flush()
+            in_sections = True
+            level = len(heading.group(1))
+            while heading_levels and heading_levels[-1] >= level:
+                heading_levels.pop()
+                headings.pop()
+            heading_levels.append(level)
+            headings.append(line.strip())
+            continue
+        
+        if not in_sections:
+            header_lines.append(line)
+            continue
+        
+        if not line.strip():
+            flush()
+        elif BULLET.match(line):
+            flush()
+            current.append(line.rstrip())
+        else:
+            current.append(line.rstrip())
+    flush()
+    
+    index = CVIndex(content_hash, "\n".join(header_lines).strip(), entries)
+    _build_term_weights(index)
+    return index
+
+
+def _build_term_weights(index: CVIndex) -> None:
+    """
+    Compute the BM25 term weights of an index's entries.
+    
+    Headings are included in each entry's terms, so a bullet under a
+    matching role or section title ranks higher.
+    
+    Args:
+        index: CV index to fill in
+    """
+    documents = [tokenize(" ".join(entry.headings[-1:] + [entry.text])) for entry in index.entries]
+    for terms in documents:
+        for term in terms:
+            index.vocabulary.setdefault(term, len(index.vocabulary))
+    
+    term_counts = np.zeros((len(documents), len(index.vocabulary)))
+    for row, terms in enumerate(documents):
+        for term in terms:
+            term_counts[row, index.vocabulary[term]] += 1
+    
+    document_count = max(1, len(documents))
+    document_frequency = (term_counts > 0).sum(axis=0)
+    index.idf = np.log(1.0 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+    
+    lengths = term_counts.sum(axis=1, keepdims=True)
+    average_length = lengths.mean() if len(documents) else 1.0
+    normalization = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / max(average_length, 1.0))
+    index.term_weights = term_counts * (BM25_K1 + 1.0) / (term_counts + normalization)
+
+
+def get_cv_index(cv_content: str) -> CVIndex:
+    """
+    Get the index of a CV, parsing it only once per content hash.
+    
+    Args:
+        cv_content: CV in Markdown
+        
+    Returns:
+        CV index
+    """
+    content_hash = hashlib.sha256(cv_content.encode("utf-8")).hexdigest()
+    with _index_lock:
+        index = _index_cache.get(content_hash)
+        if index is not None:
+            _index_cache.move_to_end(content_hash)
+            return index
+    
+    index = parse_cv(cv_content)
+    with _index_lock:
+        _index_cache[content_hash] = index
+        while len(_index_cache) > MAX_CACHED_INDEXES:
+            _index_cache.popitem(last=False)
+    logger.debug(f"Indexed CV {content_hash[:12]}: {len(index.entries)} entries, {len(index.vocabulary)} terms")
+    return index
+
+
+def select_relevant(cv_content: str, jd_content: str, top_k: int) -> str:
+    """
+    Select the CV entries most relevant to a job description.
+    
+    The header (name and contact details) is always kept. The top-K entries
+    are rendered in their original order under their headings. CVs with no
+    more than K entries are returned unchanged.
+    
+    Args:
+        cv_content: CV in Markdown
+        jd_content: Job description
+        top_k: Number of entries to keep
+        
+    Returns:
+        CV excerpt in Markdown
+    """
+    index = get_cv_index(cv_content)
+    if len(index.entries) <= top_k:
+        return cv_content
+    
+    scores = index.score(jd_content)
+    # Stable sort keeps earlier (usually more recent) entries first among equal scores
+    selected = sorted(np.argsort(-scores, kind="stable")[:top_k])
+    
+    parts = [index.header] if index.header else []
+    rendered_headings: List[str] = []
+    for position in selected:
+        entry = index.entries[position]
+        # Print the headings that differ from those already printed
+        common = 0
+        while (
+            common < min(len(entry.headings), len(rendered_headings))
+            and entry.headings[common] == rendered_headings[common]
+        ):
+            common += 1
+        new_headings = entry.headings[common:]
+        parts.extend(new_headings)
+        rendered_headings = entry.headings
+        
+        # Keep consecutive bullets of the same section in one list
+        if not new_headings and parts and _is_bullet(parts[-1]) and _is_bullet(entry.text):
+            parts[-1] += "\n" + entry.text
+        else:
+            parts.append(entry.text)
+    
+    excerpt = "\n\n".join(parts)
+    logger.info(
+        f"Selected {len(selected)} of {len(index.entries)} CV entries for the job "
+        f"({len(cv_content)} -> {len(excerpt)} chars)"
+    )
+    return excerpt
@@ -100,6 +100,33 @@ def find_latest_file(directory: Union[str, Path], extension: Optional[str] = Non
     return files[0]
 
 
+def list_files(directory: Union[str, Path], extensions: Optional[List[str]] = None) -> List[Path]:
+    """
+    List the files in a directory, sorted by name.
+    
+    Args:
+        directory: Directory to search
+        extensions: Optional list of file extension filters (e.g., ['.txt', '.md'])
+        
+    Returns:
+        List of file paths, empty if the directory does not exist
+    """
+    directory = Path(directory)
+    
+    if not directory.exists() or not directory.is_dir():
+        logger.warning(f"Directory not found: {directory}")
+        return []
+    
+    files = [f for f in directory.iterdir() if f.is_file()]
+    
+    # Filter by extensions if provided
+    if extensions:
+        allowed = {extension.lower() for extension in extensions}
+        files = [f for f in files if f.suffix.lower() in allowed]
+    
+    return sorted(files, key=lambda x: x.name)
+
+
 def find_file(filename: str, search_dirs: List[Path]) -> Optional[Path]:
     """
     Find a file in a list of directories.
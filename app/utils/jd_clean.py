@@ -0,0 +1,296 @@
+"""
+Job description cleaning utility module for the CV Assistant application.
+
+This module removes boilerplate from job descriptions before they are sent
+to the LLM: benefits and legal sections, equal-opportunity and privacy
+statements, and paragraphs (such as company blurbs) that repeat across
+several job descriptions of the corpus. Whitespace is normalized too. If
+cleaning would remove most of a job description, the original is kept.
+"""
+import hashlib
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.file_io import list_files, read_file
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Job description file extensions that make up the corpus (and are picked up in batch mode)
+JOB_DESCRIPTION_EXTENSIONS = [".txt", ".md"]
+
+# Section headings whose whole section is boilerplate; the whole heading must match, so
+# content sections such as "Privacy Engineering Responsibilities" are kept
+BOILERPLATE_HEADINGS = re.compile(
+    r"^(?:our\s+|the\s+)?(?:benefits|perks|perks\s*(?:&|and)\s*benefits|benefits\s*(?:&|and)\s*perks|what\s+we\s+offer|"
+    r"compensation\s*(?:&|and)\s*benefits|equal\s+(?:employment\s+)?opportunit(?:y|ies)(?:\s+employer)?|eeo(?:\s+statement)?|"
+    r"diversity(?:,)?\s*(?:equity\s*)?(?:&|and)\s*inclusion|legal(?:\s+notice)?|privacy(?:\s+notice|\s+policy)?|disclaimer|"
+    r"accommodations?|notice\s+to\s+(?:recruiters|agencies))[.!]?$",
+    re.IGNORECASE,
+)
+
+# Phrases marking a single sentence or line as boilerplate
+BOILERPLATE_PHRASES = [
+    re.compile(pattern, re.IGNORECASE) for pattern in [
+        r"equal\s+(?:employment\s+)?opportunity\s+employer",
+        r"without\s+regard\s+to\s+(?:race|age|sex|gender|religion)",
+        r"protected\s+veteran",
+        r"reasonable\s+accommodations?",
+        r"e-verify",
+        r"privacy\s+(?:notice|policy)",
+        r"(?:recruitment|staffing)\s+agencies",
+        r"unsolicited\s+(?:resumes|cvs|applications)",
+        r"by\s+(?:applying|submitting\s+your\s+application)\s*,?\s+you\s+(?:agree|consent|acknowledge)",
+        r"(?:criminal\s+)?background\s+check\s+(?:will\s+be|is)\s+required",
+    ]
+]
+
+# Cleaned job descriptions keeping less than this fraction of the text fall back to the original
+MIN_KEPT_FRACTION = 0.3
+
+# Sentence boundaries inside a line
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-Z\"'(])")
+
+# Paragraphs shorter than this are never removed as corpus duplicates (headings, short bullets)
+MIN_DEDUPE_LENGTH = 80
+
+# Corpus paragraph counts, keyed by directory and refreshed when its files change
+_corpus_cache: Dict[Path, Tuple[Tuple, Counter]] = {}
+_corpus_lock = threading.Lock()
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Normalize whitespace in a job description.
+    
+    Non-breaking and zero-width spaces are replaced, runs of spaces inside
+    lines are collapsed, trailing spaces are removed and blank lines are
+    limited to one between paragraphs.
+    
+    Args:
+        text: Job description text
+        
+    Returns:
+        Normalized text
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\u00a0", " ").replace("\u200b", "").replace("\ufeff", "").replace("\t", "    ")
+    lines = []
+    for line in text.split("\n"):
+        indent = len(line) - len(line.lstrip(" "))
+        lines.append(line[:indent] + re.sub(r" {2,}", " ", line.strip()))
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def _heading_text(line: str) -> Optional[str]:
+    """
+    Get the text of a heading line.
+    
+    Markdown headings, bold lines and short lines ending with a colon count
+    as headings.
+    
+    Args:
+        line: Line of the job description
+        
+    Returns:
+        Heading text, or None if the line is not a heading
+    """
+    stripped = line.strip()
+    if re.match(r"^#{1,6}\s+\S", stripped):
+        return stripped.lstrip("#").strip().strip("*:").strip()
+    if re.match(r"^\*\*[^*]+\*\*:?$", stripped):
+        return stripped.strip("*:").strip()
+    if stripped.endswith(":") and len(stripped) < 60 and not re.match(r"^[-*•\d]", stripped):
+        return stripped.rstrip(":").strip()
+    return None
+
+
+def remove_boilerplate_sections(text: str) -> str:
+    """
+    Remove sections whose heading marks them as boilerplate.
+    
+    A section runs from its heading to the next heading.
+    
+    Args:
+        text: Job description text
+        
+    Returns:
+        Text without boilerplate sections
+    """
+    kept = []
+    skipping = False
+    for line in text.split("\n"):
+        heading = _heading_text(line)
+        if heading is not None:
+            skipping = bool(BOILERPLATE_HEADINGS.match(heading))
+        if not skipping:
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def remove_boilerplate_sentences(paragraph: str) -> str:
+    """
+    Remove the sentences of a paragraph that contain boilerplate phrases.
+    
+    Only the matching sentences are removed, so a job description written
+    without blank lines keeps its other content. Lines left empty are dropped.
+    
+    Args:
+        paragraph: Paragraph text
+        
+    Returns:
+        Paragraph without boilerplate sentences, possibly empty
+    """
+    kept = []
+    for line in paragraph.split("\n"):
+        if not any(pattern.search(line) for pattern in BOILERPLATE_PHRASES):
+            kept.append(line)
+            continue
+        indent = line[:len(line) - len(line.lstrip(" "))]
+        sentences = [
+            sentence for sentence in SENTENCE_BOUNDARY.split(line.strip())
+            if not any(pattern.search(sentence) for pattern in BOILERPLATE_PHRASES)
+        ]
+        if sentences:
+            kept.append(indent + " ".join(sentences))
+    return "\n".join(kept)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Split text into paragraphs separated by blank lines.
+    
+    Args:
+        text: Text to split
+        
+    Returns:
+        List of non-empty paragraphs
+    """
+    return [paragraph.strip("\n") for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+
+
+def paragraph_key(paragraph: str) -> str:
+    """
+    Get a key identifying a paragraph regardless of case and whitespace.
+    
+    Args:
+        paragraph: Paragraph text
+        
+    Returns:
+        Hex digest of the normalized paragraph
+    """
+    normalized = re.sub(r"\s+", " ", paragraph).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def count_corpus_paragraphs(texts: List[str]) -> Counter:
+    """
+    Count in how many job descriptions each paragraph occurs.
+    
+    Args:
+        texts: Job description texts
+        
+    Returns:
+        Counter of paragraph keys to the number of documents containing them
+    """
+    counts = Counter()
+    for text in texts:
+        counts.update({paragraph_key(paragraph) for paragraph in split_paragraphs(normalize_whitespace(text))})
+    return counts
+
+
+def get_corpus_counts(directory: Path, extensions: List[str]) -> Counter:
+    """
+    Get the paragraph counts of all job descriptions in a directory.
+    
+    The counts are cached per directory and recomputed when files are added,
+    removed or modified.
+    
+    Args:
+        directory: Job descriptions directory
+        extensions: File extensions of job descriptions
+        
+    Returns:
+        Counter of paragraph keys to the number of documents containing them
+    """
+    paths = list_files(directory, extensions) if Path(directory).exists() else []
+    signature = tuple((path.name, path.stat().st_mtime_ns, path.stat().st_size) for path in paths)
+    with _corpus_lock:
+        cached = _corpus_cache.get(Path(directory))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    
+    counts = count_corpus_paragraphs([read_file(path) for path in paths])
+    with _corpus_lock:
+        _corpus_cache[Path(directory)] = (signature, counts)
+    return counts
+
+
+def clean_job_description(text: str, corpus_counts: Optional[Counter] = None, min_documents: int = 3) -> str:
+    """
+    Remove boilerplate from a job description.
+    
+    If less than MIN_KEPT_FRACTION of the text would remain, the cleaning is
+    assumed to be wrong and the (whitespace-normalized) original is returned.
+    
+    Args:
+        text: Job description text
+        corpus_counts: Optional paragraph counts of the job description corpus
+        min_documents: Number of job descriptions a paragraph must occur in to be
+            removed as a repeated blurb
+            
+    Returns:
+        Cleaned job description
+    """
+    normalized = normalize_whitespace(text)
+    
+    kept = []
+    seen = set()
+    for paragraph in split_paragraphs(remove_boilerplate_sections(normalized)):
+        key = paragraph_key(paragraph)
+        
+        # Paragraphs repeated within the job description
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        # Blurbs shared by many job descriptions of the corpus
+        if (
+            corpus_counts is not None
+            and len(paragraph) >= MIN_DEDUPE_LENGTH
+            and corpus_counts.get(key, 0) >= min_documents
+        ):
+            continue
+        
+        # Equal-opportunity, privacy and other legal statements
+        paragraph = remove_boilerplate_sentences(paragraph)
+        if paragraph.strip():
+            kept.append(paragraph)
+    
+    cleaned = "\n\n".join(kept) + "\n"
+    if len(cleaned.strip()) < MIN_KEPT_FRACTION * len(normalized.strip()):
+        logger.warning(
+            f"Cleaning removed {1 - len(cleaned.strip()) / max(len(normalized.strip()), 1):.0%} of the "
+            f"job description; using the original text"
+        )
+        return normalized
+    return cleaned
+
+
+def cleaned_path_for(jd_path: Path) -> Path:
+    """
+    Get the path of the cleaned copy of a job description.
+    
+    Cleaned copies are kept in a 'cleaned' directory next to the original, so
+    they are not picked up as job descriptions themselves.
+    
+    Args:
+        jd_path: Path to the original job description
+        
+    Returns:
+        Path to the cleaned copy
+    """
+    return jd_path.parent / "cleaned" / jd_path.name
@@ -0,0 +1,306 @@
+"""
+Name extraction utility module for the CV Assistant application.
+
+This module provides a local, heuristic extractor for the candidate name
+(from the CV) and the company name (from the job description). Each value
+comes with a confidence score so callers can decide whether to fall back
+to the LLM. A single piece of evidence scores below the default fast-path
+threshold; only corroborated values (e.g. a heading name that matches the
+email address) are confident enough to skip the LLM.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Headings that are document titles rather than names
+TITLE_WORDS = {"cv", "resume", "résumé", "curriculum", "vitae", "profile", "cover", "letter"}
+
+# Words of job titles; headings containing them are roles, not candidate names
+ROLE_WORDS = {
+    "engineer", "engineering", "developer", "manager", "management", "senior", "junior", "lead", "principal",
+    "staff", "head", "chief", "director", "architect", "scientist", "analyst", "designer", "consultant",
+    "specialist", "intern", "internship", "officer", "administrator", "coordinator", "executive", "associate",
+    "assistant", "programmer", "technician", "researcher", "learning", "software", "data", "machine",
+    "product", "project", "marketing", "sales", "operations", "devops", "frontend", "backend", "fullstack",
+    "full-stack", "sr", "jr", "vp", "cto", "ceo", "job", "position", "role", "vacancy",
+}
+
+# Email domains that do not identify an employer
+GENERIC_EMAIL_DOMAINS = {
+    "gmail", "googlemail", "yahoo", "hotmail", "outlook", "live", "icloud", "me",
+    "aol", "proton", "protonmail", "gmx", "mail", "example", "email", "greenhouse",
+    "lever", "workday", "myworkday", "smartrecruiters", "linkedin", "indeed",
+}
+
+# Words that are never company names on their own, including generic "About ..." headings
+NON_COMPANY_WORDS = {
+    "us", "the", "the company", "the role", "the team", "our team", "our company", "you",
+    "this role", "the position", "this position", "we", "our", "company", "the job",
+    "the opportunity", "this opportunity", "me", "it", "this job", "our client", "the client",
+    "client", "benefits", "perks", "the benefits", "compensation", "the department", "the business",
+    "the project", "the product", "the vacancy", "this vacancy", "yourself",
+    "role", "job", "position", "team", "requirements", "responsibilities", "qualifications",
+    "the process", "the hiring process", "the interview process", "application", "applying",
+}
+
+# First words of generic phrases ("Our Mission", "This Position", "Your Team")
+NON_COMPANY_LEADING_WORDS = {"this", "our", "your", "my", "these"}
+
+# Second-level labels of multi-part public suffixes such as co.uk or com.au
+SECOND_LEVEL_LABELS = {"co", "com", "org", "net", "ac", "gov", "edu", "ltd", "plc", "ne", "or", "gv"}
+
+# Capitalized company-like phrase on a single line: up to five words, allowing &, ., -, and digits
+COMPANY = r"([A-Z0-9][\w&.\-']*(?:[ \t]+(?:&[ \t]+)?[A-Z0-9][\w&.\-']*){0,4})"
+
+# Company patterns in job descriptions with their confidence scores; each stays below the
+# default fast-path threshold (0.8) so a single match is not enough to skip the LLM
+COMPANY_PATTERNS: List[Tuple[re.Pattern, float]] = [
+    (re.compile(r"^\s*(?:company|employer|organi[sz]ation)\s*:\s*\**\s*" + COMPANY, re.IGNORECASE | re.MULTILINE), 0.75),
+    (re.compile(r"^\s*#*\s*About\s+" + COMPANY + r"\s*:?\s*$", re.MULTILINE), 0.75),
+    (re.compile(r"\b" + COMPANY + r"\s+is\s+(?:hiring|looking\s+for|seeking|searching\s+for)\b"), 0.7),
+    (re.compile(r"\bJoin\s+" + COMPANY + r"(?=[\s,.!]|$)"), 0.6),
+    (re.compile(r"^\s*" + COMPANY + r"\s+is\s+an?\s", re.MULTILINE), 0.55),
+]
+
+# Confidence added for each further pattern or email domain naming the same company
+CORROBORATION_BONUS = 0.1
+
+# Confidence added when the candidate name also appears in an email address of the CV
+EMAIL_MATCH_BONUS = 0.15
+
+EMAIL_PATTERN = re.compile(r"[\w.+\-]+@([\w\-]+(?:\.[\w\-]+)+)")
+
+
+@dataclass
+class NameGuess:
+    """
+    Locally extracted candidate and company names with confidence scores.
+    """
+    candidate_name: Optional[str] = None
+    company_name: Optional[str] = None
+    candidate_confidence: float = 0.0
+    company_confidence: float = 0.0
+    
+    @property
+    def confidence(self) -> float:
+        """
+        Overall confidence, i.e. the confidence of the weaker of the two values.
+        """
+        return min(self.candidate_confidence, self.company_confidence)
+
+
+def _looks_like_person_name(text: str) -> bool:
+    """
+    Check whether a string looks like a person's name.
+    
+    Args:
+        text: Candidate string
+        
+    Returns:
+        True if the string has 2-4 capitalized words and no digits, title or role words
+    """
+    words = text.split()
+    if not 2 <= len(words) <= 4 or any(char.isdigit() for char in text):
+        return False
+    if any(word.lower().strip(".,") in TITLE_WORDS | ROLE_WORDS for word in words):
+        return False
+    return all(word[0].isupper() for word in words if word[0].isalpha())
+
+
+def _matches_email(name: str, text: str) -> bool:
+    """
+    Check whether a name appears in the local part of an email address in a text.
+    
+    Args:
+        name: Person name
+        text: Text containing email addresses
+        
+    Returns:
+        True if a name word of three or more letters occurs in an address
+    """
+    words = [_compact(word) for word in name.split()]
+    for local_part in re.findall(r"([\w.+\-]+)@", text):
+        local_part = _compact(local_part)
+        if any(len(word) >= 3 and word in local_part for word in words):
+            return True
+    return False
+
+
+def extract_candidate_name(cv_content: str) -> Tuple[Optional[str], float]:
+    """
+    Extract the candidate name from a markdown CV.
+    
+    Args:
+        cv_content: Content of the CV
+        
+    Returns:
+        Tuple of (candidate_name, confidence); name is None if nothing was found
+    """
+    name, confidence = _find_candidate_name(cv_content)
+    if name is not None and _matches_email(name, cv_content[:2000]):
+        confidence = min(confidence + EMAIL_MATCH_BONUS, 0.95)
+    return name, confidence
+
+
+def _find_candidate_name(cv_content: str) -> Tuple[Optional[str], float]:
+    """
+    Find the most likely candidate name in a markdown CV.
+    
+    Args:
+        cv_content: Content of the CV
+        
+    Returns:
+        Tuple of (candidate_name, uncorroborated confidence)
+    """
+    lines = [line.strip() for line in cv_content.splitlines() if line.strip()]
+    
+    # Level-one markdown heading, usually the first line of the CV
+    for index, line in enumerate(lines[:10]):
+        if re.match(r"^#\s+", line):
+            heading = line.lstrip("#").strip().strip("*_ ")
+            if _looks_like_person_name(heading):
+                return heading, 0.75 if index == 0 else 0.65
+            # Headings such as "Jane Doe - Software Engineer" or "Jane Doe | CV"
+            head = re.split(r"\s+[-–—|]\s+|,\s+", heading, maxsplit=1)[0].strip()
+            if head != heading and _looks_like_person_name(head):
+                return head, 0.7
+            # Title headings such as "Curriculum Vitae" followed by the name
+            if any(word.lower() in TITLE_WORDS for word in heading.split()) and index + 1 < len(lines):
+                next_line = lines[index + 1].strip("*_# ")
+                if _looks_like_person_name(next_line):
+                    return next_line, 0.65
+            break
+    
+    # Explicit "Name:" label
+    match = re.search(r"^\s*\**\s*(?:full\s+)?name\s*:?\**\s*:?\s*(.+)$", cv_content[:2000], re.IGNORECASE | re.MULTILINE)
+    if match:
+        name = match.group(1).strip().strip("*_ ")
+        if _looks_like_person_name(name):
+            return name, 0.75
+    
+    # Plain first line that looks like a name
+    if lines and _looks_like_person_name(lines[0].strip("*_# ")):
+        return lines[0].strip("*_# "), 0.5
+    
+    return None, 0.0
+
+
+def _clean_company(name: str) -> Optional[str]:
+    """
+    Normalize a matched company name and reject obvious non-names.
+    
+    Args:
+        name: Raw match
+        
+    Returns:
+        Cleaned company name, or None if it is not a plausible company name
+    """
+    name = name.strip().strip("*_#:,.'\" ")
+    if not name or name.lower() in NON_COMPANY_WORDS or len(name) > 60:
+        return None
+    if name.split()[0].lower() in NON_COMPANY_LEADING_WORDS:
+        return None
+    return name
+
+
+def _domain_label(domain: str) -> str:
+    """
+    Get the label of an email domain that names the organization.
+    
+    Args:
+        domain: Email domain, e.g. 'jobs.acme.co.uk'
+        
+    Returns:
+        Organization label, e.g. 'acme'
+    """
+    labels = domain.lower().split(".")
+    # Multi-part public suffixes such as co.uk, com.au or ac.jp
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return labels[-3]
+    return labels[-2]
+
+
+def _compact(name: str) -> str:
+    """
+    Reduce a name to lowercase alphanumerics for fuzzy comparison.
+    
+    Args:
+        name: Name to compact
+        
+    Returns:
+        Compacted name
+    """
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def extract_company_name(jd_content: str) -> Tuple[Optional[str], float]:
+    """
+    Extract the company name from a job description.
+    
+    Args:
+        jd_content: Content of the job description
+        
+    Returns:
+        Tuple of (company_name, confidence); name is None if nothing was found
+    """
+    # Collect the best score per company from the text patterns
+    scores = {}
+    names = {}
+    for pattern, confidence in COMPANY_PATTERNS:
+        matched = set()
+        for match in pattern.finditer(jd_content):
+            name = _clean_company(match.group(1))
+            if name is None:
+                continue
+            key = _compact(name)
+            if key not in scores:
+                scores[key] = confidence
+                names[key] = name
+            elif key in matched:
+                # Repeated evidence from the same pattern raises confidence slightly
+                scores[key] = min(scores[key] + 0.05, 0.99)
+            else:
+                # Evidence from another pattern corroborates the best match so far
+                if confidence > scores[key]:
+                    names[key] = name
+                scores[key] = min(max(scores[key], confidence) + CORROBORATION_BONUS, 0.99)
+            matched.add(key)
+    
+    # Corporate email domains, e.g. careers@techforward.com or jobs@acme.co.uk
+    for domain in set(EMAIL_PATTERN.findall(jd_content)):
+        label = _domain_label(domain)
+        if label in GENERIC_EMAIL_DOMAINS:
+            continue
+        if label in scores:
+            scores[label] = min(scores[label] + CORROBORATION_BONUS, 0.99)
+        else:
+            scores[label] = 0.5
+            names[label] = label.capitalize()
+    
+    if not scores:
+        return None, 0.0
+    
+    best = max(scores, key=scores.get)
+    return names[best], scores[best]
+
+
+def extract_names_locally(cv_content: str, jd_content: str) -> NameGuess:
+    """
+    Extract candidate and company names without calling an LLM.
+    
+    Args:
+        cv_content: Content of the CV
+        jd_content: Content of the job description
+        
+    Returns:
+        NameGuess with the extracted names and their confidence scores
+    """
+    candidate_name, candidate_confidence = extract_candidate_name(cv_content)
+    company_name, company_confidence = extract_company_name(jd_content)
+    guess = NameGuess(candidate_name, company_name, candidate_confidence, company_confidence)
+    logger.debug(f"Local name extraction: {guess}")
+    return guess
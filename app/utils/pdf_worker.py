@@ -0,0 +1,313 @@
+"""
+PDF rendering worker module for the CV Assistant application.
+
+This module renders HTML pages to PDF with WeasyPrint while keeping the
+expensive setup between documents: all documents share one font
+configuration. Rendering can run in a small pool of long-lived worker processes
+that take jobs from a queue and are recycled after a number of documents to cap
+WeasyPrint's memory growth.
+"""
+import atexit
+import importlib.util
+import itertools
+import multiprocessing
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# WeasyPrint is optional and also needs the Pango system libraries; a missing
+# library raises OSError on import
+weasyprint_available = importlib.util.find_spec("weasyprint") is not None
+if weasyprint_available:
+    try:
+        import weasyprint
+        from weasyprint.text.fonts import FontConfiguration
+    except OSError as e:
+        weasyprint_available = False
+        logger.warning(f"WeasyPrint is installed but cannot be loaded: {e}")
+
+# Seconds to wait for a recycled worker process to exit before killing it
+WORKER_SHUTDOWN_TIMEOUT = 5.0
+
+
+class WeasyPrintRenderer:
+    """
+    WeasyPrint renderer that reuses the font configuration between documents.
+    
+    Instances are not thread-safe; use one per thread or process.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the renderer with a shared font configuration.
+        """
+        self.font_config = FontConfiguration()
+    
+    def render(self, html_content: str, output_path: Union[str, Path], css: Optional[str] = None) -> Path:
+        """
+        Render an HTML page to a PDF file.
+        
+        The CSS is inlined as a <style> element in the page head, so it keeps the
+        author origin and cascade order it has in the saved HTML file.
+        
+        Args:
+            html_content: HTML page (without the stylesheet)
+            output_path: Path to save the PDF
+            css: Optional CSS applied to the page
+            
+        Returns:
+            Path to the saved PDF file
+        """
+        if css:
+            html_content = html_content.replace("</head>", f"<style>\n{css}\n</style>\n</head>", 1)
+        weasyprint.HTML(string=html_content).write_pdf(output_path, font_config=self.font_config)
+        return Path(output_path)
+
+
+def _worker_main(jobs, results, renderer_factory: Callable[[], Any]) -> None:
+    """
+    Entry point of a worker process: render jobs until a None job arrives.
+    
+    Args:
+        jobs: Queue of (job_id, html_content, output_path, css) tuples
+        results: Queue receiving (job_id, error message or None) tuples
+        renderer_factory: Callable creating the renderer
+    """
+    renderer = renderer_factory()
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, html_content, output_path, css = job
+        try:
+            renderer.render(html_content, output_path, css)
+            results.put((job_id, None))
+        except Exception as e:
+            results.put((job_id, f"{type(e).__name__}: {e}"))
+
+
+class PDFRenderWorker:
+    """
+    Long-lived worker process rendering PDFs from a job queue.
+    
+    The process is started on the first job and replaced after max_documents
+    jobs, after a timeout, or if it died. Jobs are sent one at a time; callers
+    in other threads wait for the current job to finish.
+    """
+    
+    def __init__(
+        self,
+        max_documents: int = 100,
+        timeout: float = 120.0,
+        renderer_factory: Callable[[], Any] = WeasyPrintRenderer
+    ):
+        """
+        Initialize the worker without starting its process.
+        
+        Args:
+            max_documents: Documents rendered by a process before it is recycled
+            timeout: Seconds a job may take before the process is killed
+            renderer_factory: Picklable callable creating the renderer in the worker process
+        """
+        self.max_documents = max_documents
+        self.timeout = timeout
+        self.renderer_factory = renderer_factory
+        # Spawn rather than fork: the parent runs HTTP client and event loop threads
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.jobs = None
+        self.results = None
+        self.rendered = 0
+        self.job_ids = itertools.count(1)
+        self.lock = threading.Lock()
+    
+    def _start(self) -> None:
+        """
+        Start a new worker process with fresh queues.
+        """
+        self.jobs = self.context.Queue()
+        self.results = self.context.Queue()
+        self.process = self.context.Process(
+            target=_worker_main,
+            args=(self.jobs, self.results, self.renderer_factory),
+            daemon=True
+        )
+        self.process.start()
+        self.rendered = 0
+        logger.debug(f"Started PDF worker process {self.process.pid}")
+    
+    def _stop(self, kill: bool = False) -> None:
+        """
+        Stop the worker process.
+        
+        Args:
+            kill: Terminate the process immediately instead of letting it finish
+        """
+        if self.process is None:
+            return
+        if not kill and self.process.is_alive():
+            self.jobs.put(None)
+            self.process.join(WORKER_SHUTDOWN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        logger.debug(f"Stopped PDF worker process {self.process.pid} after {self.rendered} document(s)")
+        self.process.close()
+        self.jobs.close()
+        self.results.close()
+        self.process = None
+    
+    def render(self, html_content: str, output_path: Union[str, Path], css: Optional[str] = None) -> Path:
+        """
+        Render an HTML page to a PDF file in the worker process.
+        
+        Args:
+            html_content: HTML page (without the stylesheet)
+            output_path: Path to save the PDF
+            css: Optional CSS applied to the page
+            
+        Returns:
+            Path to the saved PDF file
+            
+        Raises:
+            TimeoutError: If the job takes longer than the timeout
+            RuntimeError: If rendering fails or the worker process dies
+        """
+        with self.lock:
+            if self.process is None or not self.process.is_alive() or self.rendered >= self.max_documents:
+                self._stop()
+                self._start()
+            
+            job_id = next(self.job_ids)
+            self.jobs.put((job_id, html_content, str(output_path), css))
+            self.rendered += 1
+            
+            # Wait in short slices so a crashed process is noticed before the timeout
+            waited = 0.0
+            while True:
+                try:
+                    result_id, error = self.results.get(timeout=min(1.0, self.timeout - waited))
+                except queue.Empty:
+                    waited += 1.0
+                    if not self.process.is_alive():
+                        self._stop(kill=True)
+                        raise RuntimeError("PDF worker process exited unexpectedly")
+                    if waited >= self.timeout:
+                        self._stop(kill=True)
+                        raise TimeoutError(f"PDF rendering timed out after {self.timeout:.0f}s: {output_path}")
+                    continue
+                if result_id == job_id:
+                    break
+        
+        if error is not None:
+            raise RuntimeError(error)
+        return Path(output_path)
+    
+    def close(self) -> None:
+        """
+        Stop the worker process.
+        """
+        with self.lock:
+            self._stop()
+
+
+class PDFWorkerPool:
+    """
+    Small pool of PDF worker processes.
+    
+    Each document goes to an idle worker, so up to one document per worker is
+    rendered at the same time; further callers wait for a worker to become idle.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        max_documents: int = 100,
+        timeout: float = 120.0,
+        renderer_factory: Callable[[], Any] = WeasyPrintRenderer
+    ):
+        """
+        Initialize the pool without starting any process.
+        
+        Args:
+            workers: Number of worker processes
+            max_documents: Documents rendered by a process before it is recycled
+            timeout: Seconds a job may take before its process is killed
+            renderer_factory: Picklable callable creating the renderer in the worker processes
+        """
+        self.workers = [PDFRenderWorker(max_documents, timeout, renderer_factory) for _ in range(max(1, workers))]
+        self.idle: "queue.Queue[PDFRenderWorker]" = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+    
+    def render(self, html_content: str, output_path: Union[str, Path], css: Optional[str] = None) -> Path:
+        """
+        Render an HTML page to a PDF file in an idle worker process.
+        
+        Args:
+            html_content: HTML page (without the stylesheet)
+            output_path: Path to save the PDF
+            css: Optional CSS applied to the page
+            
+        Returns:
+            Path to the saved PDF file
+            
+        Raises:
+            TimeoutError: If the job takes longer than the timeout
+            RuntimeError: If rendering fails or the worker process dies
+        """
+        worker = self.idle.get()
+        try:
+            return worker.render(html_content, output_path, css)
+        finally:
+            self.idle.put(worker)
+    
+    def close(self) -> None:
+        """
+        Stop all worker processes.
+        """
+        for worker in self.workers:
+            worker.close()
+
+
+_pool: Optional[PDFWorkerPool] = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_pdf_worker(settings) -> Optional[PDFWorkerPool]:
+    """
+    Get the process-wide pool of PDF workers.
+    
+    Args:
+        settings: Application settings
+        
+    Returns:
+        PDFWorkerPool, or None if the workers are disabled or WeasyPrint is unavailable
+    """
+    global _pool
+    if not settings.pdf_worker_enabled or not weasyprint_available:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = PDFWorkerPool(settings.pdf_workers, settings.pdf_worker_max_documents, settings.pdf_render_timeout)
+            atexit.register(_pool.close)
+        return _pool
+
+
+def get_local_renderer() -> WeasyPrintRenderer:
+    """
+    Get this thread's in-process WeasyPrint renderer.
+    
+    Returns:
+        WeasyPrintRenderer
+    """
+    renderer = getattr(_local, "renderer", None)
+    if renderer is None:
+        renderer = _local.renderer = WeasyPrintRenderer()
+    return renderer
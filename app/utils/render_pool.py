@@ -0,0 +1,155 @@
+"""
+PDF rendering stage module for the CV Assistant application.
+
+This module renders documents (markdown to HTML and PDF) in a pool of worker
+processes, one per core by default, so CPU-bound PDF rendering runs outside the
+process that waits on the LLM. Any pipeline can submit a job and gets a future;
+in batch runs the next job's generation overlaps the previous job's rendering.
+"""
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from app.utils.chromium import get_chromium_pool
+from app.utils.converter import FileConverter
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Settings of the worker process, set by the pool initializer
+_worker_settings = None
+
+
+def _init_worker(settings) -> None:
+    """
+    Initialize a render worker process.
+    
+    Args:
+        settings: Application settings
+    """
+    global _worker_settings
+    _worker_settings = settings
+
+
+def render_document(
+    markdown_content: str, 
+    css: Optional[str], 
+    output_dir: Union[str, Path], 
+    base_name: str
+) -> Dict[str, Path]:
+    """
+    Render a document to markdown, HTML and PDF files in a worker process.
+    
+    WeasyPrint runs in the worker itself, which keeps its parsed stylesheets
+    and fonts between the documents it renders.
+    
+    Args:
+        markdown_content: Markdown content to render
+        css: Optional CSS styling to include
+        output_dir: Directory to save the files in
+        base_name: Base name of the files
+        
+    Returns:
+        Dictionary of output file paths
+    """
+    settings = _worker_settings
+    document = FileConverter.render(
+        markdown_content, 
+        output_dir, 
+        base_name, 
+        css, 
+        settings.markdown_backend if settings is not None else None, 
+        chromium=get_chromium_pool(settings) if settings is not None else None
+    )
+    return document.paths
+
+
+class RenderStage:
+    """
+    Process pool rendering documents in the background.
+    
+    Worker processes are replaced after Settings.pdf_worker_max_documents
+    documents to cap WeasyPrint's memory growth.
+    """
+    
+    def __init__(self, settings, render_function: Callable[..., Dict[str, Path]] = render_document):
+        """
+        Initialize the stage; worker processes start with the first job.
+        
+        Args:
+            settings: Application settings
+            render_function: Picklable function run for each job (markdown, css, output_dir, base_name)
+        """
+        self.workers = settings.render_workers or os.cpu_count() or 1
+        self.render_function = render_function
+        # Spawn rather than fork: the parent runs HTTP client and event loop threads
+        options = {
+            "max_workers": self.workers,
+            "mp_context": multiprocessing.get_context("spawn"),
+            "initializer": _init_worker,
+            "initargs": (settings,),
+        }
+        # Recycling workers to cap renderer memory growth needs Python 3.11+
+        if sys.version_info >= (3, 11):
+            options["max_tasks_per_child"] = settings.pdf_worker_max_documents or None
+        self.executor = ProcessPoolExecutor(**options)
+        logger.debug(f"Render stage with {self.workers} worker process(es)")
+    
+    def submit(
+        self, 
+        markdown_content: str, 
+        css: Optional[str], 
+        output_dir: Union[str, Path], 
+        base_name: str
+    ) -> "Future[Dict[str, Path]]":
+        """
+        Queue a document for rendering.
+        
+        Args:
+            markdown_content: Markdown content to render
+            css: Optional CSS styling to include
+            output_dir: Directory to save the files in
+            base_name: Base name of the files
+            
+        Returns:
+            Future of the dictionary of output file paths
+        """
+        return self.executor.submit(self.render_function, markdown_content, css, Path(output_dir), base_name)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes.
+        
+        Args:
+            wait: Wait for queued jobs to finish
+        """
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_stage: Optional[RenderStage] = None
+_stage_lock = threading.Lock()
+
+
+def get_render_stage(settings) -> Optional[RenderStage]:
+    """
+    Get the process-wide render stage.
+    
+    Args:
+        settings: Application settings
+        
+    Returns:
+        RenderStage, or None if the render stage is disabled
+    """
+    global _stage
+    if not settings.render_pool_enabled:
+        return None
+    with _stage_lock:
+        if _stage is None:
+            _stage = RenderStage(settings)
+            atexit.register(_stage.shutdown)
+        return _stage
@@ -0,0 +1,156 @@
+"""
+Candidate scoring module for the CV Assistant application.
+
+This module scores generated documents locally, without another LLM call, so
+the best of several candidates can be kept. A candidate scores higher the
+more of the job description's keywords it covers, the closer its length is
+to the expected length, and the fewer unfilled template placeholders it has.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from statistics import median
+from typing import List, Optional, Set
+
+from app.utils.cv_index import tokenize
+
+# Number of most frequent job description terms used as keywords
+MAX_KEYWORDS = 40
+
+# Weights of the partial scores in the total score
+COVERAGE_WEIGHT = 0.6
+LENGTH_WEIGHT = 0.2
+PLACEHOLDER_WEIGHT = 0.2
+
+# Score lost per leaked placeholder
+PLACEHOLDER_PENALTY = 0.25
+
+# Unfilled template placeholders: {{name}}, [Company Name] (but not markdown links), lorem ipsum
+PLACEHOLDER = re.compile(r"\{\{[^{}\n]*\}\}|\[[A-Z][A-Za-z' ]{2,40}\](?!\()|lorem ipsum", re.IGNORECASE)
+
+
+@dataclass
+class CandidateScore:
+    """
+    Local quality score of a generated document.
+    """
+    coverage: float  # Fraction of job description keywords in the document
+    length: float  # 1.0 at the expected length, lower for shorter or longer documents
+    placeholders: int  # Number of unfilled template placeholders
+    total: float  # Weighted total between 0 and 1
+
+
+def jd_keywords(jd_content: str, source_content: Optional[str] = None, limit: int = MAX_KEYWORDS) -> Set[str]:
+    """
+    Get the keywords of a job description.
+    
+    Args:
+        jd_content: Job description content
+        source_content: Optional source document; when given, only keywords it
+            also contains are used, so candidates are not rewarded for claims
+            the source does not support
+        limit: Maximum number of keywords
+        
+    Returns:
+        Set of keywords
+    """
+    counts = Counter(term for term in tokenize(jd_content) if len(term) > 2 and not term.isdigit())
+    keywords = {term for term, _ in counts.most_common(limit)}
+    if source_content:
+        supported = keywords & set(tokenize(source_content))
+        if supported:
+            return supported
+    return keywords
+
+
+def keyword_coverage(content: str, keywords: Set[str]) -> float:
+    """
+    Get the fraction of keywords a document contains.
+    
+    Args:
+        content: Document content
+        keywords: Keywords to look for
+        
+    Returns:
+        Coverage between 0 and 1 (1 if there are no keywords)
+    """
+    if not keywords:
+        return 1.0
+    return len(keywords & set(tokenize(content))) / len(keywords)
+
+
+def length_score(content: str, expected_length: int) -> float:
+    """
+    Score the length of a document against the expected length.
+    
+    Args:
+        content: Document content
+        expected_length: Expected number of characters
+        
+    Returns:
+        Ratio of the shorter to the longer length, between 0 and 1
+    """
+    length = len(content.strip())
+    if length == 0 or expected_length <= 0:
+        return 0.0
+    return min(length, expected_length) / max(length, expected_length)
+
+
+def find_placeholders(content: str) -> List[str]:
+    """
+    Find unfilled template placeholders in a document.
+    
+    Args:
+        content: Document content
+        
+    Returns:
+        List of placeholders found
+    """
+    return PLACEHOLDER.findall(content)
+
+
+def score_candidate(content: str, keywords: Set[str], expected_length: int) -> CandidateScore:
+    """
+    Score one generated document.
+    
+    Args:
+        content: Document content
+        keywords: Job description keywords
+        expected_length: Expected number of characters
+        
+    Returns:
+        CandidateScore
+    """
+    coverage = keyword_coverage(content, keywords)
+    length = length_score(content, expected_length)
+    placeholders = len(find_placeholders(content))
+    total = (
+        COVERAGE_WEIGHT * coverage
+        + LENGTH_WEIGHT * length
+        + PLACEHOLDER_WEIGHT * max(0.0, 1.0 - PLACEHOLDER_PENALTY * placeholders)
+    )
+    return CandidateScore(coverage=coverage, length=length, placeholders=placeholders, total=total)
+
+
+def score_candidates(
+    candidates: List[str], 
+    jd_content: str, 
+    source_content: Optional[str] = None, 
+    expected_length: Optional[int] = None
+) -> List[CandidateScore]:
+    """
+    Score several generated documents for the same job.
+    
+    Args:
+        candidates: Document contents
+        jd_content: Job description content
+        source_content: Optional source document the candidates were derived from
+        expected_length: Expected number of characters (defaults to the median candidate length)
+        
+    Returns:
+        List of scores in the order of the candidates
+    """
+    keywords = jd_keywords(jd_content, source_content)
+    if expected_length is None:
+        expected_length = int(median(len(candidate.strip()) for candidate in candidates)) if candidates else 0
+    return [score_candidate(candidate, keywords, expected_length) for candidate in candidates]
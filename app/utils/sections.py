@@ -0,0 +1,113 @@
+"""
+Markdown section utilities for the CV Assistant application.
+
+This module splits a markdown template into its level-2 (##) sections so
+they can be generated independently, and normalizes and reassembles the
+generated sections into one document.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Level-2 headings ("## SKILLS"), not level-3 ("### COMPANY")
+SECTION_HEADING = re.compile(r"^##(?!#)[ \t]*(.+?)[ \t]*$", re.MULTILINE)
+
+# Reply the model gives for a section the source document has no content for
+OMIT_MARKER = "OMIT"
+
+# A reply wrapped in a code fence, e.g. ```markdown ... ```
+CODE_FENCE = re.compile(r"^```[\w-]*\n(.*?)\n```$", re.DOTALL)
+
+
+@dataclass
+class TemplateSection:
+    """
+    One section of a markdown template.
+    """
+    title: Optional[str]  # Heading text, or None for the header before the first ## heading
+    text: str  # Section text including its heading line
+    
+    @property
+    def name(self) -> str:
+        """
+        Get a short name of the section for logging.
+        
+        Returns:
+            The heading text, or 'header'
+        """
+        return self.title or "header"
+
+
+def split_sections(markdown: str) -> List[TemplateSection]:
+    """
+    Split a markdown document into its ## sections.
+    
+    Args:
+        markdown: Markdown content
+        
+    Returns:
+        List of sections in document order; the header (e.g. name and contact
+        line) comes first if there is any text before the first ## heading
+    """
+    sections = []
+    matches = list(SECTION_HEADING.finditer(markdown))
+    header = markdown[:matches[0].start()] if matches else markdown
+    if header.strip():
+        sections.append(TemplateSection(None, header.strip()))
+    
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(markdown)
+        sections.append(TemplateSection(match.group(1), markdown[match.start():end].strip()))
+    return sections
+
+
+def normalize_section(content: str, section: TemplateSection) -> str:
+    """
+    Clean up a generated section so it can be assembled with the others.
+    
+    Removes code fences and text that spills into other sections, and makes
+    sure the section starts with its template heading.
+    
+    Args:
+        content: Generated section content
+        section: Template section it was generated from
+        
+    Returns:
+        Normalized section, or an empty string if the section is to be omitted
+    """
+    content = content.strip()
+    fenced = CODE_FENCE.match(content)
+    if fenced:
+        content = fenced.group(1).strip()
+    if not content or content.strip("*_. ").upper() == OMIT_MARKER:
+        return ""
+    
+    headings = list(SECTION_HEADING.finditer(content))
+    if section.title is None:
+        # The header ends where the first section begins
+        return content[:headings[0].start()].strip() if headings else content
+    
+    if headings and headings[0].start() == 0:
+        # Keep the template's heading and drop anything generated for later sections
+        body_end = headings[1].start() if len(headings) > 1 else len(content)
+        body = content[headings[0].end():body_end].strip()
+    else:
+        body_end = headings[0].start() if headings else len(content)
+        body = content[:body_end].strip()
+    if not body or body.strip("*_. ").upper() == OMIT_MARKER:
+        return ""
+    return f"## {section.title}\n\n{body}"
+
+
+def assemble_sections(parts: List[str]) -> str:
+    """
+    Join generated sections into one document.
+    
+    Args:
+        parts: Normalized sections in document order (empty ones are skipped)
+        
+    Returns:
+        Assembled markdown document
+    """
+    document = "\n\n".join(part for part in parts if part)
+    return re.sub(r"\n{3,}", "\n\n", document).strip() + "\n"
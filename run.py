@@ -28,18 +28,48 @@ def parse_arguments():
     cv_parser.add_argument("-cv", dest="cv_file", help="Path to your CV file")
     cv_parser.add_argument("-jd", dest="jd_file", help="Path to the job description file")
     cv_parser.add_argument("-template", dest="template", help="Template directory to use")
+    cv_parser.add_argument("--stream", action="store_true", help="Show the document as it is generated and write it progressively")
+    cv_parser.add_argument("--candidates", dest="candidates", type=int, default=1, help="Generate N candidates in one request and keep the best-scoring one")
+    cv_parser.add_argument("--parallel-sections", dest="parallel_sections", action="store_true", help="Generate the CV template's sections concurrently")
 
     # Letter command
     letter_parser = subparsers.add_parser("letter", help="Generate a cover letter")
     letter_parser.add_argument("-cv", dest="cv_file", help="Path to your CV file")
     letter_parser.add_argument("-jd", dest="jd_file", help="Path to the job description file")
     letter_parser.add_argument("-template", dest="template", help="Template directory to use")
+    letter_parser.add_argument("--stream", action="store_true", help="Show the document as it is generated and write it progressively")
+    letter_parser.add_argument("--candidates", dest="candidates", type=int, default=1, help="Generate N candidates in one request and keep the best-scoring one")
+
+    # Apply command
+    apply_parser = subparsers.add_parser("apply", help="Generate a tailored CV and a cover letter together")
+    apply_parser.add_argument("-cv", dest="cv_file", help="Path to your CV file")
+    apply_parser.add_argument("-jd", dest="jd_file", help="Path to the job description file")
+    apply_parser.add_argument("-template", dest="template", help="Template directory to use")
+    apply_parser.add_argument("--stream", action="store_true", help="Show the document as it is generated and write it progressively")
+    apply_parser.add_argument("--candidates", dest="candidates", type=int, default=1, help="Generate N candidates in one request and keep the best-scoring one")
+    apply_parser.add_argument("--parallel-sections", dest="parallel_sections", action="store_true", help="Generate the CV template's sections concurrently")
+
+    # Batch command
+    batch_parser = subparsers.add_parser("batch", help="Run the CV or letter pipeline for every job description in a directory")
+    batch_parser.add_argument("target", choices=["cv", "letter"], help="Pipeline to run for each job description")
+    batch_parser.add_argument("-cv", dest="cv_file", help="Path to your CV file")
+    batch_parser.add_argument("-jd-dir", dest="jd_dir", help="Directory of job description files")
+    batch_parser.add_argument("--concurrency", dest="concurrency", type=int, help="Maximum number of concurrent jobs")
+    batch_parser.add_argument("-template", dest="template", help="Template directory to use")
 
     # Adopt command
     adopt_parser = subparsers.add_parser("adopt", help="Adapt a CV to a new template")
     adopt_parser.add_argument("-source", required=True, help="Source CV file to adapt")
     adopt_parser.add_argument("-template", dest="template", help="Template directory to use")
 
+    # Cache command
+    cache_parser = subparsers.add_parser("cache", help="Inspect or maintain the LLM response cache")
+    cache_parser.add_argument("action", choices=["stats", "prune", "clear"], help="Cache action to perform")
+
+    # Stats command
+    stats_parser = subparsers.add_parser("stats", help="Show latency, token and cost statistics of recorded LLM calls")
+    stats_parser.add_argument("--since", dest="since", help="Only include calls within this window, e.g. 24h or 7d")
+
     return parser
 
 
@@ -59,11 +89,19 @@ def main_cli():
 
     try:
         if args.command == "cv":
-            main.run_cv(args.cv_file, args.jd_file, args.template)
+            main.run_cv(args.cv_file, args.jd_file, args.template, args.stream, args.candidates, args.parallel_sections)
         elif args.command == "letter":
-            main.run_letter(args.cv_file, args.jd_file, args.template)
+            main.run_letter(args.cv_file, args.jd_file, args.template, args.stream, args.candidates)
+        elif args.command == "apply":
+            main.run_apply(args.cv_file, args.jd_file, args.template, args.stream, args.candidates, args.parallel_sections)
+        elif args.command == "batch":
+            main.run_batch(args.target, args.cv_file, args.jd_dir, args.concurrency, args.template)
         elif args.command == "adopt":
             main.run_adopt(args.source, args.template)
+        elif args.command == "cache":
+            main.run_cache(args.action)
+        elif args.command == "stats":
+            main.run_stats(args.since)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
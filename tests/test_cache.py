@@ -0,0 +1,150 @@
+"""
+Tests for the LLM response cache module.
+"""
+import json
+import os
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+from unittest.mock import patch
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.llm.cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the LLM response cache module."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        # Create a temporary directory for the cache
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(Path(self.test_dir), max_bytes=1024 * 1024, ttl_seconds=3600)
+        self.messages = [SystemMessage(content="System"), HumanMessage(content="Human")]
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        # Remove the temporary directory and its contents
+        shutil.rmtree(self.test_dir)
+    
+    def test_make_key(self):
+        """Test that keys depend on backend, model, temperature, max_tokens and messages."""
+        key = ResponseCache.make_key("gpt-4o", 0.3, self.messages)
+        
+        self.assertEqual(key, ResponseCache.make_key("gpt-4o", 0.3, list(self.messages)))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4o-mini", 0.3, self.messages))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4o", 0.1, self.messages))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4o", 0.3, self.messages[:1]))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4o", 0.3, self.messages, backend="http://localhost:8000/v1"))
+        self.assertNotEqual(key, ResponseCache.make_key("gpt-4o", 0.3, self.messages, max_tokens=200))
+    
+    def test_get_put(self):
+        """Test storing and retrieving a response with hit/miss counters."""
+        key = ResponseCache.make_key("gpt-4o", 0.3, self.messages)
+        
+        # Verify a miss before the response is stored
+        self.assertIsNone(self.cache.get(key))
+        
+        self.cache.put(key, "Cached response", "gpt-4o")
+        
+        # Verify a hit after the response is stored
+        self.assertEqual(self.cache.get(key), "Cached response")
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses and pruned."""
+        key = ResponseCache.make_key("gpt-4o", 0.3, self.messages)
+        self.cache.put(key, "Old response", "gpt-4o")
+        
+        # Backdate the entry beyond the TTL
+        entry_path = self.cache._entry_path(key)
+        with open(entry_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        entry["created_at"] -= 7200
+        with open(entry_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        
+        self.assertIsNone(self.cache.get(key))
+        
+        self.cache.put(key, "Old response", "gpt-4o")
+        with open(entry_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        entry["created_at"] -= 7200
+        with open(entry_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = ResponseCache(Path(self.test_dir) / "small", max_bytes=800, ttl_seconds=0)
+        keys = [ResponseCache.make_key("gpt-4o", 0.3, [HumanMessage(content=str(i))]) for i in range(3)]
+        
+        cache.put(keys[0], "x" * 200, "gpt-4o")
+        cache.put(keys[1], "y" * 200, "gpt-4o")
+        
+        # Make the first entry older, then access it so it becomes the most recent
+        os.utime(cache._entry_path(keys[0]), (0, 100))
+        os.utime(cache._entry_path(keys[1]), (0, 200))
+        self.assertIsNotNone(cache.get(keys[0]))
+        
+        cache.put(keys[2], "z" * 200, "gpt-4o")
+        
+        # Verify the least recently used entry was evicted
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+    
+    def test_eviction_only_scans_over_limit(self):
+        """Test that writes track the total size and only evict once it exceeds the limit."""
+        cache = ResponseCache(Path(self.test_dir) / "small", max_bytes=800, ttl_seconds=0)
+        keys = [ResponseCache.make_key("gpt-4o", 0.3, [HumanMessage(content=str(i))]) for i in range(3)]
+        
+        with patch.object(cache, "_evict", wraps=cache._evict) as evict:
+            cache.put(keys[0], "x" * 200, "gpt-4o")
+            cache.put(keys[1], "y" * 200, "gpt-4o")
+            self.assertEqual(evict.call_count, 0)
+            self.assertEqual(cache._size, sum(path.stat().st_size for path in cache._entries()))
+            
+            cache.put(keys[2], "z" * 200, "gpt-4o")
+            self.assertEqual(evict.call_count, 1)
+        self.assertEqual(cache._size, sum(path.stat().st_size for path in cache._entries()))
+    
+    def test_stats_are_persisted_in_batches(self):
+        """Test that lookups do not rewrite the stats file until a batch is full or flushed."""
+        stats_path = Path(self.test_dir) / ResponseCache.STATS_FILE
+        key = ResponseCache.make_key("gpt-4o", 0.3, self.messages)
+        
+        self.cache.get(key)
+        self.assertFalse(stats_path.exists())
+        
+        for _ in range(ResponseCache.STATS_FLUSH_INTERVAL - 1):
+            self.cache.get(key)
+        self.assertEqual(json.loads(stats_path.read_text()), {"hits": 0, "misses": ResponseCache.STATS_FLUSH_INTERVAL})
+        
+        self.cache.get(key)
+        self.cache.flush_stats()
+        self.assertEqual(json.loads(stats_path.read_text())["misses"], ResponseCache.STATS_FLUSH_INTERVAL + 1)
+    
+    def test_clear(self):
+        """Test clearing the cache."""
+        key = ResponseCache.make_key("gpt-4o", 0.3, self.messages)
+        self.cache.put(key, "Cached response", "gpt-4o")
+        self.cache.get(key)
+        
+        self.assertEqual(self.cache.clear(), 1)
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 0)
+        self.assertEqual(stats["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests for the headless Chromium rendering module.
+"""
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.utils.chromium import ChromiumPool, find_chromium, websockets_available
+
+# Stand-in browser: serves the DevTools commands the pool uses over a WebSocket,
+# prints each page as "PDF <most tabs open at once>" and never answers for pages
+# containing "hang"
+FAKE_BROWSER = textwrap.dedent('''
+    import base64, json, sys, threading, time
+    from websockets.sync.server import serve
+    
+    state = {"open": 0, "max_open": 0, "targets": 0, "pages": {}}
+    lock = threading.Lock()
+    
+    def handle(connection, message):
+        method, params, result = message["method"], message.get("params", {}), {}
+        if method == "Target.createTarget":
+            with lock:
+                state["targets"] += 1
+                state["open"] += 1
+                state["max_open"] = max(state["max_open"], state["open"])
+                result = {"targetId": f"T{state['targets']}"}
+        elif method == "Target.attachToTarget":
+            result = {"sessionId": "S" + params["targetId"]}
+        elif method == "Page.getFrameTree":
+            result = {"frameTree": {"frame": {"id": "F" + message["sessionId"]}}}
+        elif method == "Page.setDocumentContent":
+            state["pages"][message["sessionId"]] = params["html"]
+        elif method == "Page.printToPDF":
+            if "hang" in state["pages"][message["sessionId"]]:
+                return
+            time.sleep(0.2)
+            result = {"data": base64.b64encode(f"PDF {state['max_open']}".encode()).decode()}
+        elif method == "Target.closeTarget":
+            with lock:
+                state["open"] -= 1
+        elif method == "Browser.close":
+            connection.send(json.dumps({"id": message["id"], "result": {}}))
+            server.shutdown()
+            return
+        connection.send(json.dumps({"id": message["id"], "result": result}))
+    
+    def handler(connection):
+        for raw in connection:
+            threading.Thread(target=handle, args=(connection, json.loads(raw)), daemon=True).start()
+    
+    with serve(handler, "127.0.0.1", 0) as server:
+        port = server.socket.getsockname()[1]
+        print(f"DevTools listening on ws://127.0.0.1:{port}/devtools/browser/fake", file=sys.stderr, flush=True)
+        server.serve_forever()
+''')
+
+
+@unittest.skipUnless(websockets_available, "websockets not installed")
+class TestChromiumPool(unittest.TestCase):
+    """Test cases for the pooled DevTools renderer."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.temp_dir.name)
+        self.binary = self.output_dir / "fake-chromium"
+        self.binary.write_text(f"#!{sys.executable}\n{FAKE_BROWSER}", encoding="utf-8")
+        self.binary.chmod(self.binary.stat().st_mode | stat.S_IEXEC)
+        self.pool = None
+    
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.close()
+        self.temp_dir.cleanup()
+    
+    def test_find_chromium(self):
+        """A configured executable is found by path."""
+        self.assertEqual(find_chromium(str(self.binary)), str(self.binary))
+        self.assertIsNone(find_chromium(str(self.output_dir / "missing")))
+    
+    def test_reuses_browser_and_bounds_tabs(self):
+        """Documents share one browser, with at most max_tabs tabs open."""
+        self.pool = ChromiumPool(str(self.binary), browsers=1, max_tabs=2, timeout=10.0)
+        
+        def render(index):
+            path = self.pool.render(f"<p>{index}</p>", self.output_dir / f"{index}.pdf")
+            return self.pool.browsers[0].process.pid, path.read_text(encoding="utf-8")
+        
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(render, range(6)))
+        
+        self.assertEqual(len({pid for pid, _ in results}), 1)
+        self.assertTrue(all(content in ("PDF 1", "PDF 2") for _, content in results))
+        self.assertIn("PDF 2", [content for _, content in results])
+    
+    def test_timeout_restarts_browser(self):
+        """A hanging page times out and the next document gets a fresh browser."""
+        self.pool = ChromiumPool(str(self.binary), timeout=1.0)
+        self.pool.render("<p>ok</p>", self.output_dir / "first.pdf")
+        first_pid = self.pool.browsers[0].process.pid
+        
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            self.pool.render("<p>hang</p>", self.output_dir / "hang.pdf")
+        self.assertLess(time.monotonic() - started, 5.0)
+        
+        self.pool.render("<p>ok</p>", self.output_dir / "second.pdf")
+        self.assertNotEqual(self.pool.browsers[0].process.pid, first_pid)
+        self.assertEqual((self.output_dir / "second.pdf").read_text(encoding="utf-8"), "PDF 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
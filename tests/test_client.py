@@ -0,0 +1,78 @@
+"""
+Tests for the LLM client module.
+"""
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+from app.config.settings import BackendConfig, Settings
+from app.llm.client import _registry, aclose_clients, close_clients, get_chat_model, get_pool_stats
+from app.llm.ratelimit import get_rate_limiter
+
+
+class TestBackends(unittest.TestCase):
+    """Test cases for routing pipeline stages to LLM backends."""
+    
+    def setUp(self):
+        """Set up settings with a local backend for name extraction."""
+        self.settings = Settings()
+        self.settings.llm_backends["local"] = BackendConfig(
+            base_url="http://localhost:8080/v1", api_key_env="LOCAL_LLM_API_KEY", timeout=15.0, max_connections=2
+        )
+        self.settings.llm_stage_backends["extraction"] = "local"
+    
+    def tearDown(self):
+        """Drop the shared clients."""
+        close_clients()
+    
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "sk-remote"})
+    def test_stage_selects_backend(self):
+        """Mapped stages use their backend's endpoint, timeout and pool; others use the default."""
+        local = get_chat_model(self.settings, "gpt-4o", 0.3, "extraction")
+        remote = get_chat_model(self.settings, "gpt-4o", 0.3, "tailoring")
+        
+        self.assertIsNot(local, remote)
+        self.assertEqual(str(local.openai_api_base), "http://localhost:8080/v1")
+        self.assertEqual(local.request_timeout, 15.0)
+        self.assertEqual(remote.request_timeout, self.settings.llm_attempt_timeout)
+        self.assertIs(get_chat_model(self.settings, "gpt-4o", 0.3, "letter"), remote)
+        self.assertEqual(set(get_pool_stats()), {"local", "default"})
+    
+    def test_api_key(self):
+        """Keys come from the backend's variable, with a placeholder for local servers."""
+        with patch.dict(os.environ, {"LOCAL_LLM_API_KEY": "sk-local"}):
+            self.assertEqual(self.settings.llm_backends["local"].get_api_key(), "sk-local")
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(self.settings.llm_backends["local"].get_api_key(), "not-needed")
+            self.assertIsNone(self.settings.llm_backends["default"].get_api_key())
+    
+    def test_unknown_backend(self):
+        """Mapping a stage to a missing backend is reported clearly."""
+        self.settings.llm_stage_backends["letter"] = "missing"
+        with self.assertRaises(ValueError):
+            self.settings.get_backend("letter")
+    
+    def test_rate_limiter_per_backend(self):
+        """Each backend has its own rate limiter."""
+        self.assertIsNot(get_rate_limiter(self.settings, "local"), get_rate_limiter(self.settings, "default"))
+        self.assertIs(get_rate_limiter(self.settings, "local"), get_rate_limiter(self.settings, "local"))
+    
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "sk-remote"})
+    def test_close_closes_async_clients(self):
+        """Closing the registry closes the pooled sync and async clients, with or without a running loop."""
+        get_chat_model(self.settings, "gpt-4o", 0.3, "tailoring")
+        pool = _registry._pools["default"]
+        close_clients()
+        self.assertTrue(pool["client"].is_closed)
+        self.assertTrue(pool["async_client"].is_closed)
+        
+        get_chat_model(self.settings, "gpt-4o", 0.3, "tailoring")
+        pool = _registry._pools["default"]
+        asyncio.run(aclose_clients())
+        self.assertTrue(pool["async_client"].is_closed)
+        self.assertEqual(get_pool_stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
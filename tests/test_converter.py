@@ -3,10 +3,37 @@ Tests for the file converter utility module.
 """
 import unittest
 from pathlib import Path
+from unittest.mock import patch
+import re
 import tempfile
 import shutil
+import threading
 
-from app.utils.converter import FileConverter
+from app.utils.converter import (
+    MARKDOWN_IT_BACKEND, FileConverter, convert_markdown, get_markdown_converter, markdown_it_available
+)
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates" / "default"
+
+# Documents both markdown backends must render identically: the shipped templates
+# plus the constructs generated CVs and letters use
+PARITY_CORPUS = {
+    "headings": "# Jane Doe\n\n## SKILLS\n\n### ACME | Engineer | 01/2020 - Present\n*Berlin, Germany*\n",
+    "inline": "**Email:** jane@example.com | Text with [a link](https://example.com), *em*, `code` & more.\n",
+    "bullet list": "* One\n* **Two:** bold\n",
+    "ordered list": "Steps:\n\n1. First\n2. Second\n",
+    "nested list": "- Parent\n    - Child\n- Other\n",
+    "table": "| Skill | Years |\n|---|---|\n| Python | 8 |\n| SQL & dbt | 5 |\n",
+    "fenced code": "```python\nif a < b:\n    pass\n```\n",
+    "quote and rule": "> Quoted text\n\n---\n\nAfter the rule\n",
+    "unicode": "Café — naïve über 10–20 % €\n",
+}
+
+
+def normalize_html(html: str) -> str:
+    """Ignore line breaks between tags and XHTML-style void elements."""
+    html = re.sub(r"\s*\n\s*<", "<", html.strip())
+    return re.sub(r">\s*\n\s*", ">", html).replace(" />", ">")
 
 
 class TestFileConverter(unittest.TestCase):
@@ -80,6 +107,70 @@ This is a test paragraph.
                 self.skipTest(f"PDF generation failed: {e}")
         except ImportError:
             self.skipTest("PDF conversion libraries not available")
+    
+    def test_render_converts_once(self):
+        """Test that rendering converts the markdown once and saves all formats."""
+        def fake_pdf(html_content, output_path, *args):
+            Path(output_path).write_bytes(b"%PDF")
+            return Path(output_path)
+        
+        css = "h1 { color: red; }"
+        with patch("app.utils.converter.convert_markdown", wraps=convert_markdown) as convert, \
+                patch.object(FileConverter, "html_to_pdf", side_effect=fake_pdf) as to_pdf:
+            document = FileConverter.render("# Test Heading", self.output_dir, "doc", css)
+        
+        self.assertEqual(convert.call_count, 1)
+        self.assertEqual(document.html_path.read_text(encoding="utf-8"), document.html)
+        self.assertIn(css, document.html)
+        self.assertEqual(document.markdown_path.read_text(encoding="utf-8"), "# Test Heading")
+        self.assertEqual(document.paths, {
+            "markdown": self.output_dir / "doc.md",
+            "pdf": self.output_dir / "doc.pdf",
+            "html": self.output_dir / "doc.html",
+        })
+        
+        # The PDF gets the page without the inlined CSS and the CSS separately
+        page, _, html_path, _, pdf_css = to_pdf.call_args.args[:5]
+        self.assertNotIn(css, page)
+        self.assertIn("<h1>Test Heading</h1>", page)
+        self.assertEqual((html_path, pdf_css), (document.html_path, css))
+        self.assertEqual(FileConverter.add_stylesheet(page, css).count(css), 1)
+    
+    def test_markdown_converter_is_reused(self):
+        """Test that each thread reuses one converter and state does not leak between documents."""
+        converter = get_markdown_converter()
+        self.assertIs(get_markdown_converter(), converter)
+        
+        # Reference links defined in one document must not resolve in the next
+        self.assertIn('href="https://example.com"', convert_markdown("[cv][ref]\n\n[ref]: https://example.com"))
+        self.assertNotIn("href", convert_markdown("[cv][ref]"))
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_markdown_converter()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], converter)
+    
+    def test_unknown_markdown_backend(self):
+        """Test that an unknown backend is rejected."""
+        with self.assertRaises(ValueError):
+            FileConverter.markdown_to_html("# Test", backend="pandoc")
+    
+    def test_markdown_backend_parity(self):
+        """Test that markdown-it renders the corpus and templates like Python-Markdown."""
+        if not markdown_it_available:
+            self.skipTest("markdown-it-py not installed")
+        
+        corpus = dict(PARITY_CORPUS)
+        for path in sorted(TEMPLATES_DIR.glob("*_template.md")):
+            corpus[path.name] = path.read_text(encoding="utf-8")
+        
+        for name, document in corpus.items():
+            with self.subTest(document=name):
+                self.assertEqual(
+                    normalize_html(convert_markdown(document, MARKDOWN_IT_BACKEND)),
+                    normalize_html(convert_markdown(document))
+                )
 
 
 if __name__ == "__main__":
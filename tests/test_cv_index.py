@@ -0,0 +1,93 @@
+"""
+Tests for the CV index utility module.
+"""
+import unittest
+
+from app.config.settings import Settings
+from app.pipelines.letter import LetterPipeline
+from app.utils.cv_index import get_cv_index, parse_cv, select_relevant, tokenize
+
+CV = """# Jane Doe
+
+**Email:** jane@example.com
+
+## Experience
+
+### Acme | Data Engineer | 2020 - Present
+
+- Built Spark pipelines processing 2 TB of events per day
+- Migrated batch ETL jobs to Airflow on Kubernetes
+- Organised the office book club
+
+### Globex | Web Developer | 2015 - 2020
+
+- Developed React front ends for e-commerce clients
+- Maintained a PHP billing system
+
+## Publications
+
+- A survey of medieval manuscript restoration techniques
+- Notes on baroque music notation
+"""
+
+JOB = """# Senior Data Engineer
+
+We are looking for a data engineer with Spark, Airflow and Kubernetes experience
+to build and run large-scale ETL pipelines.
+"""
+
+
+class TestCVIndex(unittest.TestCase):
+    """Test cases for the CV index utility module."""
+    
+    def test_tokenize(self):
+        """Test that technology names survive tokenization and stopwords are dropped."""
+        self.assertEqual(tokenize("Expert in C++, C# and Node.js."), ["expert", "c++", "c#", "node.js"])
+    
+    def test_parse_cv(self):
+        """Test that bullets are indexed with their headings and the header is kept apart."""
+        index = parse_cv(CV)
+        
+        self.assertIn("# Jane Doe", index.header)
+        self.assertEqual(len(index.entries), 7)
+        first = index.entries[0]
+        self.assertEqual(first.text, "- Built Spark pipelines processing 2 TB of events per day")
+        self.assertEqual(first.headings, ["## Experience", "### Acme | Data Engineer | 2020 - Present"])
+        self.assertEqual(index.entries[-1].headings, ["## Publications"])
+    
+    def test_index_is_cached_by_content(self):
+        """Test that the same CV content is indexed only once."""
+        self.assertIs(get_cv_index(CV), get_cv_index(CV))
+    
+    def test_select_relevant(self):
+        """Test that the most relevant bullets are kept in order under their headings."""
+        excerpt = select_relevant(CV, JOB, top_k=2)
+        
+        self.assertTrue(excerpt.startswith("# Jane Doe"))
+        self.assertIn(
+            "### Acme | Data Engineer | 2020 - Present\n\n"
+            "- Built Spark pipelines processing 2 TB of events per day\n"
+            "- Migrated batch ETL jobs to Airflow on Kubernetes",
+            excerpt,
+        )
+        self.assertNotIn("book club", excerpt)
+        self.assertNotIn("Publications", excerpt)
+        
+        # Short CVs are sent whole
+        self.assertEqual(select_relevant(CV, JOB, top_k=10), CV)
+    
+    def test_letter_prompt_uses_excerpt(self):
+        """Test that the letter prompt carries the excerpt in the per-job message only."""
+        settings = Settings()
+        settings.letter_cv_top_k = 2
+        system_message, human_message = LetterPipeline(settings).build_cover_letter_messages(
+            CV, JOB, "Template", "Instructions", {"candidate_name": "Jane Doe", "company_name": "Acme"}, "Data Engineer"
+        )
+        
+        self.assertNotIn("Spark", system_message.content)
+        self.assertIn("Airflow on Kubernetes", human_message.content)
+        self.assertNotIn("baroque", human_message.content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,20 @@
 """
 Tests for the CV pipeline module.
 """
+import asyncio
+import time
 import unittest
 from pathlib import Path
 import tempfile
 import shutil
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from langchain_core.messages import AIMessageChunk, HumanMessage
 
 from app.config.settings import Settings
+from app.llm.client import close_clients
 from app.pipelines.cv import CVPipeline
+from app.utils.scoring import score_candidates
 
 
 class TestCVPipeline(unittest.TestCase):
@@ -20,6 +26,11 @@ class TestCVPipeline(unittest.TestCase):
         self.test_dir = tempfile.mkdtemp()
         self.test_dir_path = Path(self.test_dir)
         
+        # Keep LLM call telemetry out of the real logs directory
+        telemetry_file = patch("app.llm.telemetry.TELEMETRY_FILE", self.test_dir_path / "llm_calls.jsonl")
+        telemetry_file.start()
+        self.addCleanup(telemetry_file.stop)
+        
         # Create test directories
         self.templates_dir = self.test_dir_path / "templates" / "default"
         self.cv_dir = self.test_dir_path / "inputs" / "cvs"
@@ -56,17 +67,22 @@ class TestCVPipeline(unittest.TestCase):
         self.settings.templates_dir = self.test_dir_path / "templates"
         self.settings.inputs_dir = self.test_dir_path / "inputs"
         self.settings.outputs_dir = self.test_dir_path / "outputs"
+        self.settings.cache_dir = self.test_dir_path / "cache"
         self.settings.cv_dir = self.cv_dir
         self.settings.job_descriptions_dir = self.jd_dir
         self.settings.template_dir = "default"
     
     def tearDown(self):
         """Tear down test fixtures."""
+        # Drop the shared clients so mocked models do not leak into other tests
+        close_clients()
+        
         # Remove the temporary directory and its contents
         shutil.rmtree(self.test_dir)
     
-    @patch('app.pipelines.cv.ChatOpenAI')
-    def test_cv_pipeline(self, mock_chat_openai):
+    @patch.object(CVPipeline, 'extract_names', return_value={"candidate_name": "John Doe", "company_name": "Test Co"})
+    @patch('app.llm.client.ChatOpenAI')
+    def test_cv_pipeline(self, mock_chat_openai, mock_extract_names):
         """Test the CV pipeline execution."""
         # Mock the LLM response
         mock_model = MagicMock()
@@ -105,6 +121,153 @@ class TestCVPipeline(unittest.TestCase):
         human_message = call_args[1].content
         self.assertIn("# Test Job", human_message)
         self.assertIn("Required: Python, Testing", human_message)
+    
+    
+    @patch('app.llm.client.ChatOpenAI')
+    def test_cv_pipeline_async(self, mock_chat_openai):
+        """Test the async CV pipeline execution."""
+        # Mock the async LLM response
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "# John Doe\n\n## Skills\n\n- Python (Expert)"
+        mock_model.ainvoke = AsyncMock(return_value=mock_response)
+        mock_chat_openai.return_value = mock_model
+        
+        # Run pipeline with a name extraction that cannot use the local fast path
+        pipeline = CVPipeline(self.settings)
+        with patch.object(CVPipeline, 'aextract_names', AsyncMock(return_value={"candidate_name": "John Doe", "company_name": "Test Co"})) as mock_extract:
+            output_files = asyncio.run(pipeline.arun(str(self.cv_file), str(self.jd_file)))
+        
+        # Verify output files exist and were named from the extracted names
+        self.assertTrue(Path(output_files["markdown"]).exists())
+        self.assertIn("John Doe - cv (Test Co)", Path(output_files["markdown"]).name)
+        
+        # Verify extraction and generation were each called once, without the sync API
+        mock_extract.assert_awaited_once()
+        mock_model.ainvoke.assert_awaited_once()
+        mock_model.invoke.assert_not_called()
+        
+        # Verify the job description was sent to the LLM
+        human_message = mock_model.ainvoke.call_args[0][0][1].content
+        self.assertIn("Required: Python, Testing", human_message)
+    
+    @patch('app.llm.client.ChatOpenAI')
+    def test_cv_pipeline_streaming(self, mock_chat_openai):
+        """Test that a streamed CV is written progressively and replaced by the final output."""
+        chunks = ["# John Doe\n\n", "## Skills\n\n", "- Python (Expert)"]
+        partial_contents = []
+        stream_options = []
+        
+        async def astream(messages, **options):
+            stream_options.append(options)
+            for chunk in chunks:
+                # Record what has reached the partial file before each chunk
+                partial_files = list(self.outputs_dir.glob("*/cv/cv.partial.md"))
+                partial_contents.append(partial_files[0].read_text() if partial_files else None)
+                yield AIMessageChunk(content=chunk)
+        
+        mock_model = MagicMock()
+        mock_model.astream = astream
+        mock_chat_openai.return_value = mock_model
+        
+        self.settings.llm_streaming = True
+        pipeline = CVPipeline(self.settings)
+        with patch.object(CVPipeline, 'aextract_names', AsyncMock(return_value={"candidate_name": "John Doe", "company_name": "Test Co"})):
+            output_files = asyncio.run(pipeline.arun(str(self.cv_file), str(self.jd_file)))
+        
+        # Verify the partial file grew chunk by chunk while the CV was generated
+        self.assertEqual(partial_contents, ["", "# John Doe\n\n", "# John Doe\n\n## Skills\n\n"])
+        mock_model.ainvoke.assert_not_called()
+        
+        # Verify the completion was capped at the stage's output budget
+        self.assertEqual(stream_options, [{"max_tokens": self.settings.get_stage_config("tailoring").max_tokens}])
+        
+        # Verify the final output holds the whole CV and the partial file was removed
+        markdown_path = Path(output_files["markdown"])
+        self.assertEqual(markdown_path.read_text(), "".join(chunks))
+        self.assertFalse((markdown_path.parent / "cv.partial.md").exists())
+    
+    @patch('app.llm.client.ChatOpenAI')
+    def test_stage_models(self, mock_chat_openai):
+        """Test that name extraction and tailoring each use their stage's model settings."""
+        extraction_model = MagicMock()
+        extraction_model.invoke.return_value = MagicMock(content='{"candidate_name": "John Doe", "company_name": "Test Co"}')
+        tailoring_model = MagicMock()
+        tailoring_model.invoke.return_value = MagicMock(content="# John Doe")
+        mock_chat_openai.side_effect = lambda model, **kwargs: extraction_model if model == "gpt-4o-mini" else tailoring_model
+        
+        pipeline = CVPipeline(self.settings)
+        pipeline.extract_names("Skills: Python", "Required: Python")
+        pipeline.generate_tailored_cv("Skills: Python", "Required: Python", "# {{name}}", "")
+        
+        # Verify extraction went to the small model, with its own temperature and token limit
+        extraction = self.settings.get_stage_config("extraction")
+        tailoring = self.settings.get_stage_config("tailoring")
+        self.assertEqual((extraction.model, extraction.temperature), ("gpt-4o-mini", 0.1))
+        self.assertEqual((tailoring.model, tailoring.temperature), (self.settings.llm_model, self.settings.llm_temperature))
+        self.assertEqual(extraction_model.invoke.call_args[1], {"max_tokens": extraction.max_tokens})
+        self.assertEqual(tailoring_model.invoke.call_args[1], {"max_tokens": tailoring.max_tokens})
+    
+    def test_cv_pipeline_candidates(self):
+        """Test that several candidates are generated in one request, ranked, and all saved."""
+        self.settings.llm_model = "fake:latency=0s"
+        self.settings.llm_cache_enabled = False
+        self.settings.llm_candidates = 3
+        pipeline = CVPipeline(self.settings)
+        
+        with patch.object(CVPipeline, 'rank_candidates', wraps=pipeline.rank_candidates) as mock_rank:
+            with patch.object(CVPipeline, 'aextract_names', AsyncMock(return_value={"candidate_name": "John Doe", "company_name": "Test Co"})):
+                output_files = asyncio.run(pipeline.arun(str(self.cv_file), str(self.jd_file)))
+        
+        # Verify three distinct candidates were ranked and the best-scoring one was saved as the output
+        candidates = mock_rank.call_args[0][0]
+        self.assertEqual(len(set(candidates)), 3)
+        scores = score_candidates(candidates, "# Test Job\n\nRequired: Python, Testing", "# Test CV\n\nSkills: Python, Testing")
+        markdown_path = Path(output_files["markdown"])
+        self.assertEqual(markdown_path.read_text(), candidates[max(range(3), key=lambda index: scores[index].total)])
+        
+        # Verify the other candidates were saved alongside
+        alternatives = sorted(markdown_path.parent.glob("John Doe - cv (Test Co) (candidate *).md"))
+        self.assertEqual([path.name.rsplit(" ", 2)[-2:] for path in alternatives], [["(candidate", "2).md"], ["(candidate", "3).md"]])
+        saved = {markdown_path.read_text()} | {path.read_text() for path in alternatives}
+        self.assertEqual(saved, set(candidates))
+    
+    def test_empty_candidates(self):
+        """Test that an n request without choices falls back to one completion and ranking needs candidates."""
+        self.settings.llm_model = "fake:latency=0s"
+        self.settings.llm_cache_enabled = False
+        pipeline = CVPipeline(self.settings)
+        messages = [HumanMessage(content="Write a CV")]
+        
+        with patch.object(CVPipeline, '_candidate_call', return_value=lambda: []):
+            candidates = pipeline.invoke_llm_candidates(messages, stage="tailoring", count=3)
+        self.assertEqual(len(candidates), 1)
+        self.assertTrue(candidates[0])
+        
+        with self.assertRaises(ValueError):
+            pipeline.rank_candidates([], "# Test Job")
+    
+    def test_cv_pipeline_parallel_sections(self):
+        """Test that template sections are generated concurrently and assembled in order."""
+        self.template_file.write_text("# {{name}}\n\n## Summary\n\n{{summary}}\n\n## Skills\n\n{{skills}}\n\n## Experience\n\n{{experience}}")
+        self.settings.llm_model = "fake:latency=0.2s"
+        self.settings.llm_cache_enabled = False
+        self.settings.cv_parallel_sections = True
+        pipeline = CVPipeline(self.settings)
+        
+        started = time.perf_counter()
+        tailored_cv = asyncio.run(pipeline.agenerate_tailored_cv(
+            "# John Doe\n\nSkills: Python, Testing", "# Test Job\n\nRequired: Python", self.template_file.read_text(), ""
+        ))
+        elapsed = time.perf_counter() - started
+        
+        # Verify the four sections overlapped instead of taking four sequential calls
+        self.assertLess(elapsed, 0.6)
+        
+        # Verify the sections were assembled in template order without leftover placeholders
+        headings = [line for line in tailored_cv.splitlines() if line.startswith("#")]
+        self.assertEqual(headings, ["# John Doe", "## Summary", "## Skills", "## Experience"])
+        self.assertNotIn("{{", tailored_cv)
 
 
 if __name__ == "__main__":
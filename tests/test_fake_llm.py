@@ -0,0 +1,167 @@
+"""
+Tests for the fake LLM backend module.
+"""
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.config.settings import Settings
+from app.llm.client import close_clients, get_chat_model
+from app.llm.fake import FakeChatModel, is_fake_model, parse_duration, parse_fake_model
+from app.pipelines.letter import LetterPipeline
+
+
+class TestFakeModelSpec(unittest.TestCase):
+    """Test cases for parsing fake model names."""
+    
+    def test_is_fake_model(self):
+        """Only "fake" and "fake:<options>" select the fake backend."""
+        self.assertTrue(is_fake_model("fake"))
+        self.assertTrue(is_fake_model("fake:latency=2s"))
+        self.assertFalse(is_fake_model("gpt-4o"))
+        self.assertFalse(is_fake_model("fakemodel"))
+    
+    def test_parse_options(self):
+        """Durations accept seconds and milliseconds."""
+        self.assertEqual(parse_duration("2s"), 2.0)
+        self.assertEqual(parse_duration("250ms"), 0.25)
+        self.assertEqual(parse_duration("1.5"), 1.5)
+        self.assertEqual(
+            parse_fake_model("fake:latency=2s, jitter=0.5,ttft=300ms"),
+            {"latency": 2.0, "jitter": 0.5, "ttft": 0.3},
+        )
+        with self.assertRaises(ValueError):
+            parse_fake_model("fake:speed=fast")
+
+
+class TestFakeChatModel(unittest.TestCase):
+    """Test cases for the fake chat model."""
+    
+    def setUp(self):
+        """Set up a CV tailoring style prompt."""
+        self.messages = [
+            SystemMessage(content="Read the template:\n```\n# {{name}}\n\n## Skills\n\n{{skills}}\n```\n\n"
+                                  "Read the source cv:\n```\n# Jane Doe\n\nSkills: Python\n```\n"),
+            HumanMessage(content="Job Description:\n```\nPython developer\n```"),
+        ]
+    
+    def test_template_shaped_deterministic_output(self):
+        """The template is filled in, and the same prompt always gets the same answer."""
+        model = FakeChatModel.from_spec("fake:latency=0s")
+        response = model.invoke(self.messages)
+        self.assertTrue(response.content.startswith("# Jane Doe\n\n## Skills\n\n"))
+        self.assertNotIn("{{", response.content)
+        self.assertEqual(model.invoke(self.messages).content, response.content)
+        self.assertGreater(response.usage_metadata["output_tokens"], 0)
+    
+    def test_latency_and_streaming(self):
+        """Streaming waits for the first token and delivers the same content in chunks."""
+        model = FakeChatModel.from_spec("fake:latency=0.2s,ttft=0.1s")
+        start = time.monotonic()
+        chunks = []
+        first_token = None
+        for chunk in model.stream(self.messages):
+            if chunk.content and first_token is None:
+                first_token = time.monotonic() - start
+            chunks.append(chunk)
+        total = time.monotonic() - start
+        
+        self.assertGreaterEqual(first_token, 0.09)
+        self.assertGreaterEqual(total, 0.19)
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual("".join(chunk.content for chunk in chunks), model.invoke(self.messages).content)
+    
+    def test_jitter_is_bounded(self):
+        """Jittered latencies stay within the configured range."""
+        model = FakeChatModel.from_spec("fake:latency=1s,jitter=0.5")
+        for index in range(20):
+            ttft, total = model._delays([HumanMessage(content=f"prompt {index}")])
+            self.assertTrue(0.5 <= total <= 1.5)
+            self.assertLessEqual(ttft, total)
+    
+    def test_extraction_prompt_returns_json(self):
+        """Name extraction prompts get the names as JSON."""
+        messages = [
+            SystemMessage(content="Provide ONLY these two pieces of information in JSON format with keys "
+                                  "'candidate_name' and 'company_name'.\n\nCV:\n```\n# Jane Doe\n```\n"),
+            HumanMessage(content="Job Description:\n```\nAcme Corp is hiring a developer.\n```"),
+        ]
+        names = json.loads(FakeChatModel.from_spec("fake:latency=0s").invoke(messages).content)
+        self.assertEqual(names["candidate_name"], "Jane Doe")
+        self.assertIn("company_name", names)
+    
+    def test_async_invoke(self):
+        """The async API returns the same content as the sync API."""
+        model = FakeChatModel.from_spec("fake:latency=0.01s")
+        response = asyncio.run(model.ainvoke(self.messages))
+        self.assertEqual(response.content, model.invoke(self.messages).content)
+
+
+class TestFakeBackendPipeline(unittest.TestCase):
+    """Test cases for running a pipeline against the fake backend."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir_path = Path(tempfile.mkdtemp())
+        
+        # Keep LLM call telemetry out of the real logs directory
+        telemetry_file = patch("app.llm.telemetry.TELEMETRY_FILE", self.test_dir_path / "llm_calls.jsonl")
+        telemetry_file.start()
+        self.addCleanup(telemetry_file.stop)
+        templates_dir = self.test_dir_path / "templates" / "default"
+        cv_dir = self.test_dir_path / "inputs" / "cvs"
+        jd_dir = self.test_dir_path / "inputs" / "job_descriptions"
+        for directory in (templates_dir, cv_dir, jd_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        
+        self.cv_file = cv_dir / "test_cv.md"
+        self.jd_file = jd_dir / "test_job.md"
+        self.cv_file.write_text("# Jane Doe\n\n## Skills\n\n- Python\n- Testing")
+        self.jd_file.write_text("# Python Developer\n\nCompany: Acme Corp\n\nRequired: Python, Testing")
+        (templates_dir / "letter_template.md").write_text("[Current Date]\n\nDear Hiring Manager at [Company Name],\n\n{{body}}\n\n[Your Full Name]")
+        (templates_dir / "style.css").write_text("body { font-family: Arial; }")
+        
+        self.settings = Settings()
+        self.settings.base_dir = self.test_dir_path
+        self.settings.templates_dir = self.test_dir_path / "templates"
+        self.settings.inputs_dir = self.test_dir_path / "inputs"
+        self.settings.outputs_dir = self.test_dir_path / "outputs"
+        self.settings.cache_dir = self.test_dir_path / "cache"
+        self.settings.cv_dir = cv_dir
+        self.settings.job_descriptions_dir = jd_dir
+        self.settings.llm_cache_enabled = False
+        self.settings.llm_model = "fake:latency=0.05s"
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        close_clients()
+        shutil.rmtree(self.test_dir_path)
+    
+    def test_registry_returns_fake_model(self):
+        """The client registry serves fake model names without an HTTP pool."""
+        model = get_chat_model(self.settings, self.settings.llm_model, 0.3)
+        self.assertIsInstance(model, FakeChatModel)
+        self.assertIs(get_chat_model(self.settings, self.settings.llm_model, 0.3), model)
+        
+        # The fake model also replaces the models of stages that set their own
+        self.assertEqual(self.settings.get_stage_config("extraction").model, self.settings.llm_model)
+    
+    def test_letter_pipeline_runs_offline(self):
+        """A full pipeline run needs no API key and no mocks."""
+        output_files = asyncio.run(LetterPipeline(self.settings).arun(str(self.cv_file), str(self.jd_file)))
+        
+        content = Path(output_files["markdown"]).read_text()
+        self.assertIn("Jane Doe", content)
+        self.assertNotIn("{{body}}", content)
+        self.assertNotIn("[Company Name]", content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests for the job description cleaning utility module.
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.config.settings import Settings
+from app.pipelines.cv import CVPipeline
+from app.utils.jd_clean import clean_job_description, count_corpus_paragraphs, normalize_whitespace
+
+BLURB = (
+    "Acme Corp builds tools that help teams ship reliable software. Founded in 2010, "
+    "we serve thousands of customers around the world."
+)
+
+JOB = f"""# Backend Engineer
+
+## About Acme Corp
+
+{BLURB}
+
+## Requirements
+
+- Python   and SQL experience
+- Kubernetes
+
+
+
+## Benefits
+
+- Health insurance
+- Free lunch
+
+## How to apply
+
+Send us your CV.
+
+Acme Corp is an equal opportunity employer and considers applicants without regard to race, religion or age.
+"""
+
+
+class TestJDClean(unittest.TestCase):
+    """Test cases for the job description cleaning utility module."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_dir_path = Path(self.test_dir)
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        shutil.rmtree(self.test_dir)
+    
+    def test_normalize_whitespace(self):
+        """Test that spaces and blank lines are collapsed without touching indentation."""
+        text = "Title  here  \r\n\n\n\n  - nested   item\t\n"
+        self.assertEqual(normalize_whitespace(text), "Title here\n\n  - nested item\n")
+    
+    def test_removes_boilerplate(self):
+        """Test that benefits sections and equal-opportunity statements are removed."""
+        cleaned = clean_job_description(JOB)
+        
+        self.assertIn("- Python and SQL experience", cleaned)
+        self.assertIn("Send us your CV.", cleaned)
+        self.assertNotIn("Health insurance", cleaned)
+        self.assertNotIn("## Benefits", cleaned)
+        self.assertNotIn("equal opportunity", cleaned)
+        self.assertNotIn("\n\n\n", cleaned)
+    
+    def test_removes_only_boilerplate_sentences(self):
+        """Test that a job description without blank lines keeps its content around a legal sentence."""
+        job = (
+            "Backend Engineer\n"
+            "We build APIs in Python and Go. We are an equal opportunity employer.\n"
+            "You will own our billing services.\n"
+            "We provide reasonable accommodations during the interview process.\n"
+        )
+        cleaned = clean_job_description(job)
+        
+        self.assertIn("We build APIs in Python and Go.", cleaned)
+        self.assertIn("You will own our billing services.", cleaned)
+        self.assertNotIn("equal opportunity", cleaned)
+        self.assertNotIn("accommodations", cleaned)
+    
+    def test_keeps_content_sections_starting_with_boilerplate_words(self):
+        """Test that only headings that are boilerplate as a whole remove their section."""
+        job = (
+            "# Privacy Engineer\n\n"
+            "## Privacy Engineering Responsibilities\n\n- Build data deletion pipelines\n\n"
+            "## Legal and Compliance Knowledge\n\n- GDPR and CCPA\n\n"
+            "## Privacy Notice\n\nWe process applicant data as described in our policy.\n"
+        )
+        cleaned = clean_job_description(job)
+        
+        self.assertIn("Build data deletion pipelines", cleaned)
+        self.assertIn("GDPR and CCPA", cleaned)
+        self.assertNotIn("## Privacy Notice", cleaned)
+    
+    def test_falls_back_to_original_when_most_text_is_removed(self):
+        """Test that a job description is not cleaned away."""
+        job = "We are an equal opportunity employer and provide reasonable accommodations.\nApply now.\n"
+        
+        with self.assertLogs("app.utils.jd_clean", level="WARNING"):
+            cleaned = clean_job_description(job)
+        self.assertEqual(cleaned, job)
+    
+    def test_removes_paragraphs_repeated_across_corpus(self):
+        """Test that a blurb shared by enough job descriptions is removed."""
+        corpus = [JOB, JOB.replace("Backend", "Frontend"), JOB.replace("Backend", "Data")]
+        
+        self.assertIn(BLURB, clean_job_description(JOB, count_corpus_paragraphs(corpus[:2]), min_documents=3))
+        self.assertNotIn(BLURB, clean_job_description(JOB, count_corpus_paragraphs(corpus), min_documents=3))
+    
+    def test_pipeline_writes_cleaned_copy(self):
+        """Test that the pipeline prompts with the cleaned text but keeps the original for names."""
+        jd_dir = self.test_dir_path / "job_descriptions"
+        cv_dir = self.test_dir_path / "cvs"
+        jd_dir.mkdir()
+        cv_dir.mkdir()
+        (jd_dir / "backend.txt").write_text(JOB)
+        (cv_dir / "cv.md").write_text("# Jane Doe\n")
+        
+        settings = Settings()
+        settings.cv_dir = cv_dir
+        settings.job_descriptions_dir = jd_dir
+        context = CVPipeline(settings).create_context("cv.md", "backend.txt")
+        
+        cleaned_path = jd_dir / "cleaned" / "backend.txt"
+        self.assertTrue(cleaned_path.exists())
+        self.assertEqual(cleaned_path.read_text(), context.jd_content)
+        self.assertNotIn("Health insurance", context.jd_content)
+        self.assertEqual(context.jd_raw_content, JOB)
+
+
+if __name__ == "__main__":
+    unittest.main()
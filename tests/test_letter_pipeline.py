@@ -0,0 +1,107 @@
+"""
+Tests for the cover letter pipeline module.
+"""
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+
+from app.config.settings import Settings
+from app.llm.client import close_clients
+from app.pipelines.letter import LetterPipeline
+
+
+class TestLetterPipeline(unittest.TestCase):
+    """Test cases for the cover letter pipeline module."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        # Create a temporary directory for test files
+        self.test_dir = tempfile.mkdtemp()
+        self.test_dir_path = Path(self.test_dir)
+        
+        # Keep LLM call telemetry out of the real logs directory
+        telemetry_file = patch("app.llm.telemetry.TELEMETRY_FILE", self.test_dir_path / "llm_calls.jsonl")
+        telemetry_file.start()
+        self.addCleanup(telemetry_file.stop)
+        
+        # Create test directories
+        self.templates_dir = self.test_dir_path / "templates" / "default"
+        self.cv_dir = self.test_dir_path / "inputs" / "cvs"
+        self.jd_dir = self.test_dir_path / "inputs" / "job_descriptions"
+        self.outputs_dir = self.test_dir_path / "outputs"
+        
+        self.templates_dir.mkdir(parents=True, exist_ok=True)
+        self.cv_dir.mkdir(parents=True, exist_ok=True)
+        self.jd_dir.mkdir(parents=True, exist_ok=True)
+        self.outputs_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Create test files
+        self.cv_file = self.cv_dir / "test_cv.md"
+        self.jd_file = self.jd_dir / "test_job.txt"
+        
+        # Write test content
+        with open(self.cv_file, 'w') as f:
+            f.write("# Jane Doe\n\nSkills: Python, Testing")
+        
+        with open(self.jd_file, 'w') as f:
+            f.write("# Senior Tester\n\nRequired: Python, Testing")
+        
+        with open(self.templates_dir / "letter_template.md", 'w') as f:
+            f.write("[Current Date]\n\nDear [Hiring Manager's Name],\n\n[Your Full Name]")
+        
+        # Create test settings
+        self.settings = Settings()
+        self.settings.base_dir = self.test_dir_path
+        self.settings.templates_dir = self.test_dir_path / "templates"
+        self.settings.inputs_dir = self.test_dir_path / "inputs"
+        self.settings.outputs_dir = self.test_dir_path / "outputs"
+        self.settings.cache_dir = self.test_dir_path / "cache"
+        self.settings.cv_dir = self.cv_dir
+        self.settings.job_descriptions_dir = self.jd_dir
+        self.settings.template_dir = "default"
+    
+    def tearDown(self):
+        """Tear down test fixtures."""
+        # Drop the shared clients so mocked models do not leak into other tests
+        close_clients()
+        
+        # Remove the temporary directory and its contents
+        shutil.rmtree(self.test_dir)
+    
+    @patch.object(LetterPipeline, 'extract_names', return_value={"candidate_name": "Jane Doe", "company_name": "Test Co"})
+    @patch('app.llm.client.ChatOpenAI')
+    def test_letter_pipeline(self, mock_chat_openai, mock_extract_names):
+        """Test the letter pipeline execution."""
+        # Mock the LLM response
+        mock_model = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "October 15, 2026\n\nDear Hiring Manager,\n\nJane Doe"
+        mock_model.invoke.return_value = mock_response
+        mock_chat_openai.return_value = mock_model
+        
+        # Create and run pipeline
+        pipeline = LetterPipeline(self.settings)
+        output_files = pipeline.run(str(self.cv_file), str(self.jd_file))
+        
+        # Verify output files exist
+        self.assertTrue(Path(output_files["markdown"]).exists())
+        self.assertIn("Jane Doe - cover letter (Test Co)", Path(output_files["markdown"]).name)
+        
+        # Verify names were extracted only once for the whole run
+        mock_extract_names.assert_called_once()
+        
+        # Verify the extracted facts were passed to the LLM
+        mock_model.invoke.assert_called_once()
+        system_message, human_message = [message.content for message in mock_model.invoke.call_args[0][0]]
+        self.assertIn("Test Co", human_message)
+        self.assertIn("Senior Tester", human_message)
+        
+        # Verify per-job facts stay out of the cacheable system prefix
+        self.assertNotIn("Test Co", system_message)
+        self.assertNotIn("Senior Tester", system_message)
+
+
+if __name__ == "__main__":
+    unittest.main()
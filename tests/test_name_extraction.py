@@ -0,0 +1,94 @@
+"""
+Tests for the name extraction utility module.
+"""
+import unittest
+
+from app.utils.name_extraction import extract_candidate_name, extract_company_name, extract_names_locally
+
+
+class TestNameExtraction(unittest.TestCase):
+    """Test cases for the name extraction utility module."""
+    
+    def test_candidate_from_heading(self):
+        """Test extracting the candidate name from the first markdown heading."""
+        name, confidence = extract_candidate_name("# Jane Doe\n\n**Email:** jane@example.com")
+        
+        self.assertEqual(name, "Jane Doe")
+        self.assertGreaterEqual(confidence, 0.9)
+    
+    def test_candidate_from_heading_with_title(self):
+        """Test extracting the candidate name from headings with a job title."""
+        name, _ = extract_candidate_name("# Jane Doe - Senior Engineer\n\nSummary")
+        self.assertEqual(name, "Jane Doe")
+        
+        name, _ = extract_candidate_name("# Curriculum Vitae\n\nJane Doe\n\nSummary")
+        self.assertEqual(name, "Jane Doe")
+    
+    def test_candidate_ignores_job_title_headings(self):
+        """Test that job-title headings are not taken as candidate names."""
+        for heading in ["# Senior Software Engineer", "# Machine Learning Engineer", "# Product Manager"]:
+            self.assertEqual(extract_candidate_name(heading + "\n\nSummary"), (None, 0.0))
+    
+    def test_candidate_needs_corroboration_to_be_confident(self):
+        """Test that a heading alone scores below the fast-path threshold and a matching email raises it."""
+        _, alone = extract_candidate_name("# Jane Doe\n\nSummary")
+        _, corroborated = extract_candidate_name("# Jane Doe\n\njane.doe@gmail.com")
+        
+        self.assertLess(alone, 0.8)
+        self.assertGreaterEqual(corroborated, 0.8)
+    
+    def test_candidate_not_found(self):
+        """Test that a CV without a recognizable name yields no confident result."""
+        name, confidence = extract_candidate_name("## Experience\n\n- Built 3 systems")
+        
+        self.assertIsNone(name)
+        self.assertEqual(confidence, 0.0)
+    
+    def test_company_patterns(self):
+        """Test extracting the company name from common job description patterns."""
+        self.assertEqual(extract_company_name("# Engineer\n\n## About TechForward\n\nText")[0], "TechForward")
+        self.assertEqual(extract_company_name("Acme Corp is hiring a data engineer.")[0], "Acme Corp")
+        self.assertEqual(extract_company_name("Company: Umbrella Ltd")[0], "Umbrella Ltd")
+    
+    def test_company_ignores_generic_phrases(self):
+        """Test that generic headings and email domains are not taken as company names."""
+        name, confidence = extract_company_name("## About Us\n\n## About The Role\n\nApply: jobs@gmail.com")
+        
+        self.assertIsNone(name)
+        self.assertEqual(confidence, 0.0)
+        
+        for heading in ["# About This Job", "## About Our Client", "About Benefits"]:
+            self.assertEqual(extract_company_name(heading + "\n\nText"), (None, 0.0))
+    
+    def test_company_from_email_domain(self):
+        """Test that a corporate email domain gives a low-confidence guess and corroborates patterns."""
+        name, confidence = extract_company_name("Send your CV to careers@initech.com")
+        self.assertEqual(name, "Initech")
+        self.assertLess(confidence, 0.8)
+        
+        _, corroborated = extract_company_name("Join Initech today. Send your CV to careers@initech.com")
+        _, alone = extract_company_name("Join Initech today.")
+        self.assertGreater(corroborated, alone)
+        
+        self.assertEqual(extract_company_name("Apply at jobs@acme.co.uk")[0], "Acme")
+        self.assertEqual(extract_company_name("Apply at careers@uni.ac.jp")[0], "Uni")
+    
+    def test_company_needs_corroboration_to_be_confident(self):
+        """Test that a single pattern scores below the fast-path threshold and a second source raises it."""
+        _, alone = extract_company_name("## About TechForward\n\nText")
+        _, corroborated = extract_company_name("## About TechForward\n\nTechForward is hiring engineers.")
+        
+        self.assertLess(alone, 0.8)
+        self.assertGreaterEqual(corroborated, 0.8)
+    
+    def test_extract_names_locally(self):
+        """Test the combined extraction and its overall confidence."""
+        guess = extract_names_locally("# John Doe\n", "## About TechForward\n")
+        
+        self.assertEqual(guess.candidate_name, "John Doe")
+        self.assertEqual(guess.company_name, "TechForward")
+        self.assertEqual(guess.confidence, min(guess.candidate_confidence, guess.company_confidence))
+
+
+if __name__ == "__main__":
+    unittest.main()
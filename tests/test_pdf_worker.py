@@ -0,0 +1,96 @@
+"""
+Tests for the PDF rendering worker module.
+"""
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from app.utils.pdf_worker import PDFRenderWorker, PDFWorkerPool, WeasyPrintRenderer
+
+
+class FakeRenderer:
+    """Renderer writing the process id instead of a PDF (created in the worker process)."""
+    
+    def __init__(self):
+        self.documents = 0
+    
+    def render(self, html_content, output_path, css=None):
+        if "fail" in html_content:
+            raise ValueError("bad page")
+        if "hang" in html_content:
+            time.sleep(60)
+        if "slow" in html_content:
+            time.sleep(1)
+        self.documents += 1
+        Path(output_path).write_text(f"{os.getpid()} {self.documents} {css}", encoding="utf-8")
+        return Path(output_path)
+
+
+class TestPDFRenderWorker(unittest.TestCase):
+    """Test cases for the PDF worker process lifecycle."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.temp_dir.name)
+        self.worker = PDFRenderWorker(max_documents=2, timeout=3.0, renderer_factory=FakeRenderer)
+    
+    def tearDown(self):
+        self.worker.close()
+        self.temp_dir.cleanup()
+    
+    def render(self, name, html="<p>ok</p>"):
+        path = self.worker.render(html, self.output_dir / f"{name}.pdf", "p { color: red; }")
+        return path.read_text(encoding="utf-8").split(" ", 2)
+    
+    def test_recycles_after_max_documents(self):
+        """One process renders max_documents documents, then a new one takes over."""
+        first = self.render("a")
+        second = self.render("b")
+        third = self.render("c")
+        self.assertEqual(first[0], second[0])
+        self.assertEqual((first[1], second[1]), ("1", "2"))
+        self.assertNotEqual(third[0], first[0])
+        self.assertEqual(third[1:], ["1", "p { color: red; }"])
+    
+    def test_errors_and_timeouts(self):
+        """Rendering errors are raised; a hanging job is killed and the worker recovers."""
+        with self.assertRaisesRegex(RuntimeError, "bad page"):
+            self.render("fail", "fail")
+        with self.assertRaises(TimeoutError):
+            self.render("hang", "hang")
+        self.assertIsNone(self.worker.process)
+        self.assertEqual(self.render("ok")[1], "1")
+    
+    
+    def test_pool_renders_concurrently(self):
+        """Documents saved at the same time are rendered by different worker processes."""
+        pool = PDFWorkerPool(workers=2, timeout=10.0, renderer_factory=FakeRenderer)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                paths = list(executor.map(
+                    lambda name: pool.render("<p>slow</p>", self.output_dir / f"{name}.pdf"), ["cv", "letter"]
+                ))
+        finally:
+            pool.close()
+        
+        pids = {path.read_text(encoding="utf-8").split(" ")[0] for path in paths}
+        self.assertEqual(len(pids), 2)
+    
+    def test_weasyprint_css_is_inlined(self):
+        """The CSS reaches WeasyPrint as an inline author <style>, as in the saved HTML file."""
+        weasyprint = MagicMock()
+        with patch("app.utils.pdf_worker.weasyprint", weasyprint, create=True), \
+                patch("app.utils.pdf_worker.FontConfiguration", MagicMock(), create=True):
+            WeasyPrintRenderer().render("<html><head></head><body></body></html>", self.output_dir / "a.pdf", "h1 { color: red; }")
+        
+        page = weasyprint.HTML.call_args.kwargs["string"]
+        self.assertIn("<style>\nh1 { color: red; }\n</style>\n</head>", page)
+        self.assertNotIn("stylesheets", weasyprint.HTML.return_value.write_pdf.call_args.kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
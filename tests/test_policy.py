@@ -0,0 +1,216 @@
+"""
+Tests for the LLM call policy module.
+"""
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import httpx
+
+from app.llm.policy import CallPolicy, Deadline, DeadlineExceeded, LatencyTracker, is_retryable, latency_tracker
+from app.llm.ratelimit import RateLimiter
+
+
+def make_rate_limit_error(headers):
+    """Create an exception that looks like an HTTP 429 from the LLM client."""
+    error = Exception("Rate limit reached")
+    error.status_code = 429
+    error.response = MagicMock(headers=headers)
+    return error
+
+
+def make_server_error(status_code=503):
+    """Create an exception that looks like an HTTP 5xx from the LLM client."""
+    error = Exception("Service unavailable")
+    error.status_code = status_code
+    return error
+
+
+def make_policy(**kwargs):
+    """Create a policy with short timeouts and no backoff jitter."""
+    options = {
+        "attempt_timeout": 1.0,
+        "max_retries": 2,
+        "rate_limit_retries": 3,
+        "backoff_base": 0.01,
+        "backoff_max": 0.05,
+        "jitter": 0.0,
+    }
+    options.update(kwargs)
+    return CallPolicy(**options)
+
+
+class TestCallPolicy(unittest.TestCase):
+    """Test cases for the LLM call policy module."""
+    
+    def setUp(self):
+        """Set up an unrestricted rate limiter."""
+        self.limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=8)
+    
+    def test_backoff_is_exponential_and_capped(self):
+        """Test that the backoff doubles per attempt, stays capped and is jittered downwards."""
+        policy = make_policy(backoff_base=1.0, backoff_max=5.0)
+        self.assertEqual([policy.backoff(attempt) for attempt in range(4)], [1.0, 2.0, 4.0, 5.0])
+        
+        jittered = make_policy(backoff_base=1.0, backoff_max=5.0, jitter=0.5)
+        for _ in range(20):
+            self.assertTrue(0.5 <= jittered.backoff(0) <= 1.0)
+    
+    def test_is_retryable(self):
+        """Test which errors are retried by the policy."""
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertTrue(is_retryable(make_server_error(503)))
+        self.assertFalse(is_retryable(make_server_error(400)))
+        self.assertFalse(is_retryable(ValueError("Bad request")))
+        self.assertFalse(is_retryable(DeadlineExceeded()))
+    
+    def test_retries_server_errors(self):
+        """Test that server errors are retried with backoff."""
+        call = MagicMock(side_effect=[make_server_error(), make_server_error(), "response"])
+        
+        result = make_policy().call(call, self.limiter, tokens=10, key=("test", "retry"))
+        
+        self.assertEqual(result.response, "response")
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual(self.limiter.in_flight, 0)
+    
+    def test_failed_call_reports_attempts(self):
+        """Test that the error a call gives up on carries the number of requests made."""
+        call = MagicMock(side_effect=make_server_error())
+        
+        with self.assertRaises(Exception) as raised:
+            make_policy(max_retries=2).call(call, self.limiter, tokens=10, key=("test", "attempts"))
+        self.assertEqual(raised.exception.attempts, 3)
+    
+    def test_does_not_retry_other_errors(self):
+        """Test that client errors are raised immediately."""
+        call = MagicMock(side_effect=ValueError("Bad request"))
+        
+        with self.assertRaises(ValueError):
+            make_policy().call(call, self.limiter, tokens=10, key=("test", "no-retry"))
+        self.assertEqual(call.call_count, 1)
+    
+    def test_retries_rate_limit_errors(self):
+        """Test that calls are retried after a 429, honouring Retry-After."""
+        call = MagicMock(side_effect=[make_rate_limit_error({"retry-after": "0.2"}), "response"])
+        
+        started = time.monotonic()
+        result = make_policy().call(call, self.limiter, tokens=10, key=("test", "429"))
+        
+        self.assertEqual(result.response, "response")
+        self.assertEqual(call.call_count, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(self.limiter.stats["rate_limited"], 1)
+    
+    def test_client_timeout_is_retried(self):
+        """Test that a sync attempt ended by the client's timeout is retried."""
+        call = MagicMock(side_effect=[httpx.ReadTimeout("Read timed out"), "response"])
+        
+        result = make_policy().call(call, self.limiter, tokens=10, key=("test", "timeout"))
+        
+        self.assertEqual(result.response, "response")
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(self.limiter.in_flight, 0)
+    
+    def test_async_attempt_timeout(self):
+        """Test that a hung async attempt is cancelled and retried."""
+        calls = []
+        
+        async def call():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(0.5)
+            return "response"
+        
+        result = asyncio.run(make_policy(attempt_timeout=0.1).acall(call, self.limiter, tokens=10, key=("test", "async-timeout")))
+        
+        self.assertEqual(result.response, "response")
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(self.limiter.in_flight, 0)
+    
+    def test_rate_limit_pause_grows_without_retry_after(self):
+        """Test that the limiter pause doubles with each rate limit error lacking Retry-After."""
+        limiter = MagicMock()
+        call = MagicMock(side_effect=[make_rate_limit_error({}), make_rate_limit_error({}), "response"])
+        
+        make_policy().call(call, limiter, tokens=10, key=("test", "429-backoff"))
+        
+        pauses = [kwargs["retry_after"] for _, kwargs in limiter.release.call_args_list if kwargs.get("rate_limited")]
+        self.assertEqual(pauses, [1.0, 2.0])
+    
+    def test_deadline_exceeded(self):
+        """Test that no attempt is made once the run deadline has passed."""
+        call = MagicMock(return_value="response")
+        deadline = Deadline(0.0)
+        
+        with self.assertRaises(DeadlineExceeded):
+            make_policy().call(call, self.limiter, tokens=10, key=("test", "deadline"), deadline=deadline)
+        call.assert_not_called()
+    
+    def test_hedged_request_wins(self):
+        """Test that a duplicate request is sent once the first exceeds the p95 latency."""
+        key = ("test", "hedge")
+        for _ in range(5):
+            latency_tracker.record(key, 0.05)
+        calls = []
+        
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return "slow"
+            return "fast"
+        
+        policy = make_policy(hedging=True, hedge_min_samples=5)
+        result = policy.call(call, self.limiter, tokens=10, key=key)
+        
+        self.assertEqual(result.response, "fast")
+        self.assertTrue(result.hedged)
+    
+    def test_async_hedged_request_wins(self):
+        """Test that the async variant hedges slow requests and cancels the loser."""
+        key = ("test", "async-hedge")
+        for _ in range(5):
+            latency_tracker.record(key, 0.05)
+        calls = []
+        
+        async def call():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(0.5)
+                return "slow"
+            return "fast"
+        
+        policy = make_policy(hedging=True, hedge_min_samples=5)
+        result = asyncio.run(policy.acall(call, self.limiter, tokens=10, key=key))
+        
+        self.assertEqual(result.response, "fast")
+        self.assertTrue(result.hedged)
+        self.assertEqual(self.limiter.in_flight, 0)
+    
+    def test_async_gives_up_after_max_retries(self):
+        """Test that async calls stop retrying rate limit errors after the configured retries."""
+        attempts = []
+        
+        async def call():
+            attempts.append(1)
+            raise make_rate_limit_error({"retry-after-ms": "10"})
+        
+        with self.assertRaises(Exception):
+            asyncio.run(make_policy(rate_limit_retries=2).acall(call, self.limiter, tokens=10, key=("test", "async-429")))
+        self.assertEqual(len(attempts), 3)
+    
+    def test_latency_percentile(self):
+        """Test that percentiles need a minimum number of samples."""
+        tracker = LatencyTracker()
+        key = ("stage", "model")
+        for latency in range(1, 21):
+            tracker.record(key, float(latency))
+        
+        self.assertIsNone(tracker.percentile(key, 95, min_samples=50))
+        self.assertEqual(tracker.percentile(key, 95, min_samples=20), 19.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
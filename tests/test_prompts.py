@@ -0,0 +1,71 @@
+"""
+Tests for the prompt building module.
+"""
+import unittest
+
+from langchain_core.messages import AIMessage
+
+from app.config.settings import Settings
+from app.llm.prompts import PromptBuilder, get_cached_tokens, normalize_text, record_prompt_cache_usage
+from app.pipelines.letter import LetterPipeline
+
+
+class TestPrompts(unittest.TestCase):
+    """Test cases for the prompt building module."""
+    
+    def test_prefix_is_byte_identical_across_jobs(self):
+        """Test that letter prompts for two jobs share the same system message."""
+        pipeline = LetterPipeline(Settings())
+        cv = "# Jane Doe\r\n\r\nSkills: Python   \n"
+        
+        first = pipeline.build_cover_letter_messages(
+            cv, "Job one at Alpha", "Template", "Instructions",
+            {"candidate_name": "Jane Doe", "company_name": "Alpha"}, "Engineer"
+        )
+        second = pipeline.build_cover_letter_messages(
+            cv.replace("\r\n", "\n"), "Job two at Beta", "Template", "Instructions",
+            {"candidate_name": "Jane Doe", "company_name": "Beta"}, "Tester"
+        )
+        
+        self.assertEqual(first[0].content, second[0].content)
+        self.assertIn("Job one at Alpha", first[1].content)
+        self.assertIn("Beta", second[1].content)
+        self.assertNotIn("Alpha", first[0].content)
+    
+    def test_builder_layout(self):
+        """Test that shared sections form the system message and job sections the human message."""
+        prompt = PromptBuilder("Role.")
+        prompt.add_document("Template:", "T  \n")
+        prompt.add_job_document("Job:", "J")
+        system_message, human_message = prompt.build()
+        
+        self.assertEqual(system_message.content, "Role.\n\nTemplate:\n```\nT\n```\n")
+        self.assertEqual(human_message.content, "Job:\n```\nJ\n```")
+        self.assertEqual(len(prompt.prefix_hash), 12)
+    
+    def test_normalize_text(self):
+        """Test that line endings and trailing whitespace are normalized."""
+        self.assertEqual(normalize_text("  a \r\nb\t\r\n\n"), "a\nb")
+    
+    def test_cached_tokens(self):
+        """Test that cached token counts are read from the response usage metadata."""
+        response = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 2000,
+                "output_tokens": 100,
+                "total_tokens": 2100,
+                "input_token_details": {"cache_read": 1536},
+            },
+        )
+        self.assertEqual(get_cached_tokens(response), 1536)
+        self.assertEqual(record_prompt_cache_usage(response), {"input_tokens": 2000, "cached_tokens": 1536})
+        
+        # Raw OpenAI usage blocks are supported too
+        legacy = AIMessage(content="", response_metadata={"token_usage": {"prompt_tokens_details": {"cached_tokens": 1024}}})
+        self.assertEqual(get_cached_tokens(legacy), 1024)
+        self.assertIsNone(get_cached_tokens(AIMessage(content="")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for the LLM rate limiting module.
+"""
+import email.utils
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from app.llm.ratelimit import (
+    RateLimiter,
+    TokenBucket,
+    get_retry_after,
+)
+
+
+def make_rate_limit_error(headers):
+    """Create an exception that looks like an HTTP 429 from the LLM client."""
+    error = Exception("Rate limit reached")
+    error.status_code = 429
+    error.response = MagicMock(headers=headers)
+    return error
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the LLM rate limiting module."""
+    
+    def test_token_bucket(self):
+        """Test that the bucket allows a burst and then reports the refill time."""
+        bucket = TokenBucket(rate_per_minute=60)
+        now = bucket.updated
+        
+        self.assertEqual(bucket.wait_time(60, now), 0.0)
+        bucket.consume(60)
+        
+        # One token per second is refilled
+        self.assertAlmostEqual(bucket.wait_time(2, now), 2.0, places=3)
+        self.assertEqual(bucket.wait_time(2, now + 2.0), 0.0)
+    
+    def test_get_retry_after(self):
+        """Test parsing the Retry-After headers of rate limit errors."""
+        self.assertEqual(get_retry_after(make_rate_limit_error({"retry-after": "3"})), 3.0)
+        self.assertEqual(get_retry_after(make_rate_limit_error({"retry-after-ms": "250"})), 0.25)
+        self.assertEqual(get_retry_after(make_rate_limit_error({})), 0.0)
+        self.assertEqual(get_retry_after(make_rate_limit_error({"retry-after": "soon"})), 0.0)
+        
+        # HTTP dates are converted to the seconds left
+        retry_date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        self.assertAlmostEqual(get_retry_after(make_rate_limit_error({"retry-after": retry_date})), 30.0, delta=2.0)
+        self.assertIsNone(get_retry_after(ValueError("Not a rate limit error")))
+    
+    def test_aimd_concurrency(self):
+        """Test that 429s halve the concurrency limit and successes raise it again."""
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=8)
+        
+        limiter.acquire(10)
+        limiter.release(rate_limited=True, retry_after=0.0)
+        self.assertEqual(limiter.concurrency_limit, 4.0)
+        
+        limiter.acquire(10)
+        limiter.release()
+        self.assertAlmostEqual(limiter.concurrency_limit, 4.25)
+        
+        # Other failures leave the limit unchanged
+        limiter.acquire(10)
+        limiter.release(failed=True)
+        self.assertAlmostEqual(limiter.concurrency_limit, 4.25)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
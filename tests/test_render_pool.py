@@ -0,0 +1,83 @@
+"""
+Tests for the PDF rendering stage module.
+"""
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from app.config.settings import Settings
+from app.pipelines.cv import CVPipeline
+from app.utils.render_pool import RenderStage
+
+
+def fake_render(markdown_content, css, output_dir, base_name):
+    """Render stand-in run in the worker processes: slow, and failing on request."""
+    time.sleep(0.3)
+    if "fail" in markdown_content:
+        raise RuntimeError("Failed to generate PDF using any available method")
+    paths = {"markdown": output_dir / f"{base_name}.md", "pdf": output_dir / f"{base_name}.pdf"}
+    paths["markdown"].write_text(markdown_content, encoding="utf-8")
+    paths["pdf"].write_text(f"{os.getpid()} {css}", encoding="utf-8")
+    return paths
+
+
+class TestRenderStage(unittest.TestCase):
+    """Test cases for background rendering in worker processes."""
+    
+    @classmethod
+    def setUpClass(cls):
+        settings = Settings()
+        settings.render_workers = 2
+        cls.stage = RenderStage(settings, fake_render)
+        # Start the worker processes before timing anything
+        for future in [cls.stage.submit("warm up", None, Path(tempfile.gettempdir()), f"warm-{n}") for n in range(2)]:
+            future.result()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.stage.shutdown()
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.temp_dir.name)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_jobs_render_in_parallel(self):
+        """Jobs run in separate worker processes and return their paths through futures."""
+        started = time.perf_counter()
+        futures = [self.stage.submit(f"# Doc {n}", "h1 {}", self.output_dir, f"doc{n}") for n in range(2)]
+        results = [future.result(timeout=10) for future in futures]
+        self.assertLess(time.perf_counter() - started, 0.55)
+        
+        pids = {result["pdf"].read_text(encoding="utf-8").split(" ")[0] for result in results}
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(str(os.getpid()), pids)
+        self.assertEqual(results[1]["markdown"].read_text(encoding="utf-8"), "# Doc 1")
+    
+    def test_pipeline_defers_rendering(self):
+        """save_output() returns at once and wait_for_renders() raises rendering errors."""
+        pipeline = CVPipeline(Settings())
+        pipeline.render_stage = self.stage
+        
+        started = time.perf_counter()
+        paths = pipeline.save_output("# Jane Doe", self.output_dir, "cv")
+        self.assertLess(time.perf_counter() - started, 0.2)
+        self.assertEqual(paths["pdf"], self.output_dir / "cv.pdf")
+        self.assertEqual(len(pipeline.pending_renders), 1)
+        
+        asyncio.run(pipeline.wait_for_renders())
+        self.assertTrue(paths["pdf"].exists())
+        self.assertEqual(pipeline.pending_renders, [])
+        
+        pipeline.save_output("fail", self.output_dir, "broken")
+        with self.assertRaisesRegex(RuntimeError, "Failed to generate PDF"):
+            asyncio.run(pipeline.wait_for_renders())
+
+
+if __name__ == "__main__":
+    unittest.main()
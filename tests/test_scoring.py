@@ -0,0 +1,47 @@
+"""
+Tests for the candidate scoring module.
+"""
+import unittest
+
+from app.utils.scoring import find_placeholders, jd_keywords, keyword_coverage, length_score, score_candidates
+
+
+class TestScoring(unittest.TestCase):
+    """Test cases for local candidate scoring."""
+    
+    def test_keywords_supported_by_source(self):
+        """Keywords are limited to those the source document supports."""
+        jd = "We need Python, Django and Kubernetes experience. Python is a must."
+        self.assertIn("kubernetes", jd_keywords(jd))
+        self.assertEqual(jd_keywords(jd, "Python and Django developer"), {"python", "django"})
+    
+    def test_coverage_and_length(self):
+        """Coverage counts keywords present; length compares against the expected size."""
+        self.assertEqual(keyword_coverage("Built Python services", {"python", "django"}), 0.5)
+        self.assertEqual(keyword_coverage("anything", set()), 1.0)
+        self.assertEqual(length_score("x" * 50, 100), 0.5)
+        self.assertEqual(length_score("x" * 200, 100), 0.5)
+        self.assertEqual(length_score("", 100), 0.0)
+    
+    def test_placeholders(self):
+        """Template placeholders are found, markdown links are not."""
+        content = "[Current Date]\n\nDear {{ manager }},\n\nSee [my portfolio](https://example.com)."
+        self.assertEqual(find_placeholders(content), ["[Current Date]", "{{ manager }}"])
+    
+    def test_best_candidate_scores_highest(self):
+        """A complete, relevant candidate beats leaky and off-topic ones."""
+        jd = "Senior Python engineer with Django and PostgreSQL."
+        cv = "Python developer. Django, PostgreSQL, Redis."
+        candidates = [
+            "# {{name}}\n\nWorked at [Company Name] with Python.",
+            "# Jane Doe\n\nPython engineer building Django services on PostgreSQL.",
+            "# Jane Doe\n\nEnjoys hiking and photography on weekends.",
+        ]
+        scores = score_candidates(candidates, jd, cv)
+        self.assertEqual(max(range(3), key=lambda index: scores[index].total), 1)
+        self.assertEqual(scores[0].placeholders, 2)
+        self.assertEqual(scores[1].coverage, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
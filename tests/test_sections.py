@@ -0,0 +1,54 @@
+"""
+Tests for the markdown section utilities module.
+"""
+import unittest
+
+from app.utils.sections import TemplateSection, assemble_sections, normalize_section, split_sections
+
+
+TEMPLATE = """# FULL NAME
+
+**Email:** you@example.com
+
+## SUMMARY
+
+{{summary}}
+
+## EXPERIENCE
+
+### COMPANY | Title
+
+* Achievement
+"""
+
+
+class TestSections(unittest.TestCase):
+    """Test cases for splitting, normalizing and assembling sections."""
+    
+    def test_split_sections(self):
+        """The header and each ## section are split apart; ### headings stay inside their section."""
+        sections = split_sections(TEMPLATE)
+        self.assertEqual([section.name for section in sections], ["header", "SUMMARY", "EXPERIENCE"])
+        self.assertTrue(sections[0].text.startswith("# FULL NAME"))
+        self.assertIn("### COMPANY | Title", sections[2].text)
+        self.assertEqual([section.name for section in split_sections("No headings")], ["header"])
+    
+    def test_normalize_section(self):
+        """Fences, spill-over into later sections and missing headings are fixed."""
+        section = TemplateSection("SKILLS", "## SKILLS\n\n* Skill")
+        self.assertEqual(normalize_section("```markdown\n## Skills\n\n* Python\n```", section), "## SKILLS\n\n* Python")
+        self.assertEqual(normalize_section("* Python\n\n## EDUCATION\n\n* MSc", section), "## SKILLS\n\n* Python")
+        self.assertEqual(normalize_section("OMIT", section), "")
+        self.assertEqual(normalize_section("## SKILLS\n\nOMIT", section), "")
+        
+        header = TemplateSection(None, "# FULL NAME")
+        self.assertEqual(normalize_section("# Jane Doe\n\n## SUMMARY\n\nText", header), "# Jane Doe")
+    
+    def test_assemble_sections(self):
+        """Sections are joined with single blank lines and empty ones are dropped."""
+        document = assemble_sections(["# Jane Doe", "", "## SUMMARY\n\n\n\nText"])
+        self.assertEqual(document, "# Jane Doe\n\n## SUMMARY\n\nText\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for the LLM telemetry module.
+"""
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.config.settings import Settings
+from app.llm.policy import CallResult
+from app.llm.telemetry import estimate_cost, get_model_price, load_records, make_record, parse_window, percentile, record_call, summarize
+from app.pipelines.cv import CVPipeline
+
+
+class TestTelemetry(unittest.TestCase):
+    """Test cases for per-call LLM telemetry."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "llm_calls.jsonl"
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_prices_and_cost(self):
+        """Dated model versions use their base model's price; cached tokens are cheaper."""
+        self.assertEqual(get_model_price("gpt-4o-mini-2024-07-18"), get_model_price("gpt-4o-mini"))
+        self.assertNotEqual(get_model_price("gpt-4o-2024-08-06"), get_model_price("gpt-4o-mini"))
+        self.assertIsNone(get_model_price("llama-3-8b"))
+        self.assertAlmostEqual(estimate_cost("gpt-4o", 1_000_000, 0), 2.50)
+        self.assertAlmostEqual(estimate_cost("gpt-4o", 1_000_000, 1_000_000, cached_tokens=1_000_000), 11.25)
+        self.assertEqual(estimate_cost("fake:latency=1s", 1000, 1000), 0.0)
+    
+    def test_record_from_result(self):
+        """Token usage, retries and cost are taken from the call result."""
+        response = AIMessage(
+            content="ok", 
+            usage_metadata={"input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100, "input_token_details": {"cache_read": 400}}
+        )
+        record = make_record("cv", "tailoring", "gpt-4o", "default", CallResult(response, attempts=2, latency=1.5), ttft=0.3, predicted_tokens=990)
+        self.assertEqual((record.status, record.attempts, record.latency, record.ttft), ("ok", 2, 1.5, 0.3))
+        self.assertEqual((record.prompt_tokens, record.completion_tokens, record.cached_tokens), (1000, 100, 400))
+        self.assertAlmostEqual(record.cost, (600 * 2.50 + 400 * 1.25 + 100 * 10.00) / 1_000_000)
+        
+        error = TimeoutError("slow")
+        error.attempts = 3
+        failed = make_record("cv", "tailoring", "gpt-4o", "default", latency=3.0, error=error)
+        self.assertEqual((failed.status, failed.attempts, failed.latency, failed.error), ("error", 3, 3.0, "TimeoutError: slow"))
+    
+    def test_load_and_summarize(self):
+        """Records are loaded within a window and summarized per stage and model."""
+        for latency in range(1, 101):
+            record = make_record("cv", "tailoring", "gpt-4o", "default", latency=float(latency))
+            record.status = "ok"
+            record.timestamp = time.time() - latency
+            record_call(record, self.path)
+        record_call(make_record("cv", "extraction", "gpt-4o-mini", "default", latency=0.5, error=ValueError("bad")), self.path)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("not json\n")
+        
+        self.assertEqual(len(load_records(self.path)), 101)
+        self.assertEqual(len(load_records(self.path, time.time() - 50.5)), 51)
+        
+        summary = summarize(load_records(self.path))
+        tailoring = summary[("tailoring", "gpt-4o")]
+        self.assertEqual(tailoring["calls"], 100)
+        self.assertAlmostEqual(tailoring["p50"], 50.5)
+        self.assertAlmostEqual(tailoring["p95"], 95.05)
+        self.assertEqual(summary[("extraction", "gpt-4o-mini")]["errors"], 1)
+        self.assertIsNone(percentile([], 50))
+    
+    def test_parse_window(self):
+        """Time windows accept second to week units."""
+        self.assertEqual(parse_window("30m"), 1800)
+        self.assertEqual(parse_window("7d"), 7 * 86400)
+        with self.assertRaises(ValueError):
+            parse_window("yesterday")
+    
+    def test_pipeline_records_calls(self):
+        """Every LLM call of a pipeline appends one record."""
+        settings = Settings()
+        settings.llm_model = "fake:latency=0s"
+        settings.llm_cache_enabled = False
+        pipeline = CVPipeline(settings)
+        
+        with patch("app.llm.telemetry.TELEMETRY_FILE", self.path):
+            pipeline.invoke_llm([HumanMessage(content="Read the template:\n```\n# {{name}}\n```")], "tailoring")
+            pipeline.invoke_llm_candidates([HumanMessage(content="Hello")], "letter", 3)
+        
+        records = [json.loads(line) for line in self.path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([(r["pipeline"], r["stage"], r["candidates"]) for r in records], [("cv", "tailoring", 1), ("cv", "letter", 3)])
+        self.assertTrue(all(r["status"] == "ok" and r["prompt_tokens"] for r in records))
+
+
+if __name__ == "__main__":
+    unittest.main()
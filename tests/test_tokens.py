@@ -0,0 +1,70 @@
+"""
+Tests for the token counting module and prompt budgets.
+"""
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.config.settings import Settings
+from app.llm.prompts import PromptBuilder
+from app.llm.tokens import TRUNCATION_MARKER, count_message_tokens, count_tokens, truncate_to_tokens
+from app.pipelines.cv import CVPipeline
+
+MODEL = "gpt-4o"
+
+
+class TestTokens(unittest.TestCase):
+    """Test cases for the token counting module and prompt budgets."""
+    
+    def test_fallback_estimate(self):
+        """Test the character-based estimate used when no tokenizer is available."""
+        with patch("app.llm.tokens.get_encoding", return_value=None):
+            self.assertEqual(count_tokens("a" * 40, MODEL), 10)
+            self.assertEqual(count_tokens("a" * 41, MODEL), 11)
+            
+            # Four tokens per message plus three for the reply
+            messages = [SystemMessage(content="a" * 40), HumanMessage(content="b" * 8)]
+            self.assertEqual(count_message_tokens(messages, MODEL), 10 + 4 + 2 + 4 + 3)
+    
+    def test_truncate_to_tokens(self):
+        """Test that truncated text fits the budget and keeps its beginning."""
+        text = "\n".join(f"Line {i} of a long scraped job description" for i in range(200))
+        
+        truncated = truncate_to_tokens(text, 100, MODEL)
+        
+        self.assertLessEqual(count_tokens(truncated, MODEL), 100)
+        self.assertTrue(truncated.startswith("Line 0 of"))
+        self.assertTrue(truncated.endswith(TRUNCATION_MARKER))
+        self.assertEqual(truncate_to_tokens("short", 100, MODEL), "short")
+    
+    def test_budget_trims_lowest_priority_first(self):
+        """Test that the job description is trimmed before the CV when a prompt exceeds its budget."""
+        cv = "\n".join(f"- Achievement {i}" for i in range(50))
+        jd = "\n".join(f"Benefit paragraph {i} with boilerplate text" for i in range(500))
+        
+        prompt = PromptBuilder("Role.")
+        prompt.add_document("CV:", cv, priority=1)
+        prompt.add_job_document("Job Description:", jd, priority=0)
+        system_message, human_message = prompt.build(token_budget=800, model=MODEL)
+        
+        self.assertLessEqual(prompt.token_count, 800)
+        self.assertIn(cv, system_message.content)
+        self.assertIn(TRUNCATION_MARKER, human_message.content)
+        self.assertIn("Benefit paragraph 0 ", human_message.content)
+    
+    def test_extraction_prompt_fits_budget(self):
+        """Test that the name extraction prompt stays within its budget for long inputs."""
+        pipeline = CVPipeline(Settings())
+        cv = "# Jane Doe\n\n" + "Publication on distributed systems. " * 2000
+        jd = "# Senior Tester\n\nAbout Test Co\n\n" + "Responsibilities and benefits. " * 2000
+        
+        messages = pipeline._build_extraction_messages(cv, jd)
+        
+        self.assertLessEqual(count_message_tokens(messages, MODEL), pipeline.settings.llm_input_token_budgets["extraction"])
+        self.assertIn("# Jane Doe", messages[0].content)
+        self.assertIn("About Test Co", messages[1].content)
+
+
+if __name__ == "__main__":
+    unittest.main()